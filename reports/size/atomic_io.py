@@ -0,0 +1,238 @@
+"""Crash-safe writes for the size-report tree.
+
+Every file is serialized in memory, written to a temp file next to its target with a
+single ``write`` and fsynced, then renamed into place. Inside ``batch()`` the renames are
+deferred until the block exits successfully: all staged files are then committed
+together and their directories fsynced, and nothing is replaced if the block raises.
+``append_bytes`` stages appends the same way; a batch performs them (write + fsync) before
+its renames, so an index staged alongside never describes bytes the log does not hold.
+Outside a batch, each call commits immediately. Writes whose bytes already match the file
+on disk are skipped, so unchanged outputs keep their mtime. ``locked()`` takes an advisory
+lock on the report tree so parallel preset jobs serialize their read-modify-write cycles.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from . import instrumentation
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+LOCK_FILENAME = ".update.lock"
+
+# mkstemp creates 0600 files; committed files get the permissions a plain open() would.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+
+def _write_temp(path: Path, data: bytes) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        os.chmod(tmp_name, _FILE_MODE)
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+            fp.flush()
+            os.fsync(fp.fileno())
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return tmp_name
+
+
+def _fsync_directory(directory: Path) -> None:
+    if sys.platform == "win32":
+        return  # directories cannot be opened for fsync on Windows; rename is already durable there
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class WriteBatch:
+    """Files (and deletions) staged in memory until :meth:`commit`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._staged: Dict[Path, bytes | None] = {}
+        self._appends: Dict[Path, bytearray] = {}
+
+    def __len__(self) -> int:
+        return len(self._staged) + len(self._appends)
+
+    def stage(self, path: Path, data: bytes | None) -> None:
+        """Stage ``data`` for ``path`` (``None`` deletes it); later stages of the same path win."""
+        with self._lock:
+            path = Path(os.path.abspath(path))
+            self._staged[path] = data
+            self._appends.pop(path, None)
+
+    def stage_append(self, path: Path, data: bytes) -> None:
+        """Stage ``data`` to be appended to ``path`` (or to the contents already staged for it)."""
+        with self._lock:
+            path = Path(os.path.abspath(path))
+            if self._staged.get(path) is not None:
+                self._staged[path] = self._staged[path] + data
+            else:
+                self._appends.setdefault(path, bytearray()).extend(data)
+
+    def unstage(self, path: Path) -> None:
+        with self._lock:
+            self._staged.pop(Path(os.path.abspath(path)), None)
+
+    def commit(self) -> None:
+        with self._lock:
+            staged, self._staged = self._staged, {}
+            appends, self._appends = self._appends, {}
+        temps: Dict[Path, str] = {}
+        try:
+            for path, data in staged.items():
+                if data is not None:
+                    temps[path] = _write_temp(path, data)
+            # Appends land after every temp file exists and before any rename.
+            for path, data in appends.items():
+                _append(path, bytes(data))
+        except BaseException:
+            for tmp_name in temps.values():
+                Path(tmp_name).unlink(missing_ok=True)
+            raise
+        for path, data in staged.items():
+            if data is None:
+                path.unlink(missing_ok=True)
+            else:
+                os.replace(temps[path], path)
+        for directory in sorted({path.parent for path in (*staged, *appends)}):
+            _fsync_directory(directory)
+
+    def discard(self) -> None:
+        with self._lock:
+            self._staged = {}
+            self._appends = {}
+
+
+_batch: WriteBatch | None = None
+
+
+@contextmanager
+def batch() -> Iterator[WriteBatch]:
+    """Collect writes and commit them together on success; nested calls join the outer batch."""
+    global _batch
+    if _batch is not None:
+        yield _batch
+        return
+    current = _batch = WriteBatch()
+    try:
+        yield current
+        _batch = None
+        current.commit()
+    finally:
+        _batch = None
+        current.discard()
+
+
+def _unchanged(path: Path, data: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        return path.read_bytes() == data
+    except OSError:
+        return False
+
+
+def write_bytes(path: Path, data: bytes) -> int:
+    """Write ``data`` to ``path`` atomically (deferred inside a batch); returns its length."""
+    if _unchanged(path, data):
+        instrumentation.count("files_unchanged")
+        if _batch is not None:
+            _batch.unstage(path)
+        return len(data)
+    instrumentation.count("bytes_written", len(data))
+    if _batch is not None:
+        _batch.stage(path, data)
+    else:
+        tmp_name = _write_temp(path, data)
+        os.replace(tmp_name, path)
+        _fsync_directory(path.parent)
+    return len(data)
+
+
+def _append(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as fp:
+        fp.write(data)
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def append_bytes(path: Path, data: bytes) -> int:
+    """Append ``data`` to ``path`` and fsync it (deferred inside a batch); returns its length."""
+    instrumentation.count("bytes_written", len(data))
+    if _batch is not None:
+        _batch.stage_append(path, data)
+    else:
+        _append(path, data)
+    return len(data)
+
+
+def write_text(path: Path, text: str) -> int:
+    return write_bytes(path, text.encode("utf-8"))
+
+
+def write_json(path: Path, payload: Any, indent: int | None = 2) -> int:
+    """Serialize ``payload`` once (same output as ``json.dump(..., indent=2)``) and write it."""
+    return write_bytes(path, json.dumps(payload, indent=indent).encode("utf-8"))
+
+
+def delete(path: Path) -> None:
+    if _batch is not None:
+        _batch.stage(path, None)
+    else:
+        path.unlink(missing_ok=True)
+
+
+@contextmanager
+def locked(root: Path, poll_seconds: float = 0.5) -> Iterator[None]:
+    """Hold an exclusive advisory lock on ``root`` (blocks, with a notice, while another run has it)."""
+    lock_path = root / LOCK_FILENAME
+    with lock_path.open("a+b") as fp:
+        announced = False
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fp.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    fp.seek(0)
+                    msvcrt.locking(fp.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if not announced:
+                    print(f"Waiting for another size-report run to release {lock_path}", file=sys.stderr)
+                    announced = True
+                time.sleep(poll_seconds)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+            else:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark report.txt parsing on a synthetic history (time and peak traced memory)."""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+    from reports.size import update, validators  # type: ignore
+else:  # pragma: no cover - module execution path only
+    from .. import update, validators  # type: ignore
+
+ARTIFACT_NAMES = ("index.html", "nt_sandbox.js", "nt_sandbox.wasm", "nt_sandbox.wasm.map")
+
+
+def write_synthetic_report(path: Path, rows: int, artifacts_per_commit: int = len(ARTIFACT_NAMES)) -> int:
+    """Write a report.txt with roughly ``rows`` data rows; returns the exact row count."""
+    names = [
+        ARTIFACT_NAMES[i] if i < len(ARTIFACT_NAMES) else f"{ARTIFACT_NAMES[i % len(ARTIFACT_NAMES)]}.{i}"
+        for i in range(artifacts_per_commit)
+    ]
+    block = artifacts_per_commit + 1
+    commits = max(1, rows // block)
+    with path.open("w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(validators.HEADER)
+        for commit in range(commits):
+            kind = "HEAD" if commit == 0 else "BRANCH"
+            writer.writerow([f"{commit:040x}", "master", kind, ""])
+            for offset, name in enumerate(names):
+                writer.writerow(["", "", name, str(100_000 + commit * 17 + offset)])
+    return commits * block
+
+
+def parse_with_dict_rows(path: Path) -> List[update.SnapshotEntry]:
+    """Reference for the previous approach: a dict per row, validated and converted in two walks."""
+    with path.open(newline="", encoding="utf-8") as fp:
+        rows = list(csv.DictReader(fp))
+    validators.ensure_rows(rows)
+    return update.parse_report_rows(
+        [row["git_sha"], row["git_message"], row["file_name"], row["size_bytes"]] for row in rows
+    )
+
+
+def measure(func: Callable[[Path], object], path: Path, repeat: int) -> Dict[str, float]:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"best_s": round(min(timings), 4), "peak_mib": round(peak / (1 << 20), 2)}
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000, help="Approximate number of CSV data rows.")
+    parser.add_argument("--artifacts", type=int, default=len(ARTIFACT_NAMES), help="Artifacts per commit.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per parser (best is kept).")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = Path(tmp) / update.REPORT_FILENAME
+        row_count = write_synthetic_report(report_path, args.rows, args.artifacts)
+        results = {
+            "rows": row_count,
+            "report_bytes": report_path.stat().st_size,
+            "dict_rows": measure(parse_with_dict_rows, report_path, args.repeat),
+            "streaming": measure(update.read_report_entries, report_path, args.repeat),
+        }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
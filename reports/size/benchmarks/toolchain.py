@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""Benchmark the size-report toolchain on a synthetic history and fail on regressions.
+
+A scratch git repository is generated with ``--commits`` commits (via ``git fast-import``),
+and ``--presets`` report folders whose report.txt files reference those commits with
+``--artifacts`` artifacts each. Every operation runs in a fresh interpreter so its peak RSS
+is isolated; wall time (best of ``--repeat``), spawned subprocesses and peak RSS are
+reported as JSON and compared against ``--baseline`` when given.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping
+
+try:  # resource is POSIX-only; peak RSS is reported as null elsewhere.
+    import resource
+except ImportError:  # pragma: no cover - depends on the platform
+    resource = None  # type: ignore[assignment]
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+    from reports.size import history_index, symbols, update, validators  # type: ignore
+else:  # pragma: no cover - module execution path only
+    from .. import history_index, symbols, update, validators  # type: ignore
+
+BASE_ARTIFACTS = ("index.html", "nt_sandbox.js", "nt_sandbox.wasm", "nt_sandbox.wasm.map")
+OPERATIONS = (
+    "read_report_entries",
+    "update_head_snapshot",
+    "regenerate_manifest",
+    "validate_history_index",
+    "query_binary_index",
+    "diff_symbols",
+)
+DEFAULT_TOLERANCE = 0.25
+# Absolute slack so millisecond-scale jitter on tiny operations is not reported as a regression.
+NOISE_FLOOR = {"wall_s": 0.01, "peak_rss_mib": 2.0}
+START_TIMESTAMP = 1_704_067_200  # 2024-01-01T00:00:00Z
+# Roughly the function count of a debug nt_sandbox.wasm.
+SYMBOL_COUNT = 20_000
+
+
+def artifact_names(count: int) -> List[str]:
+    return [
+        BASE_ARTIFACTS[i] if i < len(BASE_ARTIFACTS) else f"{BASE_ARTIFACTS[i % len(BASE_ARTIFACTS)]}.{i}"
+        for i in range(count)
+    ]
+
+
+def _git(args: List[str], cwd: Path, stdin: bytes | None = None) -> str:
+    result = subprocess.run(["git", *args], cwd=cwd, input=stdin, capture_output=True, check=True)
+    return result.stdout.decode("utf-8")
+
+
+def create_fake_repo(repo: Path, commits: int) -> List[str]:
+    """Initialise ``repo`` with a linear master history; returns SHAs oldest first."""
+    repo.mkdir(parents=True, exist_ok=True)
+    _git(["init", "-q", "--initial-branch=master"], repo)
+    stream: List[bytes] = []
+    for index in range(1, commits + 1):
+        message = f"bench: synthetic change {index}\n".encode("utf-8")
+        content = f"change {index}\n".encode("utf-8")
+        stream.append(b"commit refs/heads/master\n")
+        stream.append(f"mark :{index}\n".encode("ascii"))
+        stream.append(f"committer Bench <bench@example.com> {START_TIMESTAMP + index * 3600} +0000\n".encode("ascii"))
+        stream.append(f"data {len(message)}\n".encode("ascii") + message)
+        if index > 1:
+            stream.append(f"from :{index - 1}\n".encode("ascii"))
+        stream.append(f"M 644 inline src.txt\ndata {len(content)}\n".encode("ascii") + content + b"\n")
+    _git(["fast-import", "--quiet"], repo, b"".join(stream))
+    _git(["reset", "-q", "--hard", "master"], repo)
+    # Build inputs live outside reports/ and must not count as local changes.
+    (repo / ".git" / "info" / "exclude").write_text("out/\n", encoding="utf-8")
+    return _git(["rev-list", "--reverse", "master"], repo).split()
+
+
+def _write_artifacts(folder: Path, names: List[str], rng: random.Random) -> None:
+    folder.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        size = rng.randint(4_096, 65_536)
+        if name.endswith(".wasm"):
+            # Smallest valid module: the header plus one padded custom section.
+            label = b"\x05bench"
+            padding = rng.randbytes(size)
+            payload = label + padding
+            length = len(payload)
+            leb = bytearray()
+            while True:
+                byte = length & 0x7F
+                length >>= 7
+                leb.append(byte | (0x80 if length else 0))
+                if not length:
+                    break
+            (folder / name).write_bytes(b"\0asm\x01\0\0\0" + b"\x00" + bytes(leb) + payload)
+        else:
+            (folder / name).write_bytes(rng.randbytes(size))
+
+
+def write_history_report(path: Path, shas: List[str], names: List[str], rng: random.Random) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sizes = [rng.randint(10_000, 2_000_000) for _ in names]
+    with path.open("w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(validators.HEADER)
+        for position, sha in enumerate(reversed(shas)):
+            writer.writerow([sha, "master", "HEAD" if position == 0 else "BRANCH", ""])
+            for idx, name in enumerate(names):
+                sizes[idx] = max(1, sizes[idx] + rng.randint(-512, 512))
+                writer.writerow(["", "", name, str(sizes[idx])])
+
+
+def write_symbol_tables(folder: Path, shas: List[str], rng: random.Random) -> None:
+    """Symbol tables for the two newest commits: a few hundred symbols grow, shrink, appear or vanish."""
+    base = {f"_ZN2nt6engine{idx}13function_nameEv": rng.randint(8, 4_096) for idx in range(SYMBOL_COUNT)}
+    head = dict(base)
+    for name in rng.sample(sorted(base), 400):
+        head[name] = max(1, head[name] + rng.randint(-256, 256))
+    for name in rng.sample(sorted(base), 50):
+        del head[name]
+    head.update({f"_ZN2nt3new{idx}Ev": rng.randint(8, 1_024) for idx in range(50)})
+    symbols.write_tables(folder, shas[-2], {"nt_sandbox.wasm": base})
+    symbols.write_tables(folder, shas[-1], {"nt_sandbox.wasm": head})
+
+
+def build_synthetic_tree(base: Path, presets: int, commits: int, artifacts: int, seed: int = 0) -> Dict[str, str]:
+    """Create the fake repo, report folders and build outputs; returns the paths used by operations."""
+    rng = random.Random(seed)
+    repo = base / "repo"
+    shas = create_fake_repo(repo, commits)
+    names = artifact_names(artifacts)
+    root = repo / "reports" / "size"
+    for preset in range(presets):
+        write_history_report(root / "bench" / f"preset-{preset}" / update.REPORT_FILENAME, shas, names, rng)
+        _write_artifacts(repo / "out" / f"preset-{preset}", names, rng)
+    write_symbol_tables(root / "bench" / "preset-0", shas, rng)
+    # Later operations read the per-folder index.json files this produces.
+    update.regenerate_manifest(root, repo)
+    return {
+        "repo": str(repo),
+        "root": str(root),
+        "report": str(root / "bench" / "preset-0" / update.REPORT_FILENAME),
+        "input": str(repo / "out" / "preset-0"),
+        "output": str(root / "bench" / "preset-0"),
+    }
+
+
+def _operation(name: str, paths: Mapping[str, str]) -> Callable[[], object]:
+    repo = Path(paths["repo"])
+    root = Path(paths["root"])
+    if name == "read_report_entries":
+        return lambda: update.read_report_entries(Path(paths["report"]))
+    if name == "update_head_snapshot":
+        return lambda: update.update_head_snapshot(Path(paths["input"]), Path(paths["output"]), repo)
+    if name == "regenerate_manifest":
+        return lambda: update.regenerate_manifest(root, repo)
+    if name == "validate_history_index":
+        indexes = sorted(root.glob(f"**/{update.MANIFEST_FILENAME}"))
+        return lambda: [validators.validate_history_index(path) for path in indexes if path.parent != root]
+    if name == "query_binary_index":
+        binaries = sorted(root.glob(f"**/{history_index.INDEX_FILENAME}"))
+        return lambda: [_query_binary_index(path) for path in binaries]
+    if name == "diff_symbols":
+        folder = Path(paths["output"])
+        base_sha, head_sha = symbols.recorded_shas(folder)[:2]
+        return lambda: symbols.diff_tables(symbols.load_tables(folder, base_sha), symbols.load_tables(folder, head_sha))
+    raise ValueError(f"Unknown operation '{name}'")
+
+
+def _query_binary_index(path: Path) -> int:
+    """One SHA lookup per commit plus a 90-day window, the access pattern of dashboards and CI gates."""
+    with history_index.HistoryIndex(path) as index:
+        hits = sum(len(index.find_sha(record.git_sha[:12])) for record in index)
+        newest = index.latest_date()
+        if newest is not None:
+            hits += len(index.between(newest - timedelta(days=90)))
+    return hits
+
+
+def _peak_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and KiB elsewhere.
+    return round(peak / (1 << 20) if sys.platform == "darwin" else peak / 1024, 2)
+
+
+def run_operation(name: str, paths: Mapping[str, str], repeat: int) -> Dict[str, Any]:
+    """Run one operation ``repeat`` times in the current process (meant for a fresh child)."""
+    spawned = [0]
+    original_init = subprocess.Popen.__init__
+
+    def counting_init(self: subprocess.Popen, *args: Any, **kwargs: Any) -> None:
+        spawned[0] += 1
+        original_init(self, *args, **kwargs)
+
+    subprocess.Popen.__init__ = counting_init  # type: ignore[method-assign]
+    try:
+        func = _operation(name, paths)
+        timings: List[float] = []
+        per_run_subprocesses = 0
+        for _ in range(max(1, repeat)):
+            spawned[0] = 0
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+            per_run_subprocesses = spawned[0]
+    finally:
+        subprocess.Popen.__init__ = original_init  # type: ignore[method-assign]
+    return {
+        "wall_s": round(min(timings), 4),
+        "mean_s": round(sum(timings) / len(timings), 4),
+        "subprocesses": per_run_subprocesses,
+        "peak_rss_mib": _peak_rss_mib(),
+    }
+
+
+def run_suite(paths: Mapping[str, str], repeat: int, operations: List[str]) -> Dict[str, Dict[str, Any]]:
+    # spawn (not fork) so each child's peak RSS excludes the generator's memory.
+    context = multiprocessing.get_context("spawn")
+    results: Dict[str, Dict[str, Any]] = {}
+    with context.Pool(processes=1, maxtasksperchild=1) as pool:
+        for name in operations:
+            results[name] = pool.apply(run_operation, (name, dict(paths), repeat))
+    return results
+
+
+def find_regressions(
+    current: Mapping[str, Any], baseline: Mapping[str, Any], tolerance: float
+) -> List[str]:
+    """Compare against a previous results file; subprocess counts must not grow at all."""
+    problems: List[str] = []
+    if current.get("scale") != baseline.get("scale"):
+        problems.append(f"scale mismatch: baseline {baseline.get('scale')} vs current {current.get('scale')}")
+        return problems
+    for name, before in baseline.get("operations", {}).items():
+        after = current["operations"].get(name)
+        if after is None:
+            continue
+        for metric in ("wall_s", "peak_rss_mib"):
+            old, new = before.get(metric), after.get(metric)
+            if old is not None and new is not None and new > old * (1 + tolerance) + NOISE_FLOOR[metric]:
+                problems.append(f"{name}.{metric}: {new} > {old} (+{tolerance:.0%} tolerance)")
+        if after.get("subprocesses", 0) > before.get("subprocesses", 0):
+            problems.append(f"{name}.subprocesses: {after['subprocesses']} > {before['subprocesses']}")
+    return problems
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--presets", type=int, default=4, help="Report folders to generate.")
+    parser.add_argument("--commits", type=int, default=200, help="Commits in the fake repository / rows per report.")
+    parser.add_argument("--artifacts", type=int, default=len(BASE_ARTIFACTS), help="Artifacts per commit.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per operation (best is kept).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic sizes and artifact contents.")
+    parser.add_argument(
+        "--operation", action="append", choices=OPERATIONS, help="Operation to run (repeatable; default: all)."
+    )
+    parser.add_argument("--output", type=Path, help="Write the JSON results to this path.")
+    parser.add_argument("--baseline", type=Path, help="Previous results file to compare against.")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown / RSS growth."
+    )
+    parser.add_argument("--keep", type=Path, help="Generate the tree in this directory and keep it.")
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, Any] | None = None
+    if args.baseline is not None:
+        try:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            print(f"Error: unable to read baseline '{args.baseline}': {exc}", file=sys.stderr)
+            return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = args.keep if args.keep is not None else Path(tmp)
+        base.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        paths = build_synthetic_tree(base, args.presets, args.commits, args.artifacts, args.seed)
+        setup_s = round(time.perf_counter() - started, 3)
+        results: Dict[str, Any] = {
+            "scale": {"presets": args.presets, "commits": args.commits, "artifacts": args.artifacts},
+            "python": sys.version.split()[0],
+            "setup_s": setup_s,
+            "operations": run_suite(paths, args.repeat, args.operation or list(OPERATIONS)),
+        }
+
+    encoded = json.dumps(results, indent=2)
+    print(encoded)
+    if args.output is not None:
+        args.output.write_text(encoded + "\n", encoding="utf-8")
+    if baseline is not None:
+        problems = find_regressions(results, baseline, args.tolerance)
+        for problem in problems:
+            print(f"Regression: {problem}", file=sys.stderr)
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Machine-readable size budgets, evaluated against each snapshot by ``update.py --budgets``.
+
+A budget file maps report folders (relative to ``reports/size``) to per-artifact limits::
+
+    {"thresholds": {"default": {"bytes": 25000, "percent": 2}},
+     "folders": {"sandbox/wasm/release": {
+         "note": "Treat increases with highest priority.",
+         "artifacts": {"nt_sandbox.wasm": {
+             "raw": 204800, "gzip": 81920, "brotli": 65536,
+             "growth": {"bytes": 25000, "percent": 5},
+             "subsystems": {"engine/render": 65536}}}}},
+     "bundles": {"portal": {"gzip": 153600}}}
+
+``raw``/``gzip``/``brotli`` bound the artifact row and its ``#gzip``/``#brotli`` rows;
+``growth`` bounds the increase over the base commit of the CLI summary; ``subsystems``
+bound ``#subsystem:<name>`` rows. Typed metric rows (see ``metrics.py``) are budgeted by
+their full row name, e.g. ``"nt_sandbox#startup": {"raw": 400}`` in the metric's unit; for
+a metric where higher is better ``raw`` is a minimum and ``growth`` bounds the decline.
+A folder with ``"enforce": false`` is evaluated and reported but never fails the run.
+``thresholds`` (same format as ``--thresholds``) sets the
+alert thresholds when no ``--thresholds`` file is given. ``bundles`` holds the gzip budgets
+``scripts/build-portal-preview.sh`` applies to the packaged portal.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple
+
+from . import deltas, metrics
+
+SIZE_LIMITS = ("raw",) + deltas.COMPRESSED_ENCODINGS
+PASS, FAIL, MISSING, SKIPPED = "pass", "fail", "missing", "skipped"
+
+
+class BudgetConfigError(ValueError):
+    """Raised when a budget file is malformed."""
+
+
+def _byte_limit(value: object, where: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise BudgetConfigError(f"{where} must be a non-negative integer (bytes)")
+    return value
+
+
+@dataclass(frozen=True)
+class ArtifactBudget:
+    # "raw"/"gzip"/"brotli" -> maximum bytes
+    sizes: Dict[str, int] = field(default_factory=dict)
+    growth_bytes: int | None = None
+    growth_percent: float | None = None
+    subsystems: Dict[str, int] = field(default_factory=dict)
+
+
+def _parse_artifact(data: object, where: str) -> ArtifactBudget:
+    if not isinstance(data, Mapping):
+        raise BudgetConfigError(f"{where} must be an object")
+    unknown = set(data) - {*SIZE_LIMITS, "growth", "subsystems"}
+    if unknown:
+        raise BudgetConfigError(f"{where} has unknown keys: {', '.join(sorted(unknown))}")
+    sizes = {key: _byte_limit(data[key], f"{where}.{key}") for key in SIZE_LIMITS if key in data}
+    growth = data.get("growth", {})
+    if not isinstance(growth, Mapping):
+        raise BudgetConfigError(f"{where}.growth must be an object")
+    growth_bytes = _byte_limit(growth["bytes"], f"{where}.growth.bytes") if "bytes" in growth else None
+    growth_percent = growth.get("percent")
+    if growth_percent is not None and (
+        isinstance(growth_percent, bool) or not isinstance(growth_percent, (int, float)) or growth_percent < 0
+    ):
+        raise BudgetConfigError(f"{where}.growth.percent must be a non-negative number")
+    subsystems = data.get("subsystems", {})
+    if not isinstance(subsystems, Mapping):
+        raise BudgetConfigError(f"{where}.subsystems must be an object keyed by subsystem")
+    return ArtifactBudget(
+        sizes=sizes,
+        growth_bytes=growth_bytes,
+        growth_percent=None if growth_percent is None else float(growth_percent),
+        subsystems={str(name): _byte_limit(limit, f"{where}.subsystems.{name}") for name, limit in subsystems.items()},
+    )
+
+
+@dataclass(frozen=True)
+class FolderBudget:
+    artifacts: Dict[str, ArtifactBudget]
+    enforce: bool = True
+    note: str | None = None
+
+
+@dataclass
+class BudgetPolicy:
+    folders: Dict[str, FolderBudget] = field(default_factory=dict)
+    bundles: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    thresholds: deltas.ThresholdPolicy | None = None
+
+    def for_folder(self, folder: str) -> FolderBudget | None:
+        return self.folders.get(folder.strip("/"))
+
+    @classmethod
+    def from_mapping(cls, data: object) -> "BudgetPolicy":
+        if not isinstance(data, Mapping):
+            raise BudgetConfigError("budget file must be a JSON object")
+        folders_data = data.get("folders", {})
+        if not isinstance(folders_data, Mapping):
+            raise BudgetConfigError("folders must be an object keyed by report folder")
+        folders: Dict[str, FolderBudget] = {}
+        for name, folder in folders_data.items():
+            where = f"folders.{name}"
+            if not isinstance(folder, Mapping) or not isinstance(folder.get("artifacts", {}), Mapping):
+                raise BudgetConfigError(f"{where} must be an object with an 'artifacts' object")
+            enforce = folder.get("enforce", True)
+            if not isinstance(enforce, bool):
+                raise BudgetConfigError(f"{where}.enforce must be true or false")
+            folders[str(name).strip("/")] = FolderBudget(
+                artifacts={
+                    str(artifact): _parse_artifact(limits, f"{where}.artifacts.{artifact}")
+                    for artifact, limits in folder.get("artifacts", {}).items()
+                },
+                enforce=enforce,
+                note=str(folder["note"]) if folder.get("note") is not None else None,
+            )
+        bundles_data = data.get("bundles", {})
+        if not isinstance(bundles_data, Mapping):
+            raise BudgetConfigError("bundles must be an object keyed by bundle name")
+        bundles: Dict[str, Dict[str, int]] = {}
+        for name, limits in bundles_data.items():
+            if not isinstance(limits, Mapping):
+                raise BudgetConfigError(f"bundles.{name} must be an object")
+            bundles[str(name)] = {
+                str(mode): _byte_limit(limit, f"bundles.{name}.{mode}") for mode, limit in limits.items()
+            }
+        thresholds = None
+        if data.get("thresholds") is not None:
+            try:
+                thresholds = deltas.ThresholdPolicy.from_mapping(data["thresholds"])
+            except deltas.ThresholdConfigError as exc:
+                raise BudgetConfigError(f"thresholds: {exc}") from exc
+        return cls(folders=folders, bundles=bundles, thresholds=thresholds)
+
+    @classmethod
+    def load(cls, path: Path) -> "BudgetPolicy":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            raise BudgetConfigError(f"Unable to read budget file '{path}': {exc}") from exc
+        return cls.from_mapping(data)
+
+
+@dataclass
+class BudgetCheck:
+    artifact: str
+    metric: str
+    limit: float
+    actual: float | None
+    status: str
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "artifact": self.artifact,
+            "metric": self.metric,
+            "limit": self.limit,
+            "actual": self.actual,
+            "status": self.status,
+        }
+
+
+@dataclass
+class FolderResult:
+    folder: str
+    enforced: bool
+    base_sha: str | None
+    head_sha: str | None
+    checks: List[BudgetCheck] = field(default_factory=list)
+
+    @property
+    def failures(self) -> List[BudgetCheck]:
+        return [check for check in self.checks if check.status in (FAIL, MISSING)]
+
+    @property
+    def breached(self) -> bool:
+        """Whether this folder should fail the run."""
+        return self.enforced and bool(self.failures)
+
+    @property
+    def status(self) -> str:
+        if not self.failures:
+            return PASS
+        return FAIL if self.enforced else "warn"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "folder": self.folder,
+            "status": self.status,
+            "enforced": self.enforced,
+            "base": self.base_sha,
+            "head": self.head_sha,
+            "checks": [check.to_dict() for check in self.checks],
+        }
+
+
+def _size_check(
+    artifact: str, metric: str, limit: int, actual: int | None, missing: str, lower_is_better: bool = True
+) -> BudgetCheck:
+    if actual is None:
+        return BudgetCheck(artifact, metric, limit, None, missing)
+    within = actual <= limit if lower_is_better else actual >= limit
+    return BudgetCheck(artifact, metric, limit, actual, PASS if within else FAIL)
+
+
+def evaluate(
+    folder: str,
+    budget: FolderBudget,
+    head_sizes: Mapping[str, int],
+    base_sizes: Mapping[str, int] | None,
+    shas: Tuple[str | None, str | None] = (None, None),
+    schema: metrics.MetricSchema | None = None,
+) -> FolderResult:
+    """Check one snapshot (``head_sizes``, keyed by row name) against ``budget``.
+
+    A budgeted artifact absent from the snapshot fails as ``missing``. Absent ``#brotli`` or
+    ``#subsystem:`` rows (brotli module not installed, no source map) and growth checks
+    without a base snapshot are ``skipped``. ``schema`` supplies each row's direction.
+    """
+    separator = deltas.SUB_ARTIFACT_SEPARATOR
+    schema = schema or metrics.MetricSchema()
+    result = FolderResult(folder=folder, enforced=budget.enforce, base_sha=shas[0], head_sha=shas[1])
+    for artifact, limits in sorted(budget.artifacts.items()):
+        head = head_sizes.get(artifact)
+        if head is None:
+            result.checks.append(BudgetCheck(artifact, "present", 1, 0, MISSING))
+            continue
+        for metric, limit in limits.sizes.items():
+            row = artifact if metric == "raw" else f"{artifact}{separator}{metric}"
+            lower_is_better = schema.type_of(row).lower_is_better
+            result.checks.append(_size_check(artifact, metric, limit, head_sizes.get(row), SKIPPED, lower_is_better))
+        base = base_sizes.get(artifact) if base_sizes is not None else None
+        # Growth is measured in the worse direction of the row's metric.
+        sign = 1 if schema.type_of(artifact).lower_is_better else -1
+        if limits.growth_bytes is not None:
+            if base is None:
+                result.checks.append(BudgetCheck(artifact, "growth_bytes", limits.growth_bytes, None, SKIPPED))
+            else:
+                growth = sign * (head - base)
+                result.checks.append(_size_check(artifact, "growth_bytes", limits.growth_bytes, growth, SKIPPED))
+        if limits.growth_percent is not None:
+            if not base:
+                result.checks.append(BudgetCheck(artifact, "growth_percent", limits.growth_percent, None, SKIPPED))
+            else:
+                percent = round(sign * (head - base) / base * 100, 2)
+                status = PASS if percent <= limits.growth_percent else FAIL
+                result.checks.append(BudgetCheck(artifact, "growth_percent", limits.growth_percent, percent, status))
+        for subsystem, limit in sorted(limits.subsystems.items()):
+            row = f"{artifact}{separator}subsystem:{subsystem}"
+            result.checks.append(_size_check(artifact, f"subsystem:{subsystem}", limit, head_sizes.get(row), SKIPPED))
+    return result
+
+
+def report_payload(budget_path: Path | None, results: List[FolderResult]) -> Dict[str, object]:
+    """Structured pass/fail report written by ``update.py --budgets``."""
+    return {
+        "status": FAIL if any(result.breached for result in results) else PASS,
+        "budget_file": str(budget_path) if budget_path is not None else None,
+        "folders": [result.to_dict() for result in results],
+    }
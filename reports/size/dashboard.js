@@ -1,5 +1,9 @@
 (() => {
 const SUMMARY_URL = 'index.json';
+const SHARD_COMMIT_FIELDS = ['id', 'kind', 'git_sha', 'git_message', 'branch', 'subject', 'date', 'label'];
+const COMPRESSED_ENCODINGS = ['gzip', 'brotli'];
+// Used only when neither the folder index nor the root manifest carries a threshold policy.
+const DEFAULT_THRESHOLDS = { bytes: 25_000, percent: 2 };
 const TABLE_BODY = document.querySelector('#artifact-table tbody');
 const EMPTY_STATE = document.getElementById('empty-state');
 const FOLDER_SELECT = document.getElementById('folder-select');
@@ -36,6 +40,8 @@ const state = {
     folderCache: new Map(),
     currentFolderIndex: 0,
     currentCommits: [],
+    // Typed (non-byte) rows of the current folder: file_name -> { unit, lower_is_better, thresholds }.
+    metrics: {},
     selectedBaseId: null,
     selectedTargetId: null,
     chart: null,
@@ -95,8 +101,11 @@ function renderHistoryView() {
         onSampleBlur: () => {
             clearHistoryPoint();
         },
-        onWindowChange: () => {
-            renderHistoryView();
+        onWindowChange: (windowMode) => {
+            extendHistoryForWindow(windowMode).catch((error) => {
+                console.error(error);
+                renderHistoryView();
+            });
         },
     });
     const lastIndex = state.historySeries.samples.length - 1;
@@ -119,6 +128,11 @@ function formatDelta(value) {
     return `${sign}${formatNumber(value)}`;
 }
 
+function formatUnit(fileName, text) {
+    const unit = state.metrics[fileName]?.unit;
+    return unit && unit !== 'bytes' && unit !== 'count' ? `${text} ${unit}` : text;
+}
+
 function formatPercent(value) {
     if (value === null || value === undefined || Number.isNaN(value)) {
         return '—';
@@ -234,6 +248,36 @@ function findCommitById(commits, id) {
     return commits.find((commit) => getCommitId(commit) === id) || null;
 }
 
+function isAlertingArtifact(fileName) {
+    const separator = fileName.indexOf('#');
+    return separator === -1 || COMPRESSED_ENCODINGS.includes(fileName.slice(separator + 1));
+}
+
+function globToRegExp(pattern) {
+    const source = pattern.replace(/[.+^${}()|[\]\\]/g, '\\$&').replace(/\*/g, '.*').replace(/\?/g, '.');
+    return new RegExp(`^${source}$`);
+}
+
+function normalizeLimits(limits) {
+    return { absolute: limits.bytes ?? limits.absolute, percent: limits.percent, lowerIsBetter: limits.lower_is_better };
+}
+
+// Mirrors deltas.ThresholdPolicy.for_artifact over the policy update.py wrote into the manifest.
+function thresholdsFor(fileName) {
+    const policy = state.currentFolderManifest?.deltas?.thresholds || state.summary?.thresholds || DEFAULT_THRESHOLDS;
+    const exact = policy.artifacts?.[fileName];
+    if (exact) {
+        return normalizeLimits(exact);
+    }
+    const pattern = Object.keys(policy.patterns || {}).find((glob) => globToRegExp(glob).test(fileName));
+    if (pattern) {
+        return normalizeLimits(policy.patterns[pattern]);
+    }
+    // Breakdown rows ("app.wasm#section:code") are informational; compressed
+    // transfer sizes ("app.wasm#gzip") alert like top-level artifacts.
+    return isAlertingArtifact(fileName) ? normalizeLimits(policy) : null;
+}
+
 function computeComparison(baseCommit, targetCommit) {
     if (!baseCommit || !targetCommit) {
         return { rows: [], alertCount: 0 };
@@ -256,19 +300,27 @@ function computeComparison(baseCommit, targetCommit) {
     Array.from(fileNames)
         .sort((a, b) => a.localeCompare(b))
         .forEach((fileName) => {
+            const hadBase = baseMap.has(fileName);
             const baseSize = baseMap.get(fileName) ?? 0;
             const targetSize = targetMap.get(fileName) ?? 0;
             const deltaBytes = targetSize - baseSize;
             let deltaPercent = null;
-            if (baseSize > 0) {
+            // Like deltas.py, a row the base commit did not record has no percent and never alerts.
+            if (!hadBase) {
+                deltaPercent = null;
+            } else if (baseSize > 0) {
                 deltaPercent = (deltaBytes / baseSize) * 100;
             } else if (targetSize > 0) {
                 deltaPercent = 100;
             }
-            const increased = deltaBytes > 0;
-            const exceedsBytes = increased && deltaBytes >= 25_000;
-            const exceedsPercent = increased && deltaPercent !== null && deltaPercent >= 2;
-            const alert = exceedsBytes || exceedsPercent;
+            // Only changes in the worse direction alert (growth, or a drop for higher-is-better metrics).
+            const limits = hadBase ? thresholdsFor(fileName) : null;
+            const lowerIsBetter = limits?.lowerIsBetter ?? state.metrics[fileName]?.lower_is_better;
+            const direction = lowerIsBetter === false ? -1 : 1;
+            const worse = direction * deltaBytes;
+            const worsePercent = deltaPercent === null ? null : direction * deltaPercent;
+            const alert = Boolean(limits) && worse > 0
+                && (worse >= limits.absolute || (worsePercent !== null && worsePercent >= limits.percent));
             if (alert) {
                 alertCount += 1;
             }
@@ -318,9 +370,9 @@ function renderTable(rows, baseCommit, targetCommit) {
 
         row.innerHTML = `
             <td>${artifact.file_name || '<em>(missing)</em>'}</td>
-            <td>${formatNumber(artifact.base_size ?? 0)}</td>
-            <td>${formatNumber(artifact.target_size ?? 0)}</td>
-            <td>${formatDelta(artifact.delta_bytes ?? 0)}</td>
+            <td>${formatUnit(artifact.file_name, formatNumber(artifact.base_size ?? 0))}</td>
+            <td>${formatUnit(artifact.file_name, formatNumber(artifact.target_size ?? 0))}</td>
+            <td>${formatUnit(artifact.file_name, formatDelta(artifact.delta_bytes ?? 0))}</td>
             <td>${formatPercent(artifact.delta_percent)}</td>
             <td>${renderStatusBadge(artifact.alert)}</td>
         `;
@@ -341,6 +393,8 @@ function renderChart(rows, baseCommit, targetCommit) {
         state.chart = null;
     }
 
+    // Typed metrics have their own units and stay out of the byte-size chart.
+    rows = rows.filter((artifact) => !state.metrics[artifact.file_name]);
     if (!rows.length) {
         return;
     }
@@ -402,6 +456,82 @@ async function fetchSummary() {
     return response.json();
 }
 
+// Files listed with a content hash in the manifest are immutable per URL, so the
+// browser cache may serve them without revalidation; anything else is revalidated.
+function fetchVersioned(path, sha256) {
+    if (typeof sha256 === 'string' && sha256) {
+        return fetch(`${path}?v=${sha256.slice(0, 16)}`);
+    }
+    return fetch(path, { cache: 'no-cache' });
+}
+
+function expandShard(shard) {
+    const columns = shard?.columns || {};
+    const names = Array.isArray(shard?.artifacts) ? shard.artifacts : [];
+    const count = Number(shard?.commit_count) || 0;
+    const commits = [];
+    const pairs = [];
+    for (let row = 0; row < count; row += 1) {
+        const commit = {};
+        SHARD_COMMIT_FIELDS.forEach((field) => {
+            commit[field] = columns[field]?.[row] ?? null;
+        });
+        commit.artifacts = [];
+        names.forEach((name, col) => {
+            const size = columns.sizes?.[col]?.[row];
+            if (size !== null && size !== undefined) {
+                commit.artifacts.push({ file_name: name, size_bytes: size });
+            }
+        });
+        commits.push(commit);
+        const deltaBytes = columns.delta_bytes?.[row];
+        if (deltaBytes !== null && deltaBytes !== undefined) {
+            pairs.push({ target: commit.id, delta_bytes: deltaBytes, alerts: columns.alerts?.[row] || [] });
+        }
+    }
+    return { commits, pairs };
+}
+
+function commitTime(commit) {
+    const time = new Date(commit?.date).getTime();
+    return Number.isNaN(time) ? 0 : time;
+}
+
+async function loadNextShard(folderData) {
+    const shardEntry = folderData.pendingShards.shift();
+    if (!shardEntry) {
+        return false;
+    }
+    const response = await fetchVersioned(shardEntry.path, shardEntry.sha256);
+    if (!response.ok) {
+        throw new Error(`Failed to load ${shardEntry.path}: ${response.status}`);
+    }
+    const { commits, pairs } = expandShard(await response.json());
+    // Keep folder-index ordering: newest first, so HEAD leads the selectors.
+    folderData.commits = [...folderData.commits, ...commits].sort((a, b) => commitTime(b) - commitTime(a));
+    folderData.indexData.commits = folderData.commits;
+    folderData.indexData.deltas.pairs.push(...pairs);
+    return true;
+}
+
+async function ensureHistoryDepth(folderData, sampleCount) {
+    if (!folderData?.pendingShards) {
+        return false;
+    }
+    let loaded = false;
+    while (folderData.commits.length < sampleCount && folderData.pendingShards.length) {
+        loaded = (await loadNextShard(folderData)) || loaded;
+    }
+    return loaded;
+}
+
+function requestedHistoryDepth() {
+    const mode = __historyChartScaffold.loadStoredWindowMode
+        ? __historyChartScaffold.loadStoredWindowMode()
+        : __historyChartScaffold.HISTORY_DEFAULT_WINDOW;
+    return Number.parseInt(mode, 10) || __historyChartScaffold.MAX_HISTORY_SAMPLES;
+}
+
 async function ensureFolderData(entry) {
     if (!entry) {
         return { commits: [], indexData: null };
@@ -409,7 +539,24 @@ async function ensureFolderData(entry) {
     if (state.folderCache.has(entry.folder)) {
         return state.folderCache.get(entry.folder);
     }
-    const response = await fetch(entry.index, { cache: 'no-cache' });
+    if (Array.isArray(entry.shards) && entry.shards.length) {
+        // Hot shard first; older archive shards load only when the history window needs them.
+        const folderData = {
+            indexData: {
+                folder: entry.folder,
+                commits: [],
+                deltas: { pairs: [], thresholds: state.summary?.thresholds },
+                metrics: entry.metrics || {},
+            },
+            commits: [],
+            pendingShards: [...entry.shards],
+        };
+        await loadNextShard(folderData);
+        await ensureHistoryDepth(folderData, requestedHistoryDepth());
+        state.folderCache.set(entry.folder, folderData);
+        return folderData;
+    }
+    const response = await fetchVersioned(entry.index, entry.index_sha256);
     if (!response.ok) {
         throw new Error(`Failed to load ${entry.index}: ${response.status}`);
     }
@@ -420,6 +567,23 @@ async function ensureFolderData(entry) {
     return cacheValue;
 }
 
+async function extendHistoryForWindow(windowMode) {
+    const entry = state.summary?.folders?.[state.currentFolderIndex];
+    const folderData = entry ? state.folderCache.get(entry.folder) : null;
+    const loaded = await ensureHistoryDepth(folderData, Number.parseInt(windowMode, 10) || 0);
+    if (!loaded) {
+        renderHistoryView();
+        return;
+    }
+    const { selectedBaseId, selectedTargetId } = state;
+    state.currentCommits = folderData.commits;
+    state.historySeries = hydrateHistorySeries(state.summary, folderData.indexData);
+    populateCommitSelectors(folderData.commits);
+    state.selectedBaseId = selectedBaseId;
+    state.selectedTargetId = selectedTargetId;
+    renderDashboard();
+}
+
 function renderDashboard() {
     const commits = state.currentCommits;
     if (!commits.length) {
@@ -466,6 +630,7 @@ async function selectFolder(index) {
     const { commits, indexData } = await ensureFolderData(entry);
     state.currentCommits = commits;
     state.currentFolderManifest = indexData;
+    state.metrics = indexData?.metrics || {};
     state.historySeries = hydrateHistorySeries(state.summary, indexData);
     populateCommitSelectors(commits);
     renderDashboard();
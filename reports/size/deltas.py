@@ -0,0 +1,353 @@
+"""Bulk size-delta and threshold evaluation shared by the size-report CLI and dashboard data."""
+from __future__ import annotations
+
+import json
+from array import array
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+try:  # NumPy is optional; the pure-Python path produces identical results.
+    import numpy as _np  # type: ignore
+except ImportError:  # pragma: no cover - depends on the environment
+    _np = None
+
+DEFAULT_BYTES_THRESHOLD = 25_000
+DEFAULT_PERCENT_THRESHOLD = 2.0
+# Breakdown rows such as "app.wasm#section:code" are stored next to their parent
+# artifact; they are tracked but excluded from totals and only alert when a policy
+# names them explicitly. Compressed transfer sizes ("app.wasm#gzip") are the
+# exception: they alert under the default thresholds like top-level artifacts.
+SUB_ARTIFACT_SEPARATOR = "#"
+COMPRESSED_ENCODINGS = ("gzip", "brotli")
+
+
+def is_sub_artifact(name: str) -> bool:
+    return SUB_ARTIFACT_SEPARATOR in name
+
+
+def is_compressed_size(name: str) -> bool:
+    _, separator, suffix = name.partition(SUB_ARTIFACT_SEPARATOR)
+    return bool(separator) and suffix in COMPRESSED_ENCODINGS
+
+
+class ThresholdConfigError(ValueError):
+    """Raised when a threshold policy file is malformed."""
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    # Absolute limit, in ``unit`` (bytes unless the limits come from a typed metric).
+    bytes: int = DEFAULT_BYTES_THRESHOLD
+    percent: float = DEFAULT_PERCENT_THRESHOLD
+    unit: str = "bytes"
+    # None alerts on growth and shrinkage alike (byte sizes); typed metrics alert only when
+    # they move the worse way.
+    lower_is_better: bool | None = None
+
+    def worse(self, value: float) -> float:
+        """``value`` (a delta or percent) signed so that a larger result is worse."""
+        if self.lower_is_better is None:
+            return abs(value)
+        return value if self.lower_is_better else -value
+
+    @property
+    def bytes_label(self) -> str:
+        return f"{self.unit}>{self.bytes}"
+
+    @property
+    def percent_label(self) -> str:
+        return f"percent>{self.percent:g}"
+
+    def to_dict(self) -> Dict[str, object]:
+        if self.unit != "bytes" or self.lower_is_better is not None:
+            payload: Dict[str, object] = {"absolute": self.bytes, "percent": self.percent, "unit": self.unit}
+            if self.lower_is_better is not None:
+                payload["lower_is_better"] = self.lower_is_better
+            return payload
+        return {"bytes": self.bytes, "percent": self.percent}
+
+
+def _parse_thresholds(data: object, base: Thresholds, where: str) -> Thresholds:
+    if not isinstance(data, Mapping):
+        raise ThresholdConfigError(f"{where} must be an object")
+    byte_limit = data.get("bytes", base.bytes)
+    percent_limit = data.get("percent", base.percent)
+    if isinstance(byte_limit, bool) or not isinstance(byte_limit, int) or byte_limit < 0:
+        raise ThresholdConfigError(f"{where}.bytes must be a non-negative integer")
+    if isinstance(percent_limit, bool) or not isinstance(percent_limit, (int, float)) or percent_limit < 0:
+        raise ThresholdConfigError(f"{where}.percent must be a non-negative number")
+    return Thresholds(bytes=byte_limit, percent=float(percent_limit))
+
+
+@dataclass
+class ThresholdPolicy:
+    """Default thresholds plus optional per-artifact overrides.
+
+    ``patterns`` (``fnmatch`` row-name patterns, usually the thresholds of typed metrics) are
+    consulted after the exact artifact names and make matching breakdown rows alert.
+    """
+
+    default: Thresholds = field(default_factory=Thresholds)
+    artifacts: Dict[str, Thresholds] = field(default_factory=dict)
+    patterns: List[Tuple[str, Thresholds]] = field(default_factory=list)
+
+    def for_artifact(self, name: str) -> Thresholds | None:
+        if name in self.artifacts:
+            return self.artifacts[name]
+        for pattern, limits in self.patterns:
+            if fnmatchcase(name, pattern):
+                return limits
+        if is_sub_artifact(name) and not is_compressed_size(name):
+            return None
+        return self.default
+
+    def to_dict(self) -> Dict[str, object]:
+        payload: Dict[str, object] = self.default.to_dict()
+        if self.artifacts:
+            payload["artifacts"] = {name: limits.to_dict() for name, limits in sorted(self.artifacts.items())}
+        if self.patterns:
+            payload["patterns"] = {pattern: limits.to_dict() for pattern, limits in self.patterns}
+        return payload
+
+    def with_patterns(self, patterns: Sequence[Tuple[str, Thresholds]]) -> "ThresholdPolicy":
+        """Copy of this policy that also applies ``patterns`` (after its own)."""
+        return ThresholdPolicy(default=self.default, artifacts=self.artifacts, patterns=[*self.patterns, *patterns])
+
+    @classmethod
+    def from_mapping(cls, data: object) -> "ThresholdPolicy":
+        """Build from ``{"default": {...}, "artifacts": {name: {...}}}``; omitted keys keep defaults."""
+        if not isinstance(data, Mapping):
+            raise ThresholdConfigError("threshold policy must be a JSON object")
+        default = _parse_thresholds(data.get("default", {}), Thresholds(), "default")
+        overrides = data.get("artifacts", {})
+        if not isinstance(overrides, Mapping):
+            raise ThresholdConfigError("artifacts must be an object keyed by artifact name")
+        artifacts = {
+            str(name): _parse_thresholds(limits, default, f"artifacts.{name}") for name, limits in overrides.items()
+        }
+        return cls(default=default, artifacts=artifacts)
+
+    @classmethod
+    def load(cls, path: Path) -> "ThresholdPolicy":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            raise ThresholdConfigError(f"Unable to read threshold policy '{path}': {exc}") from exc
+        return cls.from_mapping(data)
+
+
+class SizeMatrix:
+    """Dense commits × artifacts size matrix; an artifact missing from a commit counts as 0 bytes.
+
+    ``present`` marks which cells were actually recorded. A pair whose base cell is missing
+    (a row added in the head commit) keeps its delta but gets no percent and never alerts.
+    """
+
+    __slots__ = ("names", "rows", "present")
+
+    def __init__(self, names: Sequence[str], rows: Sequence[array], present: Sequence[bytes] | None = None) -> None:
+        self.names = list(names)
+        self.rows = list(rows)
+        self.present = list(present) if present is not None else [bytes([1]) * len(self.names) for _ in self.rows]
+
+    @classmethod
+    def from_size_maps(
+        cls, size_maps: Sequence[Mapping[str, int]], names: Sequence[str] | None = None
+    ) -> "SizeMatrix":
+        if names is None:
+            names = sorted({name for sizes in size_maps for name in sizes})
+        rows = [array("q", (int(sizes.get(name, 0)) for name in names)) for sizes in size_maps]
+        present = [bytes(name in sizes for name in names) for sizes in size_maps]
+        return cls(names, rows, present)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+@dataclass
+class PairDeltas:
+    """Per-artifact deltas for one base → head pair."""
+
+    names: List[str]
+    base: array
+    head: array
+    delta: array
+    percent: List[float | None]
+    thresholds: List[List[str]]
+
+    @property
+    def alert_count(self) -> int:
+        return sum(1 for labels in self.thresholds if labels)
+
+    @property
+    def total_delta(self) -> int:
+        return sum(value for name, value in zip(self.names, self.delta) if not is_sub_artifact(name))
+
+    def rows(self) -> List[Dict[str, object]]:
+        return [
+            {
+                "file_name": name,
+                "head_size": self.head[idx],
+                "master_size": self.base[idx],
+                "delta_bytes": self.delta[idx],
+                "delta_percent": self.percent[idx],
+                "alert": bool(self.thresholds[idx]),
+                "thresholds": list(self.thresholds[idx]),
+            }
+            for idx, name in enumerate(self.names)
+        ]
+
+
+def _percent(delta: int, base: int, head: int, had_base: bool = True) -> float | None:
+    if not had_base:
+        return None  # a new row has nothing to grow from
+    if base > 0:
+        # Round half to even on ``ratio * 100`` exactly like ``numpy.round(ratio, 2)``.
+        return round((delta / base) * 100 * 100) / 100
+    if head > 0:
+        return 100.0
+    return None
+
+
+def _labels(delta: int, percent: float | None, limits: Thresholds | None, had_base: bool = True) -> List[str]:
+    labels: List[str] = []
+    if limits is None or not had_base:
+        return labels
+    if percent is not None and limits.worse(percent) >= limits.percent:
+        labels.append(limits.percent_label)
+    if limits.worse(delta) >= limits.bytes:
+        labels.append(limits.bytes_label)
+    return labels
+
+
+def _pair_deltas_python(
+    matrix: SizeMatrix, pairs: Sequence[Tuple[int, int]], limits: Sequence[Thresholds | None]
+) -> List[PairDeltas]:
+    results: List[PairDeltas] = []
+    for base_idx, head_idx in pairs:
+        base_row = matrix.rows[base_idx]
+        head_row = matrix.rows[head_idx]
+        had_base = matrix.present[base_idx]
+        delta = array("q", (h - b for b, h in zip(base_row, head_row)))
+        percent = [_percent(d, b, h, bool(p)) for d, b, h, p in zip(delta, base_row, head_row, had_base)]
+        thresholds = [_labels(d, pct, lim, bool(p)) for d, pct, lim, p in zip(delta, percent, limits, had_base)]
+        results.append(
+            PairDeltas(matrix.names, array("q", base_row), array("q", head_row), delta, percent, thresholds)
+        )
+    return results
+
+
+def _pair_deltas_numpy(
+    matrix: SizeMatrix, pairs: Sequence[Tuple[int, int]], limits: Sequence[Thresholds | None]
+) -> List[PairDeltas]:
+    np = _np
+    sizes = np.array([row.tolist() for row in matrix.rows], dtype=np.int64)
+    sizes = sizes.reshape(len(matrix.rows), len(matrix.names))
+    present = np.frombuffer(b"".join(matrix.present), dtype=np.uint8).reshape(sizes.shape).astype(bool)
+    base_idx = np.fromiter((pair[0] for pair in pairs), dtype=np.intp, count=len(pairs))
+    head_idx = np.fromiter((pair[1] for pair in pairs), dtype=np.intp, count=len(pairs))
+    base = sizes[base_idx]
+    head = sizes[head_idx]
+    delta = head - base
+    had_base = present[base_idx]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(base > 0, delta / np.where(base > 0, base, 1) * 100.0, np.where(head > 0, 100.0, np.nan))
+    ratio[~had_base] = np.nan
+    tracked = np.array([lim is not None for lim in limits], dtype=bool) & had_base
+    byte_limits = np.array([lim.bytes if lim is not None else 0 for lim in limits], dtype=np.int64)
+    percent_limits = np.array([lim.percent if lim is not None else 0.0 for lim in limits], dtype=np.float64)
+    # +1/-1 for the worse direction of typed metrics, 0 where both directions alert.
+    direction = np.array(
+        [0 if lim is None or lim.lower_is_better is None else (1 if lim.lower_is_better else -1) for lim in limits],
+        dtype=np.int64,
+    )
+    # Same half-to-even rounding as _percent; "+ 0.0" turns -0.0 into 0.0 as Python's round() does.
+    rounded = np.round(ratio, 2) + 0.0
+    exceeds_bytes = (np.where(direction == 0, np.abs(delta), delta * direction) >= byte_limits) & tracked
+    with np.errstate(invalid="ignore"):
+        worse_percent = np.where(direction == 0, np.abs(rounded), rounded * direction)
+        exceeds_percent = (worse_percent >= percent_limits) & tracked
+    missing = np.isnan(rounded)
+    results: List[PairDeltas] = []
+    for row in range(len(pairs)):
+        percent = [None if gone else value for value, gone in zip(rounded[row].tolist(), missing[row].tolist())]
+        thresholds: List[List[str]] = [[] for _ in limits]
+        # Only alerting cells are visited; every comparison above ran as one array operation.
+        for col in np.flatnonzero(exceeds_percent[row] | exceeds_bytes[row]).tolist():
+            limit = limits[col]
+            if exceeds_percent[row, col]:
+                thresholds[col].append(limit.percent_label)
+            if exceeds_bytes[row, col]:
+                thresholds[col].append(limit.bytes_label)
+        results.append(
+            PairDeltas(
+                matrix.names,
+                array("q", base[row].tolist()),
+                array("q", head[row].tolist()),
+                array("q", delta[row].tolist()),
+                percent,
+                thresholds,
+            )
+        )
+    return results
+
+
+def compute_pair_deltas(
+    matrix: SizeMatrix,
+    pairs: Sequence[Tuple[int, int]],
+    policy: ThresholdPolicy | None = None,
+    use_numpy: bool | None = None,
+) -> List[PairDeltas]:
+    """Evaluate every ``(base_row, head_row)`` pair of ``matrix`` in one pass."""
+    policy = policy or ThresholdPolicy()
+    limits = [policy.for_artifact(name) for name in matrix.names]
+    if not pairs:
+        return []
+    if use_numpy is None:
+        use_numpy = _np is not None and len(pairs) * max(1, len(matrix.names)) >= 256
+    if use_numpy and _np is not None:
+        return _pair_deltas_numpy(matrix, pairs, limits)
+    return _pair_deltas_python(matrix, pairs, limits)
+
+
+def compare_sizes(
+    base_sizes: Mapping[str, int],
+    head_sizes: Mapping[str, int],
+    names: Sequence[str] | None = None,
+    policy: ThresholdPolicy | None = None,
+) -> PairDeltas:
+    """Single-pair convenience wrapper; ``names`` defaults to the sorted union of both sides."""
+    matrix = SizeMatrix.from_size_maps([base_sizes, head_sizes], names)
+    return compute_pair_deltas(matrix, [(0, 1)], policy)[0]
+
+
+def history_deltas(
+    commit_ids: Sequence[str],
+    size_maps: Sequence[Mapping[str, int]],
+    policy: ThresholdPolicy | None = None,
+) -> List[Dict[str, Any]]:
+    """Deltas between each commit and its predecessor (inputs must be in chronological order).
+
+    The result is the compact ``deltas.pairs`` payload stored in folder ``index.json`` files.
+    """
+    if len(commit_ids) != len(size_maps):
+        raise ValueError("commit_ids and size_maps must have the same length")
+    matrix = SizeMatrix.from_size_maps(size_maps)
+    pairs = [(idx - 1, idx) for idx in range(1, len(size_maps))]
+    payload: List[Dict[str, Any]] = []
+    for (base_idx, head_idx), result in zip(pairs, compute_pair_deltas(matrix, pairs, policy)):
+        changed = [idx for idx, value in enumerate(result.delta) if value]
+        payload.append(
+            {
+                "base": commit_ids[base_idx],
+                "target": commit_ids[head_idx],
+                "delta_bytes": result.total_delta,
+                "alerts": [result.names[idx] for idx, labels in enumerate(result.thresholds) if labels],
+                "artifacts": {
+                    result.names[idx]: [result.delta[idx], result.percent[idx]] for idx in changed
+                },
+            }
+        )
+    return payload
@@ -42,11 +42,33 @@ function formatSampleLabel(commit) {
     return `${sha} — ${message}`;
 }
 
+function indexPrecomputedDeltas(folderIndex) {
+    const pairs = Array.isArray(folderIndex?.deltas?.pairs)
+        ? folderIndex.deltas.pairs
+        : [];
+    const byTarget = new Map();
+    for (const pair of pairs) {
+        if (pair && typeof pair.target === 'string') {
+            byTarget.set(pair.target, pair);
+        }
+    }
+    return byTarget;
+}
+
+function formatDeltaKb(bytes) {
+    const sign = bytes > 0 ? '+' : bytes < 0 ? '−' : '±';
+    return `${sign}${formatSizeKb(Math.abs(bytes))}`;
+}
+
 function computeTotalSizeBytes(artifacts) {
     if (!Array.isArray(artifacts)) {
         return 0;
     }
     return artifacts.reduce((sum, artifact) => {
+        // Breakdown rows ("app.wasm#section:code") are already counted in their parent artifact.
+        if (String(artifact?.file_name ?? '').includes('#')) {
+            return sum;
+        }
         const size = Number(artifact?.size_bytes ?? 0);
         return sum + (Number.isFinite(size) && size >= 0 ? size : 0);
     }, 0);
@@ -122,10 +144,16 @@ function updateHistoryTooltip(series, tooltipEl, sampleIndex) {
         return;
     }
     const message = sample.metadata?.message || sample.label || '';
+    const changeLine = Number.isFinite(sample.deltaBytes)
+        ? `<strong>Change:</strong> ${formatDeltaKb(sample.deltaBytes)}${
+            sample.alerts?.length ? ` (alerts: ${sample.alerts.join(', ')})` : ''
+        }<br/>`
+        : '';
     tooltipEl.hidden = false;
     tooltipEl.innerHTML = `
         <strong>Commit:</strong> ${sample.metadata?.gitSha?.slice(0, 7) || 'UNKNOWN'}<br/>
         <strong>Size:</strong> ${formatSizeKb(sample.totalSizeBytes)}<br/>
+        ${changeLine}
         <strong>Date:</strong> ${new Date(sample.committedAtEpochMs).toLocaleString()}<br/>
         <strong>Message:</strong> ${message || '—'}
     `;
@@ -198,6 +226,8 @@ function hydrateHistorySeries(manifest, folderIndex) {
         ? [...folderIndex.commits]
         : [];
     const samples = [];
+    // Deltas vs. the previous commit are precomputed by update.py (deltas.pairs).
+    const deltasByTarget = indexPrecomputedDeltas(folderIndex);
     let skippedInvalidTimestamp = 0;
     let missingArtifactsCount = 0;
 
@@ -221,9 +251,13 @@ function hydrateHistorySeries(manifest, folderIndex) {
             commit?.id ||
             `${commit?.kind || 'commit'}:${commit?.git_sha || 'UNKNOWN'}`;
 
+        const precomputed = deltasByTarget.get(commitId) || null;
+
         samples.push({
             commitId,
             totalSizeBytes,
+            deltaBytes: precomputed ? Number(precomputed.delta_bytes) : null,
+            alerts: Array.isArray(precomputed?.alerts) ? precomputed.alerts : [],
             committedAtEpochMs,
             label: formatSampleLabel(commit || {}),
             missingArtifacts,
@@ -401,6 +435,9 @@ function renderHistoryChart(series, container, options = {}) {
                     backgroundColor: 'rgba(37, 99, 235, 0.12)',
                     pointRadius: 3,
                     pointHoverRadius: 5,
+                    pointBackgroundColor: series.samples.map((sample) =>
+                        sample.alerts?.length ? '#dc2626' : '#2563eb',
+                    ),
                     tension: 0.25,
                     fill: true,
                 },
@@ -805,6 +842,7 @@ const __historyChartScaffold = {
     MAX_HISTORY_SAMPLES,
     createEmptySeries,
     normalizeWindowMode,
+    loadStoredWindowMode,
 };
 
 window.historyChart = {
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""Fixed-record binary history index (``history-index.bin``) written next to each folder ``index.json``.
+
+The file lets tools answer "commit for SHA X" and "commits between two dates" without
+parsing JSON: it is opened with ``mmap`` and searched by bisection. Layout (little-endian):
+
+* header (``HEADER``): magic, version, counts, interned ``generated_at``/folder names and
+  the byte size and SHA-256 of the companion ``index.json`` (used to detect a stale binary
+  index);
+* commit records (``RECORD``), sorted by date, undated commits first;
+* SHA table (``SHA_ENTRY``): raw 20-byte SHA plus record number, sorted by SHA;
+* artifact sizes (``SIZE_ENTRY``): interned artifact name plus size, referenced by records;
+* string table: ``count + 1`` offsets followed by the UTF-8 blob. Every id, kind, branch,
+  subject, date and artifact name is stored once.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Sequence
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from reports.size import atomic_io  # type: ignore
+else:  # pragma: no cover - script execution path only
+    from . import atomic_io  # type: ignore
+
+INDEX_FILENAME = "history-index.bin"
+MAGIC = b"NTHI"
+FORMAT_VERSION = 2
+NO_STRING = 0xFFFFFFFF
+UNDATED = -(1 << 63)
+
+# magic, version, flags, commit_count, sha_count, size_count, string_count, generated_at, folder,
+# index_json_bytes, index_json_sha256
+HEADER = struct.Struct("<4sHHIIIIIII32s")
+# date_us, sha, id, kind, git_sha, branch, subject, date, sizes_start, sizes_count
+RECORD = struct.Struct("<q20sIIIIIIII")
+SHA_ENTRY = struct.Struct("<20sI")
+SIZE_ENTRY = struct.Struct("<IQ")
+U32 = struct.Struct("<I")
+
+
+class HistoryIndexError(ValueError):
+    """Raised when a binary history index is truncated or has an unknown format."""
+
+
+def _date_us(value: object) -> int:
+    if not isinstance(value, str) or not value:
+        return UNDATED
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return UNDATED
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(microseconds=1)
+
+
+def _sha_bytes(value: object) -> bytes | None:
+    text = str(value or "")
+    if len(text) != 40:
+        return None
+    try:
+        return bytes.fromhex(text)
+    except ValueError:
+        return None
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: object) -> int:
+        if value is None:
+            return NO_STRING
+        text = str(value)
+        idx = self._ids.get(text)
+        if idx is None:
+            idx = self._ids[text] = len(self.values)
+            self.values.append(text)
+        return idx
+
+    def encode(self) -> bytes:
+        blobs = [value.encode("utf-8") for value in self.values]
+        offsets = [0]
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+        return struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(blobs)
+
+
+def build_index(
+    folder: str,
+    commits: Sequence[Mapping[str, Any]],
+    generated_at: str | None = None,
+    index_json: bytes = b"",
+) -> bytes:
+    """Encode folder-index commit objects (``index.json`` ``commits``) as a binary index."""
+    strings = _StringTable()
+    generated_idx = strings.intern(generated_at)
+    folder_idx = strings.intern(folder)
+    ordered = sorted(enumerate(commits), key=lambda pair: (_date_us(pair[1].get("date")), pair[0]))
+    records = bytearray()
+    sizes = bytearray()
+    size_count = 0
+    sha_entries: List[tuple[bytes, int]] = []
+    for position, (_, commit) in enumerate(ordered):
+        sha = _sha_bytes(commit.get("git_sha"))
+        if sha is not None:
+            sha_entries.append((sha, position))
+        artifacts = commit.get("artifacts") or []
+        for artifact in artifacts:
+            sizes += SIZE_ENTRY.pack(strings.intern(artifact["file_name"]), int(artifact["size_bytes"]))
+        records += RECORD.pack(
+            _date_us(commit.get("date")),
+            sha or bytes(20),
+            strings.intern(commit.get("id")),
+            strings.intern(commit.get("kind")),
+            strings.intern(commit.get("git_sha")),
+            strings.intern(commit.get("branch")),
+            strings.intern(commit.get("subject")),
+            strings.intern(commit.get("date")),
+            size_count,
+            len(artifacts),
+        )
+        size_count += len(artifacts)
+    sha_entries.sort()
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        len(ordered),
+        len(sha_entries),
+        size_count,
+        len(strings.values),
+        generated_idx,
+        folder_idx,
+        len(index_json),
+        hashlib.sha256(index_json).digest(),
+    )
+    sha_table = b"".join(SHA_ENTRY.pack(sha, position) for sha, position in sha_entries)
+    return header + bytes(records) + sha_table + bytes(sizes) + strings.encode()
+
+
+def write_index(
+    folder_path: Path, folder: str, commits: Sequence[Mapping[str, Any]], generated_at: str, index_json: bytes
+) -> int:
+    """Write ``history-index.bin`` for a folder next to the encoded ``index_json``; returns bytes written."""
+    return atomic_io.write_bytes(folder_path / INDEX_FILENAME, build_index(folder, commits, generated_at, index_json))
+
+
+@dataclass(frozen=True)
+class CommitRecord:
+    position: int
+    id: str
+    kind: str
+    git_sha: str
+    branch: str | None
+    subject: str | None
+    date: str | None
+    artifacts: Dict[str, int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "git_sha": self.git_sha,
+            "branch": self.branch,
+            "subject": self.subject,
+            "date": self.date,
+            "artifacts": [{"file_name": name, "size_bytes": size} for name, size in self.artifacts.items()],
+        }
+
+
+class _Column(Sequence[Any]):
+    """Lazy view over one record field so ``bisect`` can search the mapped file directly."""
+
+    def __init__(self, length: int, getter: Any) -> None:
+        self._length = length
+        self._getter = getter
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, idx: Any) -> Any:  # type: ignore[override]
+        return self._getter(idx)
+
+
+class HistoryIndex:
+    """Read-only view of a binary history index; use as a context manager."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fp = path.open("rb")
+        try:
+            self._map = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:  # empty file
+            self._fp.close()
+            raise HistoryIndexError(f"{path}: empty history index") from exc
+        try:
+            self._parse_layout()
+        except (HistoryIndexError, struct.error) as exc:
+            self.close()
+            raise HistoryIndexError(f"{path}: {exc}") from exc
+
+    def _parse_layout(self) -> None:
+        view = self._map
+        (
+            magic,
+            version,
+            _flags,
+            self.commit_count,
+            self._sha_count,
+            self._size_count,
+            self._string_count,
+            generated_idx,
+            folder_idx,
+            self.index_json_bytes,
+            index_json_sha256,
+        ) = HEADER.unpack_from(view, 0)
+        self.index_json_sha256 = index_json_sha256.hex()
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise HistoryIndexError(f"unsupported history index (magic {magic!r}, version {version})")
+        self._records = HEADER.size
+        self._sha_table = self._records + self.commit_count * RECORD.size
+        self._sizes = self._sha_table + self._sha_count * SHA_ENTRY.size
+        self._string_offsets = self._sizes + self._size_count * SIZE_ENTRY.size
+        self._string_blob = self._string_offsets + (self._string_count + 1) * U32.size
+        blob_size = U32.unpack_from(view, self._string_offsets + self._string_count * U32.size)[0]
+        if self._string_blob + blob_size != len(view):
+            raise HistoryIndexError("history index is truncated or has trailing data")
+        self._strings = {}
+        self.generated_at = self._string(generated_idx)
+        self.folder = self._string(folder_idx)
+
+    def describes(self, index_json_path: Path) -> bool:
+        """Whether this index was written together with the current contents of ``index_json_path``."""
+        if self.index_json_bytes != index_json_path.stat().st_size:
+            return False  # cheap rejection; equal sizes still need the hash
+        return hashlib.sha256(index_json_path.read_bytes()).hexdigest() == self.index_json_sha256
+
+    def close(self) -> None:
+        self._map.close()
+        self._fp.close()
+
+    def __enter__(self) -> "HistoryIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.commit_count
+
+    def _string(self, idx: int) -> str | None:
+        if idx == NO_STRING:
+            return None
+        cached = self._strings.get(idx)
+        if cached is None:
+            start, end = struct.unpack_from("<II", self._map, self._string_offsets + idx * U32.size)
+            cached = self._strings[idx] = bytes(self._map[self._string_blob + start : self._string_blob + end]).decode(
+                "utf-8"
+            )
+        return cached
+
+    def _date_at(self, position: int) -> int:
+        return struct.unpack_from("<q", self._map, self._records + position * RECORD.size)[0]
+
+    def _sha_at(self, slot: int) -> bytes:
+        offset = self._sha_table + slot * SHA_ENTRY.size
+        return bytes(self._map[offset : offset + 20])
+
+    def record(self, position: int) -> CommitRecord:
+        if not 0 <= position < self.commit_count:
+            raise IndexError(position)
+        (_, _, id_idx, kind_idx, sha_idx, branch_idx, subject_idx, date_idx, sizes_start, sizes_count) = (
+            RECORD.unpack_from(self._map, self._records + position * RECORD.size)
+        )
+        artifacts: Dict[str, int] = {}
+        for slot in range(sizes_start, sizes_start + sizes_count):
+            name_idx, size = SIZE_ENTRY.unpack_from(self._map, self._sizes + slot * SIZE_ENTRY.size)
+            artifacts[self._string(name_idx) or ""] = size
+        return CommitRecord(
+            position=position,
+            id=self._string(id_idx) or "",
+            kind=self._string(kind_idx) or "",
+            git_sha=self._string(sha_idx) or "",
+            branch=self._string(branch_idx),
+            subject=self._string(subject_idx),
+            date=self._string(date_idx),
+            artifacts=artifacts,
+        )
+
+    def __iter__(self) -> Iterator[CommitRecord]:
+        return (self.record(position) for position in range(self.commit_count))
+
+    def find_sha(self, prefix: str) -> List[CommitRecord]:
+        """Records whose SHA starts with the hex ``prefix`` (oldest first)."""
+        prefix = prefix.lower()
+        try:
+            low = bytes.fromhex(prefix.ljust(40, "0"))
+            high = bytes.fromhex(prefix.ljust(40, "f"))
+        except ValueError:
+            return []
+        shas = _Column(self._sha_count, self._sha_at)
+        start = bisect_left(shas, low)
+        end = bisect_right(shas, high)
+        positions = sorted(
+            U32.unpack_from(self._map, self._sha_table + slot * SHA_ENTRY.size + 20)[0] for slot in range(start, end)
+        )
+        return [self.record(position) for position in positions]
+
+    def get(self, commit_id: str) -> CommitRecord | None:
+        """Look up a commit by its folder-index id (``kind:branch:sha``)."""
+        sha = commit_id.rsplit(":", 1)[-1]
+        candidates = self.find_sha(sha) if _sha_bytes(sha) is not None else list(self)
+        return next((record for record in candidates if record.id == commit_id), None)
+
+    def between(self, start: datetime | None = None, end: datetime | None = None) -> List[CommitRecord]:
+        """Dated records with ``start <= date < end`` (oldest first); open bounds when None."""
+        dates = _Column(self.commit_count, self._date_at)
+        low = bisect_right(dates, UNDATED) if start is None else bisect_left(dates, _date_us(start.isoformat()))
+        high = self.commit_count if end is None else bisect_left(dates, _date_us(end.isoformat()))
+        return [self.record(position) for position in range(low, high)]
+
+    def latest_date(self) -> datetime | None:
+        if not self.commit_count or self._date_at(self.commit_count - 1) == UNDATED:
+            return None
+        return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=self._date_at(self.commit_count - 1))
+
+
+def open_index(path: Path) -> HistoryIndex:
+    """Open ``path`` or, when it is a report folder, the folder's ``history-index.bin``."""
+    return HistoryIndex(path / INDEX_FILENAME if path.is_dir() else path)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Query a binary history index without parsing index.json.")
+    parser.add_argument("index", type=Path, help="history-index.bin or the report folder containing it.")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("--sha", help="Print commits whose SHA starts with this hex prefix.")
+    query.add_argument("--days", type=float, help="Print commits from the last N days (relative to the newest commit).")
+    query.add_argument("--since", help="Print commits dated at or after this ISO-8601 timestamp.")
+    args = parser.parse_args(argv)
+
+    try:
+        with open_index(args.index) as index:
+            if args.sha:
+                records = index.find_sha(args.sha)
+            elif args.days is not None:
+                newest = index.latest_date()
+                records = [] if newest is None else index.between(newest - timedelta(days=args.days))
+            elif args.since:
+                since = datetime.fromisoformat(args.since)
+                records = index.between(since if since.tzinfo else since.replace(tzinfo=timezone.utc))
+            else:
+                records = list(index)
+            payload = {
+                "folder": index.folder,
+                "generated_at": index.generated_at,
+                "commits": [record.to_dict() for record in records],
+            }
+    except FileNotFoundError as exc:
+        print(f"Error: {exc} (run update.py to build the index; it is not committed)", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    print(json.dumps(payload, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
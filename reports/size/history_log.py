@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""Append-only, record-framed size history (``history.jsonl``) with a small tail index.
+
+Each line is one JSON record describing a whole commit block in report.txt terms:
+
+* ``{"op": "put", "meta": [git_sha, git_message, KIND], "artifacts": [[file_name, size], ...]}``
+* ``{"op": "drop", "meta": [git_sha, git_message, KIND]}``
+
+Replaying the log yields exactly the rows report.txt would hold (HEAD first, then the
+other blocks newest first), so report.txt stays available as an export view. A snapshot
+appends only the blocks that changed (normally one HEAD record plus at most one BRANCH
+record). ``history.idx.json`` records the log size, the record counts and a hash chain over
+the lines, so fingerprints cost O(new data). Once superseded records outnumber live ones,
+the log is rewritten in compacted form.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from reports.size import atomic_io, instrumentation, validators  # type: ignore
+else:  # pragma: no cover - script execution path only
+    from . import atomic_io, instrumentation, validators  # type: ignore
+
+LOG_FILENAME = "history.jsonl"
+INDEX_FILENAME = "history.idx.json"
+REPORT_FILENAME = "report.txt"
+INDEX_FORMAT_VERSION = 1
+# Compact once dead records outnumber live ones, but never for tiny logs.
+COMPACT_MIN_DEAD = 64
+
+Block = Tuple[List[str], List[List[str]]]
+
+
+class HistoryLogError(RuntimeError):
+    """Raised when history.jsonl cannot be parsed."""
+
+
+def _block_key(meta: Sequence[str]) -> Tuple[str, ...]:
+    sha, message, kind = meta
+    # Only one HEAD block is live at a time; other blocks are identified like report.txt rows.
+    return ("HEAD",) if kind == "HEAD" else (kind, message, sha)
+
+
+def _encode(record: Mapping[str, object]) -> bytes:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _chain(previous: str, line: bytes) -> str:
+    return hashlib.sha256(previous.encode("ascii") + line).hexdigest()
+
+
+def rows_to_blocks(rows: Iterable[Sequence[str]]) -> List[Block]:
+    """Group report.txt data rows (header excluded) into ``(meta, artifact rows)`` blocks."""
+    blocks: List[Block] = []
+    for row in rows:
+        if not row:
+            continue
+        if len(row) > 3 and row[3].strip():
+            if not blocks:
+                raise validators.ValidationError("Artifact row encountered before any metadata row")
+            blocks[-1][1].append([row[2], row[3]])
+        else:
+            blocks.append(([row[0], row[1], row[2]], []))
+    return blocks
+
+
+def _apply(live: Dict[Tuple[str, ...], Tuple[int, Block]], record: Mapping[str, object], number: int) -> None:
+    """Replay one record onto the live blocks (keyed like :func:`_block_key`)."""
+    meta = [str(value) for value in record["meta"]]  # type: ignore[union-attr]
+    key = _block_key(meta)
+    live.pop(key, None)  # re-insert so dict order follows the latest put
+    if record.get("op") != "drop":
+        artifacts = [[str(name), str(value)] for name, value in record.get("artifacts", [])]  # type: ignore[union-attr]
+        live[key] = (number, (meta, artifacts))
+
+
+class HistoryLog:
+    def __init__(self, folder: Path) -> None:
+        self.folder = folder
+        self.path = folder / LOG_FILENAME
+        self.index_path = folder / INDEX_FILENAME
+        self._live: Dict[Tuple[str, ...], Tuple[int, Block]] | None = None
+        self._index: Dict[str, object] | None = None
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    # -- reading -------------------------------------------------------------------------
+
+    def _scan(self) -> None:
+        live: Dict[Tuple[str, ...], Tuple[int, Block]] = {}
+        chain = ""
+        records = 0
+        size = 0
+        with self.path.open("rb") as fp:
+            for number, line in enumerate(fp, start=1):
+                size += len(line)
+                if not line.strip():
+                    continue
+                chain = _chain(chain, line)
+                records += 1
+                try:
+                    _apply(live, json.loads(line), records)
+                except (ValueError, KeyError, TypeError) as exc:
+                    raise HistoryLogError(f"{self.path}:{number}: malformed record ({exc})") from exc
+        self._live = live
+        self._index = {"version": INDEX_FORMAT_VERSION, "bytes": size, "records": records, "chain": chain}
+
+    def _load_index(self) -> Dict[str, object] | None:
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(index, dict) or index.get("version") != INDEX_FORMAT_VERSION:
+            return None
+        try:
+            if index.get("bytes") != self.path.stat().st_size:
+                return None  # the log changed behind our back (merge, manual edit): rescan
+        except OSError:
+            return None
+        return index
+
+    def blocks(self) -> List[Block]:
+        """Live blocks in report.txt order: HEAD first, then the rest newest first."""
+        if self._live is None:
+            self._scan()
+        assert self._live is not None
+        ordered = list(self._live.values())
+        head = [block for _, block in ordered if block[0][2] == "HEAD"]
+        rest = [block for _, block in reversed(ordered) if block[0][2] != "HEAD"]
+        return head + rest
+
+    def read_rows(self) -> List[List[str]]:
+        rows: List[List[str]] = []
+        for meta, artifacts in self.blocks():
+            rows.append([*meta, ""])
+            rows.extend(["", "", name, size] for name, size in artifacts)
+        instrumentation.count("history_log_records_read", int(self.index()["records"]))
+        return rows
+
+    def index(self) -> Dict[str, object]:
+        if self._index is None:
+            self._index = self._load_index()
+        if self._index is None:
+            self._scan()
+            self._write_index()
+        assert self._index is not None
+        return self._index
+
+    def fingerprint(self) -> Dict[str, object]:
+        """Cheap stand-in for hashing the whole file: log size plus the line hash chain."""
+        index = self.index()
+        return {"report_bytes": index["bytes"], "report_sha256": index["chain"]}
+
+    # -- writing -------------------------------------------------------------------------
+
+    def _write_index(self) -> None:
+        assert self._index is not None
+        atomic_io.write_json(self.index_path, self._index, indent=None)
+
+    def _append(self, records: Sequence[Mapping[str, object]]) -> None:
+        index = self.index() if self.exists() else {
+            "version": INDEX_FORMAT_VERSION,
+            "bytes": 0,
+            "records": 0,
+            "chain": "",
+        }
+        chain = str(index["chain"])
+        payload = bytearray()
+        for record in records:
+            line = _encode(record)
+            chain = _chain(chain, line)
+            payload += line
+        # Staged with the rest of the run's batch, so a failing run appends nothing.
+        atomic_io.append_bytes(self.path, bytes(payload))
+        if self._live is not None or not self.exists():
+            # Replay the new records in memory: later reads in this run must not rescan the
+            # log, and inside a batch the bytes are not on disk yet.
+            live = self._live if self._live is not None else {}
+            for number, record in enumerate(records, start=int(index["records"]) + 1):
+                _apply(live, record, number)
+            self._live = live
+        self._index = {
+            "version": INDEX_FORMAT_VERSION,
+            "bytes": int(index["bytes"]) + len(payload),
+            "records": int(index["records"]) + len(records),
+            "chain": chain,
+        }
+        self._write_index()
+
+    def write_rows(self, rows: Iterable[Sequence[str]]) -> int:
+        """Make the log materialize to ``rows`` by appending only the differences.
+
+        Returns the number of records appended.
+        """
+        desired = rows_to_blocks(rows)
+        current = {_block_key(meta): (meta, artifacts) for meta, artifacts in self.blocks()} if self.exists() else {}
+        desired_keys = {_block_key(meta) for meta, _ in desired}
+        records: List[Dict[str, object]] = [
+            {"op": "drop", "meta": current[key][0]} for key in current if key not in desired_keys
+        ]
+        # Appending oldest first keeps "newest first" when the log is replayed in reverse.
+        for meta, artifacts in reversed(desired):
+            if current.get(_block_key(meta)) != (meta, artifacts):
+                records.append({"op": "put", "meta": meta, "artifacts": [[name, int(size)] for name, size in artifacts]})
+        if records:
+            self._append(records)
+        live = len(desired)
+        if int(self.index()["records"]) - live >= max(COMPACT_MIN_DEAD, live):
+            self.compact()
+        return len(records)
+
+    def compact(self) -> None:
+        """Rewrite the log with live records only (atomic replace, together with the index)."""
+        blocks = self.blocks()
+        chain = ""
+        payload = bytearray()
+        live: Dict[Tuple[str, ...], Tuple[int, Block]] = {}
+        # Oldest first so that replay order is preserved.
+        head = [block for block in blocks if block[0][2] == "HEAD"]
+        rest = [block for block in blocks if block[0][2] != "HEAD"]
+        for number, (meta, artifacts) in enumerate([*reversed(rest), *head], start=1):
+            record = {"op": "put", "meta": meta, "artifacts": [[name, int(value)] for name, value in artifacts]}
+            line = _encode(record)
+            chain = _chain(chain, line)
+            payload += line
+            _apply(live, record, number)
+        size = atomic_io.write_bytes(self.path, bytes(payload))
+        self._live = live
+        self._index = {"version": INDEX_FORMAT_VERSION, "bytes": size, "records": len(blocks), "chain": chain}
+        self._write_index()
+
+    # -- CSV interop ---------------------------------------------------------------------
+
+    def export_csv(self, destination: Path) -> None:
+        buffer = io.StringIO(newline="")
+        writer = csv.writer(buffer)
+        writer.writerow(validators.HEADER)
+        writer.writerows(self.read_rows())
+        atomic_io.write_text(destination, buffer.getvalue())
+
+    def migrate_from_report(self, report_path: Path) -> int:
+        """Seed an empty log from report.txt; returns the number of blocks written."""
+        if self.exists():
+            raise HistoryLogError(f"{self.path} already exists")
+        with report_path.open(newline="", encoding="utf-8") as fp:
+            reader = csv.reader(fp)
+            header = next(reader, [])
+            if header != validators.HEADER:
+                raise HistoryLogError(f"Unexpected report header {header}. Expected {validators.HEADER}.")
+            rows = list(reader)
+        validators.ensure_rows(
+            [dict(zip(validators.HEADER, [*row, *([""] * (len(validators.HEADER) - len(row)))])) for row in rows if row]
+        )
+        return self.write_rows(rows)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage append-only history.jsonl size logs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Convert report.txt in each folder to history.jsonl.")
+    migrate.add_argument("folders", nargs="+", type=Path)
+    migrate.add_argument("--keep-csv", action="store_true", help="Leave report.txt in place (the log takes precedence).")
+    export = sub.add_parser("export", help="Write the report.txt view of a folder's history log.")
+    export.add_argument("folder", type=Path)
+    export.add_argument("--output", type=Path, help="Destination (default: <folder>/report.txt).")
+    compact = sub.add_parser("compact", help="Rewrite a history log without superseded records.")
+    compact.add_argument("folders", nargs="+", type=Path)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "migrate":
+            for folder in args.folders:
+                report_path = folder / REPORT_FILENAME
+                if not report_path.is_file():
+                    print(f"Error: '{report_path}' does not exist", file=sys.stderr)
+                    return 1
+                log = HistoryLog(folder)
+                blocks = log.migrate_from_report(report_path)
+                if not args.keep_csv:
+                    report_path.unlink()
+                print(f"Migrated {report_path} → {log.path} ({blocks} blocks)")
+        elif args.command == "export":
+            log = HistoryLog(args.folder)
+            if not log.exists():
+                print(f"Error: '{log.path}' does not exist", file=sys.stderr)
+                return 1
+            destination = args.output or args.folder / REPORT_FILENAME
+            log.export_csv(destination)
+            print(f"Exported {log.path} → {destination}")
+        else:
+            for folder in args.folders:
+                log = HistoryLog(folder)
+                if not log.exists():
+                    print(f"Error: '{log.path}' does not exist", file=sys.stderr)
+                    return 1
+                log.compact()
+                print(f"Compacted {log.path} ({log.index()['records']} records)")
+    except (HistoryLogError, validators.ValidationError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
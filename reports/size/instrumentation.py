@@ -0,0 +1,85 @@
+"""Opt-in phase timing and counters for size-report runs (``update.py --timings/--profile``).
+
+Instrumentation is disabled by default, so ``phase`` and ``count`` cost almost nothing
+unless ``activate`` was called. Phases nest; the recorded name is the ``/``-joined path
+(e.g. ``regenerate_manifest/write_indexes``) and repeated entries accumulate.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List
+
+
+class RunRecorder:
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stack: List[str] = []
+        self._phases: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, int] = {}
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        self._stack.append(name)
+        path = "/".join(self._stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            with self._lock:
+                record = self._phases.setdefault(path, {"seconds": 0.0, "calls": 0})
+                record["seconds"] += elapsed
+                record["calls"] += 1
+
+    def phase(self, name: str) -> ContextManager[None]:
+        """Time a block; call from the coordinating thread only (the phase stack is shared)."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add to a counter; safe to call from worker threads."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = {
+                name: {"seconds": round(record["seconds"], 6), "calls": int(record["calls"])}
+                for name, record in self._phases.items()
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 6),
+            "phases": phases,
+            "counters": counters,
+        }
+
+
+_recorder = RunRecorder()
+
+
+def activate() -> RunRecorder:
+    """Start recording into a fresh recorder and return it."""
+    global _recorder
+    _recorder = RunRecorder(enabled=True)
+    return _recorder
+
+
+def recorder() -> RunRecorder:
+    return _recorder
+
+
+def phase(name: str) -> ContextManager[None]:
+    return _recorder.phase(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    _recorder.count(name, amount)
@@ -0,0 +1,168 @@
+"""Typed metrics: units, direction and alert thresholds for report rows that are not byte sizes.
+
+Report rows keep their ``size_bytes`` column; for a typed row it holds the value as a
+non-negative integer in the metric's unit. A schema file maps row-name patterns (``fnmatch``,
+first match wins) to types::
+
+    {"metrics": {
+        "*#startup": {"unit": "ms", "thresholds": {"absolute": 20, "percent": 10}},
+        "*#frame_time_p99": {"unit": "us"},
+        "*#fps": {"unit": "count", "lower_is_better": false}}}
+
+Rows no rule matches are byte sizes. Runtime numbers are recorded by dropping a
+``<name>.metrics.json`` file (``{"startup": 412}`` or ``{"startup": {"value": 0.41, "unit": "s"}}``)
+next to the build outputs; each entry becomes a ``<name>#<metric>`` row. ``thresholds``
+(``absolute`` in the metric's unit, ``percent``) make matching rows alert like top-level artifacts.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from . import deltas
+
+BYTES = "bytes"
+UNITS = (BYTES, "count", "ns", "us", "ms", "s")
+METRICS_SUFFIX = ".metrics.json"
+# Time units convert into each other when a metrics file reports a different one than the schema.
+_TIME_SCALE = {"ns": 1, "us": 1_000, "ms": 1_000_000, "s": 1_000_000_000}
+
+
+class MetricConfigError(ValueError):
+    """Raised when a metric schema or a ``*.metrics.json`` file is malformed."""
+
+
+@dataclass(frozen=True)
+class MetricType:
+    unit: str = BYTES
+    lower_is_better: bool = True
+    thresholds: deltas.Thresholds | None = None
+
+    def format(self, value: int) -> str:
+        if self.unit == BYTES:
+            return f"{value}B"
+        if self.unit == "count":
+            return str(value)
+        return f"{value}{self.unit}"
+
+    def is_regression(self, delta: int) -> bool:
+        return delta > 0 if self.lower_is_better else delta < 0
+
+    def to_dict(self) -> Dict[str, object]:
+        payload: Dict[str, object] = {"unit": self.unit, "lower_is_better": self.lower_is_better}
+        if self.thresholds is not None:
+            payload["thresholds"] = {"absolute": self.thresholds.bytes, "percent": self.thresholds.percent}
+        return payload
+
+
+BYTE_SIZE = MetricType()
+# PE import rows hold function counts, not bytes.
+BUILTIN_RULES: Tuple[Tuple[str, MetricType], ...] = (
+    ("*#imports", MetricType(unit="count")),
+    ("*#imports:*", MetricType(unit="count")),
+)
+
+
+def _parse_type(data: object, where: str) -> MetricType:
+    if not isinstance(data, Mapping):
+        raise MetricConfigError(f"{where} must be an object")
+    unknown = set(data) - {"unit", "lower_is_better", "thresholds"}
+    if unknown:
+        raise MetricConfigError(f"{where} has unknown keys: {', '.join(sorted(unknown))}")
+    unit = data.get("unit")
+    if unit not in UNITS:
+        raise MetricConfigError(f"{where}.unit must be one of {', '.join(UNITS)}")
+    lower_is_better = data.get("lower_is_better", True)
+    if not isinstance(lower_is_better, bool):
+        raise MetricConfigError(f"{where}.lower_is_better must be true or false")
+    thresholds = None
+    if data.get("thresholds") is not None:
+        limits = data["thresholds"]
+        if not isinstance(limits, Mapping) or set(limits) != {"absolute", "percent"}:
+            raise MetricConfigError(f"{where}.thresholds must be an object with 'absolute' and 'percent'")
+        absolute, percent = limits["absolute"], limits["percent"]
+        if isinstance(absolute, bool) or not isinstance(absolute, int) or absolute < 0:
+            raise MetricConfigError(f"{where}.thresholds.absolute must be a non-negative integer ({unit})")
+        if isinstance(percent, bool) or not isinstance(percent, (int, float)) or percent < 0:
+            raise MetricConfigError(f"{where}.thresholds.percent must be a non-negative number")
+        thresholds = deltas.Thresholds(
+            bytes=absolute, percent=float(percent), unit=unit, lower_is_better=lower_is_better
+        )
+    return MetricType(unit=str(unit), lower_is_better=lower_is_better, thresholds=thresholds)
+
+
+@dataclass
+class MetricSchema:
+    """Ordered ``(pattern, type)`` rules; the built-in rules apply after the configured ones."""
+
+    rules: List[Tuple[str, MetricType]] = field(default_factory=list)
+
+    def type_of(self, name: str) -> MetricType:
+        for pattern, metric in (*self.rules, *BUILTIN_RULES):
+            if fnmatchcase(name, pattern):
+                return metric
+        return BYTE_SIZE
+
+    def threshold_patterns(self) -> List[Tuple[str, deltas.Thresholds]]:
+        return [(pattern, metric.thresholds) for pattern, metric in self.rules if metric.thresholds is not None]
+
+    def types_for(self, names: Iterable[str]) -> Dict[str, Dict[str, object]]:
+        """The ``metrics`` map of a folder index: every row in ``names`` that is not a byte size."""
+        types = {name: self.type_of(name) for name in sorted(set(names))}
+        return {name: metric.to_dict() for name, metric in types.items() if metric != BYTE_SIZE}
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"metrics": {pattern: metric.to_dict() for pattern, metric in self.rules}}
+
+    @classmethod
+    def from_mapping(cls, data: object) -> "MetricSchema":
+        if not isinstance(data, Mapping):
+            raise MetricConfigError("metric schema must be a JSON object")
+        rules_data = data.get("metrics", {})
+        if not isinstance(rules_data, Mapping):
+            raise MetricConfigError("metrics must be an object keyed by row-name pattern")
+        return cls(
+            rules=[(str(pattern), _parse_type(spec, f"metrics.{pattern}")) for pattern, spec in rules_data.items()]
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "MetricSchema":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            raise MetricConfigError(f"Unable to read metric schema '{path}': {exc}") from exc
+        return cls.from_mapping(data)
+
+
+def _convert(value: float, unit: str | None, metric: MetricType, where: str) -> int:
+    if unit is not None and unit != metric.unit:
+        if unit not in _TIME_SCALE or metric.unit not in _TIME_SCALE:
+            raise MetricConfigError(f"{where} is reported in '{unit}' but the schema declares '{metric.unit}'")
+        value = value * _TIME_SCALE[unit] / _TIME_SCALE[metric.unit]
+    return round(value)
+
+
+def read_metrics_file(path: Path, schema: MetricSchema) -> List[Tuple[str, int]]:
+    """``(row name, value)`` pairs of a ``<name>.metrics.json`` file, converted to the schema's units."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        raise MetricConfigError(f"Unable to read metrics file '{path}': {exc}") from exc
+    if not isinstance(data, Mapping):
+        raise MetricConfigError(f"{path.name} must be a JSON object keyed by metric name")
+    stem = path.name[: -len(METRICS_SUFFIX)]
+    rows: List[Tuple[str, int]] = []
+    for name, entry in sorted(data.items()):
+        row = f"{stem}{deltas.SUB_ARTIFACT_SEPARATOR}{name}"
+        where = f"{path.name}: {name}"
+        value, unit = (entry.get("value"), entry.get("unit")) if isinstance(entry, Mapping) else (entry, None)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise MetricConfigError(f"{where} must be a non-negative number")
+        metric = schema.type_of(row)
+        if metric.unit == BYTES and unit not in (None, BYTES):
+            raise MetricConfigError(f"{where} is reported in '{unit}' but no metric schema rule matches '{row}'")
+        rows.append((row, _convert(value, unit, metric, where)))
+    return rows
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Zero-copy PE/COFF section, import and map-file symbol reader for size reports.
+
+Windows binaries (``.exe``/``.dll``) are mapped with ``mmap`` and only their headers,
+section table and import directory are decoded, so the reader runs on any platform. When
+an MSVC ``/MAP`` file sits next to the binary (``<stem>.map``), symbol sizes are derived
+from the distance to the next symbol in the same section (link.exe maps list addresses only).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import re
+import struct
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+PE_SUFFIXES = (".exe", ".dll")
+DEFAULT_TOP_SYMBOLS = 10
+_PE32, _PE32_PLUS = 0x10B, 0x20B
+_IMPORT_DIRECTORY = 1
+_IMPORT_DESCRIPTOR = struct.Struct("<IIIII")
+_SECTION_HEADER = struct.Struct("<8sIIII16x")
+
+# " 0001:00000a40       ?update@@YAXXZ             0000000140001a40 f   game.obj"
+_MAP_SYMBOL = re.compile(r"^\s*([0-9A-Fa-f]{4}):([0-9A-Fa-f]{8})\s+(\S+)\s+[0-9A-Fa-f]{8,16}\b")
+# " 0001:00000000 0000a1b0H .text$mn                CODE"
+_MAP_SECTION = re.compile(r"^\s*([0-9A-Fa-f]{4}):([0-9A-Fa-f]{8})\s+([0-9A-Fa-f]{8})H\s+\S+\s+\S+\s*$")
+
+
+class PeFormatError(ValueError):
+    """Raised when a file is not a well-formed PE image."""
+
+
+@dataclass
+class PeBreakdown:
+    file_size: int
+    # Raw (on-disk) section sizes keyed by section name (".text", ".rdata", ".rsrc", ...).
+    sections: Dict[str, int] = field(default_factory=dict)
+    # Imported functions per DLL (lower-cased DLL name).
+    imports: Dict[str, int] = field(default_factory=dict)
+    # (symbol, size) for the largest map-file symbols, biggest first.
+    largest_symbols: List[Tuple[str, int]] = field(default_factory=list)
+    # Every map-file symbol with its size (empty without a map file).
+    symbols: Dict[str, int] = field(default_factory=dict)
+
+    def sub_artifacts(self) -> List[Tuple[str, int]]:
+        """Flatten into ``(suffix, value)`` rows; ``imports:*`` rows hold function counts."""
+        rows = [(f"section:{name}", size) for name, size in sorted(self.sections.items())]
+        if self.imports:
+            rows.append(("imports", sum(self.imports.values())))
+            rows.extend((f"imports:{dll}", count) for dll, count in sorted(self.imports.items()))
+        rows.extend((f"symbol:{name}", size) for name, size in self.largest_symbols)
+        return rows
+
+
+def _read(view: memoryview, fmt: struct.Struct, offset: int) -> Tuple[int, ...]:
+    if offset < 0 or offset + fmt.size > len(view):
+        raise PeFormatError(f"truncated structure at offset {offset:#x}")
+    return fmt.unpack_from(view, offset)
+
+
+def _c_string(view: memoryview, offset: int, limit: int = 512) -> str:
+    end = offset
+    stop = min(len(view), offset + limit)
+    while end < stop and view[end] != 0:
+        end += 1
+    return bytes(view[offset:end]).decode("ascii", "replace")
+
+
+def analyze_view(view: memoryview) -> PeBreakdown:
+    if len(view) < 0x40 or bytes(view[:2]) != b"MZ":
+        raise PeFormatError("missing MZ header")
+    (pe_offset,) = _read(view, struct.Struct("<I"), 0x3C)
+    if bytes(view[pe_offset : pe_offset + 4]) != b"PE\0\0":
+        raise PeFormatError("missing PE signature")
+    coff = pe_offset + 4
+    _, section_count, _, _, _, optional_size, _ = _read(view, struct.Struct("<HHIIIHH"), coff)
+    optional = coff + 20
+    (magic,) = _read(view, struct.Struct("<H"), optional)
+    if magic == _PE32:
+        directory_count_offset, thunk_size = optional + 92, 4
+    elif magic == _PE32_PLUS:
+        directory_count_offset, thunk_size = optional + 108, 8
+    else:
+        raise PeFormatError(f"unknown optional header magic {magic:#x}")
+    (directory_count,) = _read(view, struct.Struct("<I"), directory_count_offset)
+    directories = [
+        _read(view, struct.Struct("<II"), directory_count_offset + 4 + idx * 8)
+        for idx in range(min(directory_count, 16))
+    ]
+
+    breakdown = PeBreakdown(file_size=len(view))
+    mapping: List[Tuple[int, int, int]] = []  # (virtual address, virtual span, raw pointer)
+    table = optional + optional_size
+    for idx in range(section_count):
+        raw_name, virtual_size, virtual_address, raw_size, raw_pointer = _read(
+            view, _SECTION_HEADER, table + idx * _SECTION_HEADER.size
+        )
+        name = raw_name.rstrip(b"\0").decode("ascii", "replace") or f"section[{idx}]"
+        breakdown.sections[name] = breakdown.sections.get(name, 0) + raw_size
+        mapping.append((virtual_address, max(virtual_size, raw_size), raw_pointer))
+
+    def file_offset(rva: int) -> int:
+        for address, span, pointer in mapping:
+            if address <= rva < address + span:
+                return pointer + rva - address
+        raise PeFormatError(f"RVA {rva:#x} is outside every section")
+
+    if len(directories) > _IMPORT_DIRECTORY and directories[_IMPORT_DIRECTORY][0]:
+        thunk = struct.Struct("<Q" if thunk_size == 8 else "<I")
+        descriptor = file_offset(directories[_IMPORT_DIRECTORY][0])
+        while True:
+            lookup, _, _, name_rva, address_table = _read(view, _IMPORT_DESCRIPTOR, descriptor)
+            if not (lookup or name_rva or address_table):
+                break
+            dll = _c_string(view, file_offset(name_rva)).lower()
+            cursor = file_offset(lookup or address_table)
+            functions = 0
+            while _read(view, thunk, cursor)[0]:
+                functions += 1
+                cursor += thunk_size
+            breakdown.imports[dll] = breakdown.imports.get(dll, 0) + functions
+            descriptor += _IMPORT_DESCRIPTOR.size
+    return breakdown
+
+
+def map_symbol_sizes(lines: Iterable[str]) -> Dict[str, int]:
+    """Symbol sizes from an MSVC link map: gap to the next symbol or the end of its section."""
+    section_ends: Dict[int, int] = {}
+    symbols: Dict[Tuple[int, int], str] = {}
+    for line in lines:
+        match = _MAP_SECTION.match(line)
+        if match:
+            section = int(match.group(1), 16)
+            end = int(match.group(2), 16) + int(match.group(3), 16)
+            section_ends[section] = max(section_ends.get(section, 0), end)
+            continue
+        match = _MAP_SYMBOL.match(line)
+        if match:
+            section = int(match.group(1), 16)
+            if section:  # 0000: holds absolute symbols
+                # Aliases share an address; the first name listed keeps the bytes.
+                symbols.setdefault((section, int(match.group(2), 16)), match.group(3))
+    sizes: Dict[str, int] = {}
+    ordered = sorted(symbols)
+    for idx, (section, offset) in enumerate(ordered):
+        if idx + 1 < len(ordered) and ordered[idx + 1][0] == section:
+            end = ordered[idx + 1][1]
+        else:
+            end = max(section_ends.get(section, offset), offset)
+        name = symbols[(section, offset)]
+        sizes[name] = sizes.get(name, 0) + end - offset
+    return sizes
+
+
+def analyze_pe(path: Path, map_path: Path | None = None, top_symbols: int = DEFAULT_TOP_SYMBOLS) -> PeBreakdown:
+    """Return section sizes, import counts and (with a map file) the largest symbols of ``path``."""
+    with path.open("rb") as fp:
+        if path.stat().st_size == 0:
+            raise PeFormatError("empty file")
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                breakdown = analyze_view(view)
+            finally:
+                view.release()
+    if map_path is None:
+        candidate = path.with_suffix(".map")
+        map_path = candidate if candidate.is_file() else None
+    if map_path is not None:
+        with map_path.open(encoding="utf-8", errors="replace") as fp:
+            breakdown.symbols = map_symbol_sizes(fp)
+        ranked = sorted(breakdown.symbols.items(), key=lambda item: (-item[1], item[0]))
+        breakdown.largest_symbols = ranked[: max(top_symbols, 0)]
+    return breakdown
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Print the section/import/symbol breakdown of a PE binary.")
+    parser.add_argument("binary", type=Path)
+    parser.add_argument("--map", type=Path, help="MSVC /MAP file (default: <binary stem>.map when present).")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_SYMBOLS, help="Largest symbols to list.")
+    args = parser.parse_args(argv)
+    try:
+        breakdown = analyze_pe(args.binary, args.map, args.top)
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    payload = {
+        "file_size": breakdown.file_size,
+        "sections": breakdown.sections,
+        "imports": breakdown.imports,
+        "largest_symbols": breakdown.largest_symbols,
+    }
+    print(json.dumps(payload, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Bounded report.txt history: keep recent BRANCH snapshots in full, downsample older ones.
+
+A policy file maps report folders (relative to ``reports/size``) to rules::
+
+    {"default": {"keep": 180, "downsample": "week"},
+     "folders": {"sandbox/wasm/debug": {"keep": 60, "downsample": "day"}}}
+
+The newest ``keep`` snapshots are retained as-is. Older snapshots keep only the newest
+one per UTC day or ISO week (``"downsample": null`` drops them all). Pruned snapshots are
+appended to ``report-archive.csv.gz`` next to the report, one gzip member per run, so the
+archive is append-only and ``zcat`` yields a single CSV in the report.txt format.
+"""
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence, Tuple, TypeVar
+
+from . import atomic_io
+
+ARCHIVE_FILENAME = "report-archive.csv.gz"
+DOWNSAMPLE_PERIODS = ("day", "week")
+
+T = TypeVar("T")
+
+
+class RetentionConfigError(ValueError):
+    """Raised when a retention policy file is malformed."""
+
+
+@dataclass(frozen=True)
+class RetentionRule:
+    keep: int
+    downsample: str | None = "week"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"keep": self.keep, "downsample": self.downsample}
+
+
+def _parse_rule(data: object, where: str) -> RetentionRule:
+    if not isinstance(data, Mapping):
+        raise RetentionConfigError(f"{where} must be an object")
+    keep = data.get("keep")
+    if isinstance(keep, bool) or not isinstance(keep, int) or keep < 1:
+        raise RetentionConfigError(f"{where}.keep must be a positive integer")
+    downsample = data.get("downsample", "week")
+    if downsample is not None and downsample not in DOWNSAMPLE_PERIODS:
+        raise RetentionConfigError(f"{where}.downsample must be one of {', '.join(DOWNSAMPLE_PERIODS)} or null")
+    return RetentionRule(keep=keep, downsample=downsample)
+
+
+@dataclass
+class RetentionPolicy:
+    """Optional default rule plus per-folder overrides; folders without a rule are never compacted."""
+
+    default: RetentionRule | None = None
+    folders: Dict[str, RetentionRule] = field(default_factory=dict)
+
+    def for_folder(self, folder: str) -> RetentionRule | None:
+        return self.folders.get(folder, self.default)
+
+    @classmethod
+    def from_mapping(cls, data: object) -> "RetentionPolicy":
+        if not isinstance(data, Mapping):
+            raise RetentionConfigError("retention policy must be a JSON object")
+        default = _parse_rule(data["default"], "default") if data.get("default") is not None else None
+        overrides = data.get("folders", {})
+        if not isinstance(overrides, Mapping):
+            raise RetentionConfigError("folders must be an object keyed by report folder")
+        folders = {str(name).strip("/"): _parse_rule(rule, f"folders.{name}") for name, rule in overrides.items()}
+        return cls(default=default, folders=folders)
+
+    @classmethod
+    def load(cls, path: Path) -> "RetentionPolicy":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            raise RetentionConfigError(f"Unable to read retention policy '{path}': {exc}") from exc
+        return cls.from_mapping(data)
+
+
+def _moment(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return (moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+
+
+def _bucket(moment: datetime, period: str) -> Tuple[int, ...]:
+    if period == "day":
+        return (moment.year, moment.month, moment.day)
+    iso = moment.isocalendar()
+    return (iso[0], iso[1])
+
+
+def select_retained(
+    snapshots: Sequence[T], rule: RetentionRule, date_of: Callable[[T], str | None]
+) -> Tuple[List[T], List[T]]:
+    """Split ``snapshots`` into ``(kept, pruned)``, both in their original order.
+
+    Only the dates already attached to the snapshots are used; undated snapshots cannot be
+    bucketed and are always kept.
+    """
+    dated = [(idx, _moment(date_of(item))) for idx, item in enumerate(snapshots)]
+    newest_first = sorted(
+        (pair for pair in dated if pair[1] is not None), key=lambda pair: pair[1], reverse=True  # type: ignore[arg-type, return-value]
+    )
+    keep_indexes = {idx for idx, moment in dated if moment is None}
+    keep_indexes.update(idx for idx, _ in newest_first[: rule.keep])
+    if rule.downsample is not None:
+        seen_buckets: set[Tuple[int, ...]] = set()
+        for idx, moment in newest_first[rule.keep :]:
+            bucket = _bucket(moment, rule.downsample)  # type: ignore[arg-type]
+            if bucket not in seen_buckets:
+                seen_buckets.add(bucket)
+                keep_indexes.add(idx)
+    kept = [item for idx, item in enumerate(snapshots) if idx in keep_indexes]
+    pruned = [item for idx, item in enumerate(snapshots) if idx not in keep_indexes]
+    return kept, pruned
+
+
+def append_archive(folder: Path, header: Sequence[str], rows: Iterable[Sequence[str]]) -> Path:
+    """Append ``rows`` to the folder archive as a new gzip member (header only for a new file).
+
+    The archive is rewritten whole through ``atomic_io``, so inside a batch the append is
+    committed together with the report it was pruned from, or not at all.
+    """
+    archive_path = folder / ARCHIVE_FILENAME
+    try:
+        existing = archive_path.read_bytes()
+    except FileNotFoundError:
+        existing = b""
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    if not existing:
+        writer.writerow(header)
+    writer.writerows(rows)
+    member = gzip.compress(buffer.getvalue().encode("utf-8"), compresslevel=9)
+    atomic_io.write_bytes(archive_path, existing + member)
+    return archive_path
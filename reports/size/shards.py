@@ -0,0 +1,138 @@
+"""Time-windowed, column-oriented history shards consumed lazily by the size dashboard.
+
+Each folder gets ``history/hot.json`` with the commits from the most recent
+``HOT_WINDOW_DAYS`` (measured from the newest commit, so output is stable between
+runs) and one ``history/archive-YYYY-MM.json`` per older calendar month. Shards are
+written minified with one array per field instead of one object per commit.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from . import atomic_io
+
+SHARD_DIRNAME = "history"
+HOT_SHARD_NAME = "hot.json"
+ARCHIVE_PREFIX = "archive-"
+HOT_WINDOW_DAYS = 30
+SHARD_FORMAT_VERSION = 1
+COMMIT_FIELDS = ("id", "kind", "git_sha", "git_message", "branch", "subject", "date", "label")
+
+
+def _commit_moment(commit: Mapping[str, Any]) -> datetime:
+    try:
+        moment = datetime.fromisoformat(str(commit.get("date")))
+    except ValueError:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def _columns(
+    commits: Sequence[Mapping[str, Any]], deltas_by_target: Mapping[str, Mapping[str, Any]]
+) -> Dict[str, Any]:
+    size_maps = [
+        {item["file_name"]: item["size_bytes"] for item in commit.get("artifacts", [])} for commit in commits
+    ]
+    artifact_names = sorted({name for sizes in size_maps for name in sizes})
+    pairs = [deltas_by_target.get(str(commit.get("id"))) or {} for commit in commits]
+    columns: Dict[str, Any] = {field: [commit.get(field) for commit in commits] for field in COMMIT_FIELDS}
+    # One column per artifact (parallel to "artifacts"); null marks an artifact absent from a commit.
+    columns["sizes"] = [[sizes.get(name) for sizes in size_maps] for name in artifact_names]
+    columns["delta_bytes"] = [pair.get("delta_bytes") for pair in pairs]
+    columns["alerts"] = [list(pair.get("alerts", [])) for pair in pairs]
+    return {"artifacts": artifact_names, "columns": columns}
+
+
+def build_shards(
+    folder: str,
+    commits: Sequence[Mapping[str, Any]],
+    delta_pairs: Sequence[Mapping[str, Any]] = (),
+    hot_days: int = HOT_WINDOW_DAYS,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Split folder commits into ``(file_name, payload)`` shards, newest shard first."""
+    ordered = sorted(commits, key=_commit_moment)
+    if not ordered:
+        return []
+    deltas_by_target = {str(pair.get("target")): pair for pair in delta_pairs}
+    cutoff = _commit_moment(ordered[-1]) - timedelta(days=hot_days)
+    hot = [commit for commit in ordered if _commit_moment(commit) >= cutoff]
+    months: Dict[str, List[Mapping[str, Any]]] = {}
+    for commit in ordered:
+        moment = _commit_moment(commit)
+        if moment >= cutoff:
+            continue
+        key = moment.astimezone(timezone.utc).strftime("%Y-%m") if moment.year > 1 else "undated"
+        months.setdefault(key, []).append(commit)
+
+    shards: List[Tuple[str, Dict[str, Any]]] = []
+    for kind, name, chunk in [
+        ("hot", HOT_SHARD_NAME, hot),
+        *[("archive", f"{ARCHIVE_PREFIX}{key}.json", months[key]) for key in sorted(months, reverse=True)],
+    ]:
+        payload: Dict[str, Any] = {
+            "v": SHARD_FORMAT_VERSION,
+            "folder": folder,
+            "kind": kind,
+            "from": chunk[0].get("date"),
+            "to": chunk[-1].get("date"),
+            "commit_count": len(chunk),
+        }
+        payload.update(_columns(chunk, deltas_by_target))
+        shards.append((name, payload))
+    return shards
+
+
+def serialize_shard(payload: Mapping[str, Any]) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def write_shards(
+    root: Path, folder_path: Path, shards: Sequence[Tuple[str, Mapping[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """Write shards under ``folder_path/history`` and return manifest entries (with byte counts).
+
+    Shard files from earlier runs that are no longer produced are removed.
+    """
+    shard_dir = folder_path / SHARD_DIRNAME
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    written: List[Dict[str, Any]] = []
+    for name, payload in shards:
+        encoded = serialize_shard(payload)
+        target = shard_dir / name
+        atomic_io.write_bytes(target, encoded)
+        written.append(
+            {
+                "path": target.relative_to(root).as_posix(),
+                "kind": payload["kind"],
+                "from": payload["from"],
+                "to": payload["to"],
+                "commit_count": payload["commit_count"],
+                "bytes": len(encoded),
+                "sha256": hashlib.sha256(encoded).hexdigest(),
+            }
+        )
+    keep = {name for name, _ in shards}
+    for stale in shard_dir.glob("*.json"):
+        if stale.name not in keep and (stale.name == HOT_SHARD_NAME or stale.name.startswith(ARCHIVE_PREFIX)):
+            atomic_io.delete(stale)
+    return written
+
+
+def expand_shard(payload: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Inverse of the column layout: rebuild folder-index style commit objects."""
+    columns = payload["columns"]
+    names = payload["artifacts"]
+    commits: List[Dict[str, Any]] = []
+    for row in range(int(payload["commit_count"])):
+        commit: Dict[str, Any] = {field: columns[field][row] for field in COMMIT_FIELDS}
+        commit["artifacts"] = [
+            {"file_name": name, "size_bytes": columns["sizes"][col][row]}
+            for col, name in enumerate(names)
+            if columns["sizes"][col][row] is not None
+        ]
+        commits.append(commit)
+    return commits
@@ -0,0 +1,193 @@
+"""Attribute wasm code bytes to source files and engine subsystems from a source map.
+
+Emscripten's ``-gsource-map`` output maps wasm *file offsets* (the generated column) to
+source locations. The map is read through ``mmap``: only the ``sources`` array is
+JSON-decoded, and the ``mappings`` string is VLQ-decoded byte by byte without building
+a segment list. Each segment owns the bytes up to the next segment, clipped to the
+code section. Code bytes that precede the first segment, or that belong to segments
+without a source, count as ``unmapped``.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+UNMAPPED = "unmapped"
+DEFAULT_TOP_SOURCES = 10
+
+# First match wins. GLFW precedes engine/render, which vendors the glfw3webgpu shim.
+SUBSYSTEM_RULES: Tuple[Tuple[str, str], ...] = (
+    ("glfw", "GLFW"),
+    ("/engine/core/", "engine/core"),
+    ("/engine/render/", "engine/render"),
+    ("/engine/platform/", "engine/platform/*"),
+    ("/engine/features/", "engine/features/*"),
+    ("/engine/third_party/", "third_party"),
+    ("/third_party/", "third_party"),
+    ("/_deps/", "third_party"),
+    ("/emscripten/", "emscripten"),
+    ("/system/lib/", "emscripten"),
+)
+
+_BASE64 = {char: idx for idx, char in enumerate(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")}
+_COMMA, _SEMICOLON, _QUOTE = ord(","), ord(";"), ord('"')
+
+
+class SourceMapError(ValueError):
+    """Raised when a source map lacks ``sources``/``mappings`` or has malformed VLQ data."""
+
+
+@dataclass
+class SourceAttribution:
+    code_bytes: int
+    # Bytes per source path (``unmapped`` for code without a mapping).
+    sources: Dict[str, int] = field(default_factory=dict)
+
+    def subsystems(self) -> Dict[str, int]:
+        rolled: Counter[str] = Counter()
+        for source, size in self.sources.items():
+            rolled[UNMAPPED if source == UNMAPPED else subsystem_for(source)] += size
+        return dict(rolled)
+
+    def sub_artifacts(self, top_sources: int = DEFAULT_TOP_SOURCES) -> List[Tuple[str, int]]:
+        """``(suffix, size)`` rows: every subsystem, then the largest source files."""
+        rows = [(f"subsystem:{name}", size) for name, size in sorted(self.subsystems().items())]
+        by_path: Counter[str] = Counter()
+        for source, size in self.sources.items():
+            if source != UNMAPPED:
+                by_path[display_path(source)] += size
+        ranked = sorted(by_path.items(), key=lambda item: (-item[1], item[0]))
+        rows.extend((f"source:{source}", size) for source, size in ranked[:top_sources])
+        return rows
+
+
+def display_path(source: str) -> str:
+    """Drop leading ``./``/``../`` so names do not depend on the build directory depth."""
+    path = source.replace("\\", "/")
+    while path.startswith(("./", "../")):
+        path = path.split("/", 1)[1]
+    return path
+
+
+def subsystem_for(source: str) -> str:
+    """Roll a source path up into an engine subsystem (``other`` when nothing matches)."""
+    normalized = "/" + source.replace("\\", "/").lstrip("./")
+    lowered = normalized.lower()
+    for needle, name in SUBSYSTEM_RULES:
+        if needle not in lowered:
+            continue
+        if name.endswith("/*"):
+            # engine/platform/<name>, engine/features/<name>
+            rest = normalized[lowered.index(needle) + len(needle) :].split("/", 1)
+            return name[:-1] + rest[0] if len(rest) > 1 else name[:-2]
+        return name
+    return "other"
+
+
+def _field_start(view: mmap.mmap, key: bytes) -> int:
+    """Offset of the first non-blank byte of top-level ``key``'s value."""
+    position = view.find(b'"' + key + b'"')
+    if position < 0:
+        raise SourceMapError(f"source map has no '{key.decode()}' field")
+    start = view.find(b":", position) + 1
+    while view[start : start + 1] in (b" ", b"\t", b"\r", b"\n"):
+        start += 1
+    return start
+
+
+def _sources(view: mmap.mmap) -> List[str]:
+    start = _field_start(view, b"sources")
+    # ``sources`` is a flat array of strings: grow the slice to each ``]`` until it parses.
+    end = view.find(b"]", start)
+    while end >= 0:
+        try:
+            value = json.loads(bytes(view[start : end + 1]))
+        except ValueError:
+            end = view.find(b"]", end + 1)
+            continue
+        if not isinstance(value, list):
+            break
+        return [str(item) for item in value]
+    raise SourceMapError("'sources' is not an array of strings")
+
+
+def iter_segments(view: Sequence[int], start: int) -> Iterator[Tuple[int, int | None]]:
+    """Yield ``(generated_column, source_index | None)`` for each segment of ``mappings``.
+
+    ``start`` is the offset of the opening quote; decoding stops at the closing quote.
+    Source indexes are relative-decoded across lines as the spec requires.
+    """
+    if view[start] != _QUOTE:
+        raise SourceMapError("mappings is not a string")
+    position = start + 1
+    column = 0
+    source = 0
+    fields: List[int] = []
+    value = shift = 0
+    base64 = _BASE64
+    while True:
+        char = view[position]
+        position += 1
+        if char == _QUOTE or char == _COMMA or char == _SEMICOLON:
+            if fields:
+                column += fields[0]
+                if len(fields) >= 4:
+                    source += fields[1]
+                    yield column, source
+                else:
+                    yield column, None
+                fields = []
+            if char == _QUOTE:
+                return
+            if char == _SEMICOLON:
+                column = 0
+            continue
+        digit = base64.get(char)
+        if digit is None:
+            raise SourceMapError(f"invalid VLQ character {chr(char)!r} at offset {position - 1}")
+        value |= (digit & 0x1F) << shift
+        if digit & 0x20:
+            shift += 5
+            continue
+        fields.append(-(value >> 1) if value & 1 else value >> 1)
+        value = shift = 0
+
+
+def attribute_view(view: mmap.mmap, code_range: Tuple[int, int] | None) -> SourceAttribution:
+    sources = _sources(view)
+    mappings_start = _field_start(view, b"mappings")
+
+    low, high = code_range if code_range is not None else (0, 1 << 62)
+    totals: Counter[str] = Counter()
+    previous_offset = low
+    previous_source: str = UNMAPPED
+    for offset, source_index in iter_segments(view, mappings_start):
+        if offset > previous_offset:
+            end = min(offset, high)
+            if end > previous_offset:
+                totals[previous_source] += end - previous_offset
+            previous_offset = max(offset, low)
+        if source_index is None or not 0 <= source_index < len(sources):
+            previous_source = UNMAPPED
+        else:
+            previous_source = sources[source_index]
+    if code_range is not None and previous_offset < high:
+        totals[previous_source] += high - previous_offset
+    code_bytes = high - low if code_range is not None else sum(totals.values())
+    return SourceAttribution(code_bytes=code_bytes, sources=dict(totals))
+
+
+def attribute_source_map(map_path: Path, code_range: Tuple[int, int] | None = None) -> SourceAttribution:
+    """Attribute the ``[start, end)`` code range of the wasm file described by ``map_path``."""
+    with map_path.open("rb") as fp:
+        if map_path.stat().st_size == 0:
+            raise SourceMapError("empty source map")
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            try:
+                return attribute_view(mapped, code_range)
+            except IndexError as exc:
+                raise SourceMapError("truncated mappings string") from exc
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Compact per-snapshot symbol tables (``symbols/<sha>.bin``) and cross-commit symbol diffs.
+
+Each HEAD/BRANCH snapshot stores the size of every wasm function (from the ``name``
+section) or native symbol (from the link map) of its artifacts, so a size alert can be
+traced to the functions that moved without rebuilding either commit. Layout:
+
+* header (``HEADER``, uncompressed): magic, version, flags, artifact count and the size of
+  the decompressed body;
+* zlib-compressed body: a string table (``count``, ``count`` UTF-8 lengths, blob) holding
+  every artifact and symbol name once, then per artifact its name id, symbol count, the
+  symbols' name ids and their sizes, all packed little-endian ``uint32``.
+
+Tables are keyed by git SHA and removed together with the snapshots that reference them.
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import struct
+import sys
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from reports.size import atomic_io  # type: ignore
+else:  # pragma: no cover - script execution path only
+    from . import atomic_io  # type: ignore
+
+SYMBOLS_DIRNAME = "symbols"
+TABLE_SUFFIX = ".bin"
+MAGIC = b"NTSY"
+FORMAT_VERSION = 1
+DEFAULT_TOP_CHANGES = 10
+# Tables are git-ignored on master; CI keeps the current set on this branch.
+DATA_BRANCH = "size-symbols"
+
+# magic, version, flags, artifact_count, body_bytes
+HEADER = struct.Struct("<4sHHII")
+U32 = struct.Struct("<I")
+
+# artifact name -> symbol name -> size in bytes
+SymbolTables = Dict[str, Dict[str, int]]
+
+
+class SymbolTableError(ValueError):
+    """Raised when a symbol table is missing, ambiguous or malformed."""
+
+
+def _pack_u32(values: List[int]) -> bytes:
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def encode_tables(tables: Mapping[str, Mapping[str, int]]) -> bytes:
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    sections = bytearray()
+    for artifact in sorted(tables):
+        symbols = sorted(tables[artifact].items())
+        sections += U32.pack(intern(artifact)) + U32.pack(len(symbols))
+        sections += _pack_u32([intern(name) for name, _ in symbols])
+        sections += _pack_u32([min(max(int(size), 0), 0xFFFFFFFF) for _, size in symbols])
+    encoded = [value.encode("utf-8") for value in strings]
+    body = U32.pack(len(encoded)) + _pack_u32([len(item) for item in encoded]) + b"".join(encoded) + sections
+    return HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(tables), len(body)) + zlib.compress(body, 9)
+
+
+def decode_tables(data: bytes) -> SymbolTables:
+    if len(data) < HEADER.size:
+        raise SymbolTableError("symbol table is truncated")
+    magic, version, _, artifact_count, body_bytes = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise SymbolTableError("not a symbol table (bad magic or version)")
+    try:
+        body = zlib.decompress(data[HEADER.size :])
+    except zlib.error as exc:
+        raise SymbolTableError(f"corrupt symbol table: {exc}") from exc
+    if len(body) != body_bytes:
+        raise SymbolTableError("symbol table body has the wrong size")
+    try:
+        (string_count,) = U32.unpack_from(body)
+        lengths = struct.unpack_from(f"<{string_count}I", body, 4)
+        offset = 4 + 4 * string_count
+        strings: List[str] = []
+        for length in lengths:
+            strings.append(body[offset : offset + length].decode("utf-8"))
+            offset += length
+        tables: SymbolTables = {}
+        for _ in range(artifact_count):
+            artifact, count = struct.unpack_from("<II", body, offset)
+            offset += 8
+            names = struct.unpack_from(f"<{count}I", body, offset)
+            sizes = struct.unpack_from(f"<{count}I", body, offset + 4 * count)
+            offset += 8 * count
+            tables[strings[artifact]] = {strings[name]: size for name, size in zip(names, sizes)}
+    except (struct.error, IndexError, UnicodeDecodeError) as exc:
+        raise SymbolTableError(f"malformed symbol table: {exc}") from exc
+    return tables
+
+
+def table_path(folder: Path, sha: str) -> Path:
+    return folder / SYMBOLS_DIRNAME / f"{sha}{TABLE_SUFFIX}"
+
+
+def write_tables(folder: Path, sha: str, tables: Mapping[str, Mapping[str, int]]) -> int:
+    """Store the tables of snapshot ``sha`` (unchanged tables are not rewritten); returns bytes."""
+    return atomic_io.write_bytes(table_path(folder, sha), encode_tables(tables))
+
+
+def recorded_shas(folder: Path) -> List[str]:
+    directory = folder / SYMBOLS_DIRNAME
+    if not directory.is_dir():
+        return []
+    return sorted(path.name[: -len(TABLE_SUFFIX)] for path in directory.glob(f"*{TABLE_SUFFIX}"))
+
+
+def prune_tables(folder: Path, keep_shas: Iterable[str]) -> int:
+    """Delete tables of snapshots no longer in the report; returns how many were removed."""
+    keep = set(keep_shas)
+    stale = [sha for sha in recorded_shas(folder) if sha not in keep]
+    for sha in stale:
+        atomic_io.delete(table_path(folder, sha))
+    return len(stale)
+
+
+def _snapshot_shas(folder: Path) -> List[str]:
+    """SHAs of the snapshots the folder's ``index.json`` records (empty when it is unreadable)."""
+    try:
+        commits = json.loads((folder / "index.json").read_text(encoding="utf-8")).get("commits", [])
+        return [str(commit.get("git_sha") or "") for commit in commits]
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+def _missing_table_error(folder: Path, prefix: str) -> SymbolTableError:
+    recorded = sorted({sha for sha in _snapshot_shas(folder) if sha and sha.startswith(prefix.lower())})
+    if recorded:
+        return SymbolTableError(
+            f"snapshot {recorded[0][:12]} is recorded in {folder / 'index.json'} but its symbol table is not "
+            f"available here: it predates symbol tables or was not restored from the '{DATA_BRANCH}' branch "
+            f"(git fetch origin {DATA_BRANCH} && git archive FETCH_HEAD | tar -x -C reports/size)"
+        )
+    return SymbolTableError(f"no symbol table for '{prefix}' in {folder / SYMBOLS_DIRNAME} and no recorded snapshot")
+
+
+def resolve_sha(folder: Path, prefix: str) -> str:
+    matches = [sha for sha in recorded_shas(folder) if sha.startswith(prefix.lower())]
+    if not matches:
+        raise _missing_table_error(folder, prefix)
+    if len(matches) > 1:
+        raise SymbolTableError(f"'{prefix}' is ambiguous: {', '.join(sha[:12] for sha in matches)}")
+    return matches[0]
+
+
+def load_tables(folder: Path, sha: str) -> SymbolTables:
+    path = table_path(folder, sha)
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError as exc:
+        raise _missing_table_error(folder, sha) from exc
+    return decode_tables(data)
+
+
+@dataclass
+class SymbolChange:
+    artifact: str
+    symbol: str
+    base: int
+    head: int
+
+    @property
+    def delta(self) -> int:
+        return self.head - self.base
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"artifact": self.artifact, "symbol": self.symbol, "base": self.base, "head": self.head, "delta": self.delta}
+
+
+@dataclass
+class SymbolDiff:
+    growers: List[SymbolChange] = field(default_factory=list)
+    shrinkers: List[SymbolChange] = field(default_factory=list)
+    added: List[SymbolChange] = field(default_factory=list)
+    removed: List[SymbolChange] = field(default_factory=list)
+
+    def groups(self) -> List[Tuple[str, List[SymbolChange]]]:
+        return [("grew", self.growers), ("shrank", self.shrinkers), ("added", self.added), ("removed", self.removed)]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {label: [change.to_dict() for change in changes] for label, changes in self.groups()}
+
+    def lines(self) -> List[str]:
+        """Human-readable report in the style of the CLI artifact summary."""
+        lines: List[str] = []
+        for label, changes in self.groups():
+            if not changes:
+                continue
+            lines.append(f"  {label} ({len(changes)}):")
+            lines.extend(
+                f"    - {change.artifact}: {change.symbol}: base={change.base}B head={change.head}B "
+                f"delta={change.delta:+d}B"
+                for change in changes
+            )
+        return lines or ["  no symbol changes"]
+
+
+def diff_tables(
+    base: Mapping[str, Mapping[str, int]],
+    head: Mapping[str, Mapping[str, int]],
+    artifacts: Iterable[str] | None = None,
+    top: int = DEFAULT_TOP_CHANGES,
+) -> SymbolDiff:
+    """Largest ``top`` growers, shrinkers, additions and removals across ``artifacts`` (default: all)."""
+    names = sorted(set(base) | set(head)) if artifacts is None else sorted(set(artifacts))
+    result = SymbolDiff()
+    for artifact in names:
+        base_symbols = base.get(artifact, {})
+        head_symbols = head.get(artifact, {})
+        for symbol, head_size in head_symbols.items():
+            base_size = base_symbols.get(symbol)
+            if base_size is None:
+                result.added.append(SymbolChange(artifact, symbol, 0, head_size))
+            elif head_size > base_size:
+                result.growers.append(SymbolChange(artifact, symbol, base_size, head_size))
+            elif head_size < base_size:
+                result.shrinkers.append(SymbolChange(artifact, symbol, base_size, head_size))
+        for symbol, base_size in base_symbols.items():
+            if symbol not in head_symbols:
+                result.removed.append(SymbolChange(artifact, symbol, base_size, 0))
+    for _, changes in result.groups():
+        changes[:] = heapq.nsmallest(
+            max(top, 0), changes, key=lambda change: (-abs(change.delta), change.artifact, change.symbol)
+        )
+    return result
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect per-snapshot symbol tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    diff = sub.add_parser("diff", help="Top growers, shrinkers, added and removed symbols between two SHAs.")
+    diff.add_argument("folder", type=Path, help="Report folder, e.g. reports/size/sandbox/wasm/release.")
+    diff.add_argument("base", help="Base commit SHA (any unique prefix).")
+    diff.add_argument("head", help="Head commit SHA (any unique prefix).")
+    diff.add_argument("--artifact", action="append", help="Limit to this artifact (repeatable).")
+    diff.add_argument("--top", type=int, default=DEFAULT_TOP_CHANGES, help="Entries per group.")
+    diff.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+    listing = sub.add_parser("list", help="List the SHAs that have a symbol table.")
+    listing.add_argument("folder", type=Path)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "list":
+            for sha in recorded_shas(args.folder):
+                print(sha)
+            return 0
+        base_sha = resolve_sha(args.folder, args.base)
+        head_sha = resolve_sha(args.folder, args.head)
+        result = diff_tables(
+            load_tables(args.folder, base_sha), load_tables(args.folder, head_sha), args.artifact, args.top
+        )
+    except (SymbolTableError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps({"base": base_sha, "head": head_sha, **result.to_dict()}, indent=2))
+    else:
+        print(f"Symbol diff {base_sha[:7]} → {head_sha[:7]}:")
+        print("\n".join(result.lines()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Regenerate the tiny PE fixtures used by ``pe-breakdown-smoke.md``.
+
+The images are not runnable: they only carry the headers, section table and import
+directory that ``reports/size/pe.py`` reads, so they stay a few KB and can be checked in.
+"""
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+HERE = Path(__file__).resolve().parent
+FILE_ALIGNMENT = 0x200
+SECTION_ALIGNMENT = 0x1000
+
+# (name, raw size); imports are written at the start of .rdata.
+SECTIONS: List[Tuple[str, int]] = [
+    (".text", 0x600),
+    (".rdata", 0x400),
+    (".data", 0x200),
+    (".pdata", 0x200),
+    (".rsrc", 0x200),
+]
+IMPORTS: Dict[str, List[str]] = {
+    "KERNEL32.dll": ["GetModuleHandleW", "QueryPerformanceCounter", "ExitProcess"],
+    "USER32.dll": ["CreateWindowExW", "PeekMessageW"],
+    "webgpu_dawn.dll": ["wgpuCreateInstance"],
+}
+
+
+def _import_directory(rva: int, thunk_size: int) -> bytes:
+    """Descriptors, lookup tables, hint/name entries and DLL names laid out from ``rva``."""
+    descriptors_size = 20 * (len(IMPORTS) + 1)
+    lookup_size = sum((len(names) + 1) * thunk_size for names in IMPORTS.values())
+    strings = bytearray()
+    string_base = rva + descriptors_size + lookup_size
+    descriptors = bytearray()
+    lookups = bytearray()
+    thunk = "<Q" if thunk_size == 8 else "<I"
+    for dll, names in IMPORTS.items():
+        lookup_rva = rva + descriptors_size + len(lookups)
+        for name in names:
+            lookups += struct.pack(thunk, string_base + len(strings))
+            strings += struct.pack("<H", 0) + name.encode("ascii") + b"\0"
+            strings += b"\0" * (len(strings) % 2)
+        lookups += struct.pack(thunk, 0)
+        dll_rva = string_base + len(strings)
+        strings += dll.encode("ascii") + b"\0"
+        descriptors += struct.pack("<IIIII", lookup_rva, 0, 0, dll_rva, lookup_rva)
+    descriptors += b"\0" * 20
+    return bytes(descriptors + lookups + strings)
+
+
+def build_pe(pe32_plus: bool) -> bytes:
+    optional_size = (112 if pe32_plus else 96) + 16 * 8
+    headers_size = 0x40 + 4 + 20 + optional_size + 40 * len(SECTIONS)
+    headers_raw = -(-headers_size // FILE_ALIGNMENT) * FILE_ALIGNMENT
+
+    layout = []  # (name, rva, raw pointer, raw size)
+    rva, pointer = SECTION_ALIGNMENT, headers_raw
+    for name, raw_size in SECTIONS:
+        layout.append((name, rva, pointer, raw_size))
+        rva += -(-raw_size // SECTION_ALIGNMENT) * SECTION_ALIGNMENT
+        pointer += raw_size
+    image = bytearray(pointer)
+
+    rdata_rva, rdata_pointer = next((r, p) for n, r, p, _ in layout if n == ".rdata")
+    imports = _import_directory(rdata_rva, 8 if pe32_plus else 4)
+    image[rdata_pointer : rdata_pointer + len(imports)] = imports
+    rsrc_rva, rsrc_size = next((r, s) for n, r, _, s in layout if n == ".rsrc")
+
+    image[0:2] = b"MZ"
+    struct.pack_into("<I", image, 0x3C, 0x40)
+    image[0x40:0x44] = b"PE\0\0"
+    machine = 0x8664 if pe32_plus else 0x14C
+    struct.pack_into("<HHIIIHH", image, 0x44, machine, len(SECTIONS), 0, 0, 0, optional_size, 0x22)
+    optional = 0x58
+    struct.pack_into("<H", image, optional, 0x20B if pe32_plus else 0x10B)
+    struct.pack_into("<II", image, optional + 32, SECTION_ALIGNMENT, FILE_ALIGNMENT)
+    struct.pack_into("<II", image, optional + 56, rva, headers_raw)  # SizeOfImage, SizeOfHeaders
+    directories = optional + (112 if pe32_plus else 96)
+    struct.pack_into("<I", image, directories - 4, 16)
+    struct.pack_into("<II", image, directories + 8, rdata_rva, len(imports))
+    struct.pack_into("<II", image, directories + 16, rsrc_rva, rsrc_size)
+
+    table = optional + optional_size
+    for idx, (name, section_rva, raw_pointer, raw_size) in enumerate(layout):
+        struct.pack_into(
+            "<8sIIII12xI",
+            image,
+            table + idx * 40,
+            name.encode("ascii"),
+            raw_size,
+            section_rva,
+            raw_size,
+            raw_pointer,
+            0x40000040,
+        )
+    return bytes(image)
+
+
+MAP_FILE = """\
+ tiny_x64
+
+ Timestamp is 00000000 (Thu Jan  1 00:00:00 1970)
+
+ Preferred load address is 0000000140000000
+
+ Start         Length     Name                   Class
+ 0001:00000000 00000500H .text$mn                CODE
+ 0001:00000500 00000100H .text$x                 CODE
+ 0002:00000000 00000200H .rdata                  DATA
+ 0003:00000000 00000080H .data                   DATA
+
+  Address         Publics by Value              Rva+Base               Lib:Object
+
+ 0000:00000000       __guard_flags              0000000000000000     <absolute>
+ 0001:00000000       main                       0000000140001000 f   main.obj
+ 0001:00000040       ?nt_render_frame@@YAXXZ    0000000140001040 f   render.obj
+ 0001:00000340       ?nt_window_create@@YAXXZ   0000000140001340 f   window.obj
+ 0001:00000340       nt_window_create_alias     0000000140001340 f   window.obj
+ 0001:00000400       ?nt_input_poll@@YAXXZ      0000000140001400 f   input.obj
+ 0002:00000000       ??_C@_0M@engine_title@     0000000140002000     main.obj
+ 0003:00000010       g_frame_counter            0000000140003010     main.obj
+
+ entry point at        0001:00000000
+
+ Static symbols
+
+ 0001:00000480       nt_log_flush               0000000140001480 f   log.obj
+"""
+
+
+def main() -> None:
+    (HERE / "tiny_x64.exe").write_bytes(build_pe(pe32_plus=True))
+    (HERE / "tiny_x64.map").write_text(MAP_FILE, encoding="utf-8", newline="\r\n")
+    (HERE / "tiny_x86.dll").write_bytes(build_pe(pe32_plus=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""NumPy and pure-Python delta engines must produce identical rows.
+
+Run from the repository root: ``python -m unittest reports/size/tests/test_deltas_parity.py``.
+"""
+from __future__ import annotations
+
+import random
+import unittest
+
+from reports.size import deltas
+
+
+def _history(seed: int, commits: int = 60) -> list[dict[str, int]]:
+    rng = random.Random(seed)
+    names = [f"artifact{idx}.wasm" for idx in range(24)] + [
+        "artifact0.wasm#gzip",
+        "artifact1.wasm#section:code",
+        "nt_sandbox#startup",
+        "nt_sandbox#fps",
+    ]
+    history = []
+    for _ in range(commits):
+        sizes = {}
+        for name in names:
+            if rng.random() < 0.15:
+                continue  # missing cell: added or removed between commits
+            sizes[name] = rng.choice([0, rng.randint(1, 300), rng.randint(0, 400_000)])
+        history.append(sizes)
+    return history
+
+
+POLICY = deltas.ThresholdPolicy(
+    artifacts={"artifact3.wasm": deltas.Thresholds(bytes=10, percent=0.5)},
+    patterns=[
+        ("*#startup", deltas.Thresholds(bytes=5, percent=1.0, unit="ms", lower_is_better=True)),
+        ("*#fps", deltas.Thresholds(bytes=2, percent=1.0, unit="count", lower_is_better=False)),
+    ],
+)
+
+
+@unittest.skipIf(deltas._np is None, "NumPy is not installed")
+class EngineParityTest(unittest.TestCase):
+    def test_consecutive_pairs_match(self) -> None:
+        for seed in range(5):
+            matrix = deltas.SizeMatrix.from_size_maps(_history(seed))
+            pairs = [(idx - 1, idx) for idx in range(1, len(matrix))]
+            python_rows = [pair.rows() for pair in deltas.compute_pair_deltas(matrix, pairs, POLICY, use_numpy=False)]
+            numpy_rows = [pair.rows() for pair in deltas.compute_pair_deltas(matrix, pairs, POLICY, use_numpy=True)]
+            self.assertEqual(python_rows, numpy_rows)
+            # Equal floats can still differ in sign (-0.0) and therefore in the JSON written.
+            self.assertEqual(repr(python_rows), repr(numpy_rows))
+
+
+class MissingBaseTest(unittest.TestCase):
+    def test_added_row_never_alerts(self) -> None:
+        for use_numpy in (False, True) if deltas._np is not None else (False,):
+            matrix = deltas.SizeMatrix.from_size_maps(
+                [{"app.wasm": 1000}, {"app.wasm": 1000, "app.wasm#gzip": 90_000, "nt_sandbox#startup": 400}]
+            )
+            (result,) = deltas.compute_pair_deltas(matrix, [(0, 1)], POLICY, use_numpy=use_numpy)
+            rows = {row["file_name"]: row for row in result.rows()}
+            self.assertEqual(rows["app.wasm#gzip"]["delta_bytes"], 90_000)
+            self.assertIsNone(rows["app.wasm#gzip"]["delta_percent"])
+            self.assertFalse(rows["app.wasm#gzip"]["alert"])
+            self.assertFalse(rows["nt_sandbox#startup"]["alert"])
+
+    def test_recorded_zero_still_alerts(self) -> None:
+        pair = deltas.compare_sizes({"app.wasm": 0}, {"app.wasm": 90_000})
+        self.assertEqual(pair.percent, [100.0])
+        self.assertTrue(pair.thresholds[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
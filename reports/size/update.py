@@ -3,28 +3,72 @@
 from __future__ import annotations
 
 import argparse
+import cProfile
 import csv
+import hashlib
+import io
 import json
+import os
 import sys
-from dataclasses import dataclass
-from datetime import datetime, timezone
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Mapping, MutableMapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Sequence, overload
 
 # Support running as a script by ensuring package imports succeed
 if __package__ is None or __package__ == "":
     PACKAGE_ROOT = Path(__file__).resolve().parent
     sys.path.insert(0, str(PACKAGE_ROOT.parent.parent))
-    from reports.size import validators  # type: ignore
+    from reports.size import (  # type: ignore
+        atomic_io,
+        budgets,
+        compression,
+        deltas,
+        history_index,
+        history_log,
+        instrumentation,
+        metrics,
+        pe,
+        retention,
+        shards,
+        sourcemap,
+        symbols,
+        validators,
+        wasm,
+    )
 else:  # pragma: no cover - script execution path only
-    from . import validators  # type: ignore
+    from . import (  # type: ignore
+        atomic_io,
+        budgets,
+        compression,
+        deltas,
+        history_index,
+        history_log,
+        instrumentation,
+        metrics,
+        pe,
+        retention,
+        shards,
+        sourcemap,
+        symbols,
+        validators,
+        wasm,
+    )
 
 REPORT_FILENAME = "report.txt"
 MANIFEST_FILENAME = "index.json"
+COMMIT_CACHE_FILENAME = "commit-metadata.jsonl"
+METRICS_FILENAME = "metrics.json"
+# Default --budget-report destination, so the JSON never mixes with the summary on stdout.
+BUDGET_REPORT_FILENAME = "budget-report.json"
 PLACEHOLDER_SHA = "UNKNOWN"
 PLACEHOLDER_MESSAGE = "UNKNOWN"
 ARTIFACT_EXCLUDES = {REPORT_FILENAME, MANIFEST_FILENAME, "README.md"}
 IGNORED_COMMIT_PREFIXES: tuple[str, ...] = ("master-chore:",)
+# Distinct from generic failures (1) so CI can commit the reports before failing the job.
+BUDGET_BREACH_EXIT = 3
 @dataclass
 class GitMetadata:
     sha: str
@@ -33,18 +77,131 @@ class GitMetadata:
     date_iso: str | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Artifact:
     file_name: str
     size_bytes: int
 
 
 @dataclass
+class MeasuredArtifact:
+    rows: List[Artifact]
+    # Every function/symbol size for the snapshot's symbol table (empty when unavailable).
+    symbols: Dict[str, int] = field(default_factory=dict)
+
+
+class ArtifactNames:
+    """Interned artifact-name table shared by every entry of one history."""
+
+    __slots__ = ("names", "_ids")
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, name: str) -> int:
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self._ids[name] = name_id
+            self.names.append(name)
+        return name_id
+
+
+class HistoryColumns:
+    """Append-only columnar artifact store: one name-id and one size column per history.
+
+    Rows are never rewritten, so :class:`ArtifactRows` views over a range stay valid and
+    can be shared between entries instead of copying per-artifact objects.
+    """
+
+    __slots__ = ("names", "name_ids", "sizes")
+
+    def __init__(self, names: ArtifactNames | None = None) -> None:
+        self.names = names if names is not None else ArtifactNames()
+        self.name_ids = array("I")
+        self.sizes = array("q")
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def append(self, file_name: str, size_bytes: int) -> None:
+        self.name_ids.append(self.names.intern(file_name))
+        self.sizes.append(size_bytes)
+
+    def view(self, start: int, stop: int) -> "ArtifactRows":
+        return ArtifactRows(self, start, stop)
+
+    def extend(self, artifacts: Iterable[Artifact]) -> "ArtifactRows":
+        start = len(self)
+        for artifact in artifacts:
+            self.append(artifact.file_name, artifact.size_bytes)
+        return self.view(start, len(self))
+
+
+class ArtifactRows(Sequence[Artifact]):
+    """Immutable view of one entry's artifacts inside a :class:`HistoryColumns` store."""
+
+    __slots__ = ("_columns", "_start", "_stop")
+
+    def __init__(self, columns: HistoryColumns, start: int, stop: int) -> None:
+        self._columns = columns
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @overload
+    def __getitem__(self, index: int) -> Artifact: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ArtifactRows": ...
+
+    def __getitem__(self, index: int | slice) -> "Artifact | ArtifactRows":
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("ArtifactRows only supports contiguous slices")
+            return ArtifactRows(self._columns, self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("artifact index out of range")
+        row = self._start + index
+        columns = self._columns
+        return Artifact(file_name=columns.names.names[columns.name_ids[row]], size_bytes=columns.sizes[row])
+
+    def __iter__(self) -> Iterator[Artifact]:
+        columns = self._columns
+        names = columns.names.names
+        name_ids = columns.name_ids
+        sizes = columns.sizes
+        for row in range(self._start, self._stop):
+            yield Artifact(file_name=names[name_ids[row]], size_bytes=sizes[row])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"ArtifactRows({list(self)!r})"
+
+    def sizes_by_name(self) -> Dict[str, int]:
+        columns = self._columns
+        names = columns.names.names
+        return {
+            names[columns.name_ids[row]]: columns.sizes[row] for row in range(self._start, self._stop)
+        }
+
+
+@dataclass(slots=True)
 class SnapshotEntry:
     kind: str  # "head" or "branch"
     sha: str
     message: str
-    artifacts: List[Artifact]
+    artifacts: Sequence[Artifact]
     branch: str | None = None
     subject: str | None = None
     date_iso: str | None = None
@@ -68,22 +225,247 @@ def is_hex_sha(candidate: str) -> bool:
 def run_git(args: List[str], cwd: Path) -> str:
     from subprocess import run  # local import to avoid global dependency during import time
 
+    instrumentation.count("git_subprocesses")
     result = run(["git", *args], cwd=cwd, capture_output=True, text=True)
     if result.returncode != 0:
         raise SizeReportError(result.stderr.strip() or f"git {' '.join(args)} failed")
     return result.stdout.strip()
 
 
-def current_head_metadata(repo_root: Path) -> GitMetadata:
-    sha = run_git(["rev-parse", "HEAD"], repo_root)
-    subject = run_git(["show", "-s", "--format=%s", "HEAD"], repo_root)
-    commit_date = run_git(["show", "-s", "--format=%cI", "HEAD"], repo_root)
+def _commit_subject(message: str) -> str:
+    # Mirror git's %s placeholder: the first paragraph folded onto a single line.
+    lines: List[str] = []
+    for line in message.splitlines():
+        if not line.strip():
+            if lines:
+                break
+            continue
+        lines.append(line.strip())
+    return " ".join(lines)
+
+
+def _committer_date_iso(committer_line: str) -> str | None:
+    # "committer Name <email> 1700000000 +0500" -> strict ISO 8601 like git's %cI.
+    parts = committer_line.rsplit(" ", 2)
+    if len(parts) != 3:
+        return None
+    _, timestamp, offset = parts
+    if len(offset) != 5 or offset[0] not in "+-" or not offset[1:].isdigit():
+        return None
+    try:
+        seconds = int(timestamp)
+    except ValueError:
+        return None
+    delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+    tz = timezone(-delta if offset[0] == "-" else delta)
+    return datetime.fromtimestamp(seconds, tz).isoformat()
+
+
+def parse_commit_object(sha: str, payload: bytes) -> GitMetadata:
+    text = payload.decode("utf-8", errors="replace")
+    header, _, message = text.partition("\n\n")
+    commit_date: str | None = None
+    for line in header.splitlines():
+        if line.startswith("committer "):
+            commit_date = _committer_date_iso(line)
+            break
+    return GitMetadata(sha=sha, subject=_commit_subject(message), date_iso=commit_date)
+
+
+class CommitMetadataCache:
+    """Persistent JSON-lines store of commit subjects and dates keyed by full SHA.
+
+    Commit metadata is immutable for a given SHA, so entries never expire; they are
+    only evicted once no report.txt references the SHA anymore.
+    """
+
+    def __init__(self, path: Path, entries: Dict[str, GitMetadata] | None = None) -> None:
+        self.path = path
+        self._entries: Dict[str, GitMetadata] = entries or {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "CommitMetadataCache":
+        entries: Dict[str, GitMetadata] = {}
+        try:
+            with path.open(encoding="utf-8") as fp:
+                for line in fp:
+                    try:
+                        record = json.loads(line)
+                        sha = str(record["sha"]).lower()
+                        subject = str(record["subject"])
+                        date_iso = record.get("date")
+                    except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                        # A damaged line only costs a git lookup; never fail the run over it.
+                        continue
+                    if is_hex_sha(sha):
+                        entries[sha] = GitMetadata(
+                            sha=sha, subject=subject, date_iso=date_iso if isinstance(date_iso, str) else None
+                        )
+        except FileNotFoundError:
+            pass
+        return cls(path, entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, sha: str) -> GitMetadata | None:
+        return self._entries.get(sha.lower())
+
+    def put(self, meta: GitMetadata) -> None:
+        sha = meta.sha.lower()
+        if not is_hex_sha(sha):
+            return
+        cached = self._entries.get(sha)
+        if cached is not None and cached.subject == meta.subject and cached.date_iso == meta.date_iso:
+            return
+        self._entries[sha] = GitMetadata(sha=sha, subject=meta.subject, date_iso=meta.date_iso)
+        self._dirty = True
+
+    def retain(self, shas: Iterable[str]) -> int:
+        keep = {sha.lower() for sha in shas}
+        stale = [sha for sha in self._entries if sha not in keep]
+        for sha in stale:
+            del self._entries[sha]
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+    def save(self) -> bool:
+        if not self._dirty:
+            return False
+        lines = [
+            json.dumps({"sha": sha, "subject": meta.subject, "date": meta.date_iso}, ensure_ascii=False)
+            for sha, meta in sorted(self._entries.items())
+        ]
+        atomic_io.write_text(self.path, "".join(f"{line}\n" for line in lines))
+        self._dirty = False
+        return True
+
+
+class GitMetadataResolver:
+    """Resolve commit metadata through one long-lived ``git cat-file --batch`` process.
+
+    Callers queue every ref they will need with :meth:`prefetch`; the refs are then
+    streamed to git in chunks and the parsed results are memoised for :meth:`resolve`.
+    Full SHAs found in the optional :class:`CommitMetadataCache` never reach git.
+    """
+
+    PREFETCH_CHUNK = 256
+
+    def __init__(self, repo_root: Path, cache: CommitMetadataCache | None = None) -> None:
+        self.repo_root = repo_root
+        self.cache = cache
+        self._process: Any = None
+        self._resolved: Dict[str, GitMetadata | None] = {}
+
+    def __enter__(self) -> "GitMetadataResolver":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        process = self._process
+        self._process = None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        process.wait()
+        process.stdout.close()
+
+    def _batch_process(self) -> Any:
+        if self._process is None:
+            from subprocess import DEVNULL, PIPE, Popen  # local import mirrors run_git
+
+            instrumentation.count("git_subprocesses")
+            try:
+                self._process = Popen(
+                    ["git", "cat-file", "--batch"],
+                    cwd=self.repo_root,
+                    stdin=PIPE,
+                    stdout=PIPE,
+                    stderr=DEVNULL,
+                )
+            except OSError as exc:
+                raise SizeReportError(f"Unable to start git cat-file: {exc}") from exc
+        return self._process
+
+    def _read_object(self, ref: str) -> GitMetadata | None:
+        stdout = self._process.stdout
+        header = stdout.readline().decode("utf-8", errors="replace").rstrip("\n")
+        if not header:
+            self.close()
+            raise SizeReportError(f"git cat-file exited while resolving '{ref}'")
+        fields = header.split(" ")
+        if len(fields) != 3:
+            # "<ref> missing" / "<ref> ambiguous"
+            return None
+        sha, object_type, size_field = fields
+        payload = stdout.read(int(size_field) + 1)[:-1]
+        if object_type != "commit":
+            return None
+        return parse_commit_object(sha, payload)
+
+    def prefetch(self, refs: Iterable[str]) -> None:
+        pending: List[str] = []
+        pending_set: set[str] = set()  # keeps the membership test O(1); ``pending`` keeps the order
+        for ref in refs:
+            ref = ref.strip()
+            # Whitespace would split the batch request line; such refs can never resolve.
+            if not ref or any(ch.isspace() for ch in ref):
+                self._resolved.setdefault(ref, None)
+                continue
+            if ref in self._resolved or ref in pending_set:
+                continue
+            cached = self.cache.get(ref) if self.cache is not None and is_hex_sha(ref) else None
+            if cached is not None:
+                self._resolved[ref] = cached
+                continue
+            pending.append(ref)
+            pending_set.add(ref)
+        instrumentation.count("git_objects_requested", len(pending))
+        for start in range(0, len(pending), self.PREFETCH_CHUNK):
+            chunk = pending[start : start + self.PREFETCH_CHUNK]
+            process = self._batch_process()
+            try:
+                # ^{commit} peels annotated tags (and rejects trees/blobs) inside git itself.
+                process.stdin.write("".join(f"{ref}^{{commit}}\n" for ref in chunk).encode("utf-8"))
+                process.stdin.flush()
+            except OSError as exc:
+                self.close()
+                raise SizeReportError(f"git cat-file rejected batch input: {exc}") from exc
+            for ref in chunk:
+                meta = self._read_object(ref)
+                self._resolved[ref] = meta
+                # Symbolic refs such as HEAD^ move; only content-addressed lookups are persisted.
+                if meta is not None and self.cache is not None and is_hex_sha(ref):
+                    self.cache.put(meta)
+
+    def resolve(self, ref: str) -> GitMetadata:
+        if ref not in self._resolved:
+            self.prefetch([ref])
+        meta = self._resolved.get(ref.strip())
+        if meta is None:
+            raise SizeReportError(f"Unable to resolve git metadata for '{ref}'")
+        return GitMetadata(sha=meta.sha, subject=meta.subject, date_iso=meta.date_iso)
+
+
+def current_head_metadata(repo_root: Path, resolver: GitMetadataResolver | None = None) -> GitMetadata:
+    if resolver is None:
+        with GitMetadataResolver(repo_root) as own_resolver:
+            return current_head_metadata(repo_root, own_resolver)
+    resolver.prefetch(["HEAD", "HEAD^"])
+    head_meta = resolver.resolve("HEAD")
     branch = run_git(["rev-parse", "--abbrev-ref", "HEAD"], repo_root)
     if branch.upper() == "HEAD":
         branch = None
-    if is_ignored_commit_message(subject):
+    if is_ignored_commit_message(head_meta.subject):
         try:
-            parent_meta = metadata_for_ref(repo_root, "HEAD^")
+            parent_meta = resolver.resolve("HEAD^")
         except SizeReportError:
             pass
         else:
@@ -93,14 +475,14 @@ def current_head_metadata(repo_root: Path) -> GitMetadata:
                 branch=branch,
                 date_iso=parent_meta.date_iso,
             )
-    return GitMetadata(sha=sha, subject=subject, branch=branch, date_iso=commit_date)
+    return GitMetadata(sha=head_meta.sha, subject=head_meta.subject, branch=branch, date_iso=head_meta.date_iso)
 
 
-def metadata_for_ref(repo_root: Path, ref: str) -> GitMetadata:
-    sha = run_git(["rev-parse", ref], repo_root)
-    subject = run_git(["show", "-s", "--format=%s", ref], repo_root)
-    commit_date = run_git(["show", "-s", "--format=%cI", ref], repo_root)
-    return GitMetadata(sha=sha, subject=subject, date_iso=commit_date)
+def metadata_for_ref(repo_root: Path, ref: str, resolver: GitMetadataResolver | None = None) -> GitMetadata:
+    if resolver is None:
+        with GitMetadataResolver(repo_root) as own_resolver:
+            return own_resolver.resolve(ref)
+    return resolver.resolve(ref)
 
 
 def discover_artifacts(folder: Path) -> List[Path]:
@@ -132,117 +514,125 @@ def read_report_entries(report_path: Path) -> List[SnapshotEntry]:
     if not report_path.exists():
         return []
     with report_path.open(newline="", encoding="utf-8") as fp:
-        reader = csv.DictReader(fp)
-        header = reader.fieldnames or []
-        rows: List[Dict[str, str]] = list(reader)
+        reader = csv.reader(fp)
+        header = next(reader, [])
+        if header != validators.HEADER:
+            raise SizeReportError(f"Unexpected report header {header}. Expected {validators.HEADER}.")
+        return parse_report_rows(reader)
 
-    if header != validators.HEADER:
-        raise SizeReportError(f"Unexpected report header {header}. Expected {validators.HEADER}.")
-    validators.ensure_rows(rows)
-    return _rows_to_entries(rows)
 
+def parse_report_rows(rows: Iterable[Sequence[str]]) -> List[SnapshotEntry]:
+    """Validate report.txt rows (header already consumed) and build entries in one pass.
 
-def _rows_to_entries(rows: List[Dict[str, str]]) -> List[SnapshotEntry]:
+    Rows are positional ``(git_sha, git_message, file_name, size_bytes)`` tuples as produced
+    by ``csv.reader``; validation failures raise the same messages as ``validators.ensure_rows``.
+    """
     entries: List[SnapshotEntry] = []
+    columns = HistoryColumns()
     current: SnapshotEntry | None = None
-    master_assigned = False
-    head_assigned = False
-    branch_assigned = False
+    block_start = 0
+    assigned_kinds: set[str] = set()
+    width = len(validators.HEADER)
 
     for row in rows:
-        size_field = (row.get("size_bytes") or "").strip()
-        if not size_field:
-            sha_field = (row.get("git_sha") or "").strip()
-            message_field = (row.get("git_message") or "").strip()
-            file_field = (row.get("file_name") or "").strip()
-            label = (file_field or sha_field).strip().upper()
-
-            commit_kind = None
-            if label == "HEAD":
-                commit_kind = "head"
-            elif label == "MASTER":
-                commit_kind = "master"
-            elif label == "BRANCH":
-                commit_kind = "branch"
-            elif label == "HISTORY":
-                commit_kind = "history"
-
-            commit_branch: str | None = None
-            commit_subject: str | None = None
-
-            if commit_kind == "head":
-                commit_sha = (
-                    message_field
-                    if is_hex_sha(message_field)
-                    else (sha_field if is_hex_sha(sha_field) else PLACEHOLDER_SHA)
-                )
-                commit_message = message_field or PLACEHOLDER_MESSAGE
-                commit_subject = message_field or None
-            elif commit_kind == "master":
-                commit_sha = (
-                    message_field
-                    if is_hex_sha(message_field)
-                    else (sha_field if is_hex_sha(sha_field) else PLACEHOLDER_SHA)
-                )
-                commit_message = message_field if message_field else PLACEHOLDER_MESSAGE
-                commit_subject = commit_message
-            elif commit_kind == "branch":
-                commit_sha = (
-                    message_field
-                    if is_hex_sha(message_field)
-                    else (sha_field if is_hex_sha(sha_field) else PLACEHOLDER_SHA)
-                )
-                commit_branch = message_field or None
-                commit_message = commit_branch or PLACEHOLDER_MESSAGE
-            else:
-                commit_sha = sha_field if is_hex_sha(sha_field) else PLACEHOLDER_SHA
-                commit_message = message_field or file_field or PLACEHOLDER_MESSAGE
-                if commit_kind is None:
-                    if not master_assigned:
-                        commit_kind = "master"
-                        master_assigned = True
-                    elif not head_assigned:
-                        commit_kind = "head"
-                        head_assigned = True
-                    elif not branch_assigned:
-                        commit_kind = "branch"
-                        branch_assigned = True
-                    else:
-                        commit_kind = "history"
-                if commit_kind == "history":
-                    commit_subject = message_field or commit_message
-                commit_branch = message_field if commit_kind in {"head", "branch"} else None
-
-            current = SnapshotEntry(
-                kind=commit_kind or "history",
-                sha=commit_sha or PLACEHOLDER_SHA,
-                message=commit_message or PLACEHOLDER_MESSAGE,
-                artifacts=[],
-                branch=commit_branch,
-                subject=commit_subject,
-                date_iso=None,
-            )
-            if current.kind == "master":
-                master_assigned = True
-            elif current.kind == "head":
-                head_assigned = True
-            elif current.kind == "branch":
-                branch_assigned = True
-            entries.append(current)
-        else:
+        if not row:
+            continue
+        if len(row) < width:
+            row = [*row, *([""] * (width - len(row)))]
+        size_field = row[3].strip()
+        if size_field:
             if current is None:
-                raise SizeReportError("Encountered artifact row before metadata section header")
-            file_name = (row.get("file_name") or "").strip()
+                raise validators.ValidationError("Artifact row encountered before any metadata row")
+            if not size_field.isdigit():
+                raise validators.ValidationError(f"Invalid size_bytes '{size_field}'")
+            file_name = row[2].strip()
             if not file_name:
-                raise SizeReportError("Artifact row missing file_name")
-            try:
-                size_value = int(size_field)
-            except ValueError as exc:  # pragma: no cover - validated earlier
-                raise SizeReportError(f"Invalid size '{size_field}' for artifact '{file_name}'") from exc
-            current.artifacts.append(Artifact(file_name=file_name, size_bytes=size_value))
+                raise validators.ValidationError("Artifact row missing file_name")
+            columns.append(file_name, int(size_field))
+            continue
+
+        sha_field = row[0].strip()
+        if not sha_field:
+            raise validators.ValidationError("Metadata row missing git_sha identifier")
+        if current is not None:
+            current.artifacts = columns.view(block_start, len(columns))
+        block_start = len(columns)
+        current = _metadata_row_entry(sha_field, row[1].strip(), row[2].strip(), assigned_kinds)
+        entries.append(current)
+    if current is not None:
+        current.artifacts = columns.view(block_start, len(columns))
+    instrumentation.count("report_rows_parsed", len(entries) + len(columns))
     return entries
 
 
+def _metadata_row_entry(
+    sha_field: str, message_field: str, file_field: str, assigned_kinds: set[str]
+) -> SnapshotEntry:
+    label = (file_field or sha_field).strip().upper()
+
+    commit_kind = None
+    if label == "HEAD":
+        commit_kind = "head"
+    elif label == "MASTER":
+        commit_kind = "master"
+    elif label == "BRANCH":
+        commit_kind = "branch"
+    elif label == "HISTORY":
+        commit_kind = "history"
+
+    commit_branch: str | None = None
+    commit_subject: str | None = None
+
+    if commit_kind == "head":
+        commit_sha = (
+            message_field
+            if is_hex_sha(message_field)
+            else (sha_field if is_hex_sha(sha_field) else PLACEHOLDER_SHA)
+        )
+        commit_message = message_field or PLACEHOLDER_MESSAGE
+        commit_subject = message_field or None
+    elif commit_kind == "master":
+        commit_sha = (
+            message_field
+            if is_hex_sha(message_field)
+            else (sha_field if is_hex_sha(sha_field) else PLACEHOLDER_SHA)
+        )
+        commit_message = message_field if message_field else PLACEHOLDER_MESSAGE
+        commit_subject = commit_message
+    elif commit_kind == "branch":
+        commit_sha = (
+            message_field
+            if is_hex_sha(message_field)
+            else (sha_field if is_hex_sha(sha_field) else PLACEHOLDER_SHA)
+        )
+        commit_branch = message_field or None
+        commit_message = commit_branch or PLACEHOLDER_MESSAGE
+    else:
+        commit_sha = sha_field if is_hex_sha(sha_field) else PLACEHOLDER_SHA
+        commit_message = message_field or file_field or PLACEHOLDER_MESSAGE
+        if commit_kind is None:
+            # Legacy unlabeled blocks: the first three become master, head and branch.
+            for fallback_kind in ("master", "head", "branch", "history"):
+                if fallback_kind not in assigned_kinds or fallback_kind == "history":
+                    commit_kind = fallback_kind
+                    break
+        if commit_kind == "history":
+            commit_subject = message_field or commit_message
+        commit_branch = message_field if commit_kind in {"head", "branch"} else None
+
+    kind = commit_kind or "history"
+    assigned_kinds.add(kind)
+    return SnapshotEntry(
+        kind=kind,
+        sha=commit_sha or PLACEHOLDER_SHA,
+        message=commit_message or PLACEHOLDER_MESSAGE,
+        artifacts=(),
+        branch=commit_branch,
+        subject=commit_subject,
+        date_iso=None,
+    )
+
+
 def format_entry_label(entry: SnapshotEntry) -> str:
     sha = entry.sha or PLACEHOLDER_SHA
     display_sha = sha if len(sha) <= 7 else sha[:7]
@@ -263,57 +653,209 @@ def format_entry_label(entry: SnapshotEntry) -> str:
     return "-".join(parts)
 
 
+def report_rows(entries: Iterable[SnapshotEntry]) -> Iterator[List[str]]:
+    """Serialize entries as report.txt data rows (header excluded)."""
+    for entry in entries:
+        if entry.sha in (None, "", PLACEHOLDER_SHA) and not entry.artifacts:
+            # Skip placeholder rows that carry no useful data.
+            continue
+        if entry.kind == "head":
+            metadata_message = entry.branch or PLACEHOLDER_MESSAGE
+        elif entry.kind == "branch":
+            metadata_message = entry.branch or entry.message or PLACEHOLDER_MESSAGE
+        else:
+            metadata_message = entry.subject or entry.message or PLACEHOLDER_MESSAGE
+        yield [entry.sha or PLACEHOLDER_SHA, metadata_message, entry.kind.upper(), ""]
+        for artifact in sorted(entry.artifacts, key=lambda item: item.file_name):
+            yield ["", "", artifact.file_name, str(artifact.size_bytes)]
+
+
 def write_report_entries(report_path: Path, entries: List[SnapshotEntry]) -> None:
-    with report_path.open("w", newline="", encoding="utf-8") as fp:
-        writer = csv.DictWriter(fp, fieldnames=validators.HEADER)
-        writer.writeheader()
-        for entry in entries:
-            if entry.sha in (None, "", PLACEHOLDER_SHA) and not entry.artifacts:
-                # Skip placeholder rows that carry no useful data.
-                continue
-            if entry.kind == "head":
-                metadata_message = entry.branch or PLACEHOLDER_MESSAGE
-            elif entry.kind == "branch":
-                metadata_message = entry.branch or entry.message or PLACEHOLDER_MESSAGE
-            else:
-                metadata_message = entry.subject or entry.message or PLACEHOLDER_MESSAGE
-            writer.writerow(
-                {
-                    "git_sha": entry.sha or PLACEHOLDER_SHA,
-                    "git_message": metadata_message,
-                    "file_name": entry.kind.upper(),
-                    "size_bytes": "",
-                }
-            )
-            for artifact in sorted(entry.artifacts, key=lambda item: item.file_name):
-                writer.writerow(
-                    {
-                        "git_sha": "",
-                        "git_message": "",
-                        "file_name": artifact.file_name,
-                        "size_bytes": str(artifact.size_bytes),
-                    }
-                )
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    writer.writerow(validators.HEADER)
+    writer.writerows(report_rows(entries))
+    atomic_io.write_text(report_path, buffer.getvalue())
+
+
+def history_path(folder: Path) -> Path:
+    """The folder's history source: ``history.jsonl`` once migrated, otherwise report.txt."""
+    log_path = folder / history_log.LOG_FILENAME
+    return log_path if log_path.is_file() else folder / REPORT_FILENAME
+
+
+def read_history_entries(path: Path, log: history_log.HistoryLog | None = None) -> List[SnapshotEntry]:
+    """Entries of ``path``; pass ``log`` to keep the parsed history.jsonl for a later write."""
+    if path.name == history_log.LOG_FILENAME:
+        try:
+            return parse_report_rows((log or history_log.HistoryLog(path.parent)).read_rows())
+        except history_log.HistoryLogError as exc:
+            raise SizeReportError(str(exc)) from exc
+    return read_report_entries(path)
+
+
+def write_history_entries(
+    path: Path, entries: List[SnapshotEntry], log: history_log.HistoryLog | None = None
+) -> None:
+    if path.name == history_log.LOG_FILENAME:
+        # Only the changed commit blocks are appended; nothing historical is rewritten. A log
+        # already read this run diffs against its parsed blocks instead of rescanning the file.
+        (log or history_log.HistoryLog(path.parent)).write_rows(report_rows(entries))
+    else:
+        write_report_entries(path, entries)
+
 
+def measure_artifact(path: Path, schema: metrics.MetricSchema | None = None) -> MeasuredArtifact:
+    """Raw size, compressed transfer sizes and (for ``.wasm``/``.exe``/``.dll``) the section breakdown of ``path``.
+
+    A ``<name>.metrics.json`` file is not measured; its entries become typed ``<name>#<metric>`` rows.
+    """
+    if path.name.endswith(metrics.METRICS_SUFFIX):
+        try:
+            rows = metrics.read_metrics_file(path, schema or metrics.MetricSchema())
+        except metrics.MetricConfigError as exc:
+            raise SizeReportError(str(exc)) from exc
+        return MeasuredArtifact(rows=[Artifact(file_name=name, size_bytes=value) for name, value in rows])
+    separator = deltas.SUB_ARTIFACT_SEPARATOR
+    rows = [Artifact(file_name=path.name, size_bytes=path.stat().st_size)]
+    rows.extend(
+        Artifact(file_name=f"{path.name}{separator}{encoding}", size_bytes=size)
+        for encoding, size in compression.compressed_sizes(path)
+    )
+    wasm_rows, wasm_symbols = wasm_sub_artifacts(path)
+    pe_rows, pe_symbols = pe_sub_artifacts(path)
+    rows.extend(wasm_rows)
+    rows.extend(pe_rows)
+    return MeasuredArtifact(rows=rows, symbols=wasm_symbols or pe_symbols)
+
+
+def wasm_sub_artifacts(path: Path) -> tuple[List[Artifact], Dict[str, int]]:
+    """Section, DWARF and largest-function rows for a ``.wasm`` artifact (empty for other files).
+
+    When ``<name>.wasm.map`` sits next to the module, code bytes are also attributed to
+    engine subsystems and the largest source files. Also returns every function's body
+    size for the snapshot's symbol table.
+    """
+    if path.suffix != ".wasm":
+        return [], {}
+    try:
+        breakdown = wasm.analyze_wasm(path, all_functions=True)
+    except (OSError, ValueError) as exc:
+        print(f"Warning: skipping section breakdown for '{path.name}': {exc}", file=sys.stderr)
+        return [], {}
+    rows = breakdown.sub_artifacts()
+    map_path = path.with_name(f"{path.name}.map")
+    if map_path.is_file() and breakdown.code_range is not None:
+        try:
+            rows.extend(sourcemap.attribute_source_map(map_path, breakdown.code_range).sub_artifacts())
+        except (OSError, ValueError) as exc:
+            print(f"Warning: skipping source attribution for '{path.name}': {exc}", file=sys.stderr)
+    separator = deltas.SUB_ARTIFACT_SEPARATOR
+    return (
+        [Artifact(file_name=f"{path.name}{separator}{suffix}", size_bytes=size) for suffix, size in rows],
+        breakdown.functions,
+    )
 
-def update_head_snapshot(input_folder: Path, output_folder: Path, repo_root: Path) -> GitMetadata:
+
+def pe_sub_artifacts(path: Path) -> tuple[List[Artifact], Dict[str, int]]:
+    """Section, import-count and (with ``<stem>.map``) largest-symbol rows for a Windows binary.
+
+    Also returns every map-file symbol's size for the snapshot's symbol table.
+    """
+    if path.suffix.lower() not in pe.PE_SUFFIXES:
+        return [], {}
+    try:
+        breakdown = pe.analyze_pe(path)
+    except (OSError, ValueError) as exc:
+        print(f"Warning: skipping PE breakdown for '{path.name}': {exc}", file=sys.stderr)
+        return [], {}
+    separator = deltas.SUB_ARTIFACT_SEPARATOR
+    return (
+        [
+            Artifact(file_name=f"{path.name}{separator}{suffix}", size_bytes=size)
+            for suffix, size in breakdown.sub_artifacts()
+        ],
+        breakdown.symbols,
+    )
+
+
+@dataclass
+class SnapshotTarget:
+    input_folder: Path
+    output_folder: Path
+    retention: retention.RetentionRule | None = None
+
+
+@dataclass
+class PreparedSnapshot:
+    output_folder: Path
+    report_path: Path
+    head_artifacts: Sequence[Artifact]
+    existing_entries: List[SnapshotEntry]
+    retention: retention.RetentionRule | None = None
+    # Artifact name -> symbol sizes, stored as the HEAD commit's symbol table.
+    symbol_tables: symbols.SymbolTables = field(default_factory=dict)
+    # The parsed history.jsonl of a migrated folder, reused when the snapshot is written.
+    history: history_log.HistoryLog | None = None
+
+
+def prepare_snapshot(
+    input_folder: Path,
+    output_folder: Path,
+    retention_rule: retention.RetentionRule | None = None,
+    schema: metrics.MetricSchema | None = None,
+) -> PreparedSnapshot:
+    """Measure build outputs and load the existing report; touches no git state."""
     if not input_folder.exists() or not input_folder.is_dir():
         raise SizeReportError(f"Input folder '{input_folder}' does not exist or is not a directory")
     output_folder.mkdir(parents=True, exist_ok=True)
-    report_path = output_folder / REPORT_FILENAME
+    report_path = history_path(output_folder)
 
     artifacts = discover_artifacts(input_folder)
     if not artifacts:
         raise SizeReportError(f"No artifacts found in '{input_folder}'. Build outputs are required.")
 
+    history = history_log.HistoryLog(output_folder) if report_path.name == history_log.LOG_FILENAME else None
     if report_path.exists():
-        existing_entries = read_report_entries(report_path)
+        existing_entries = read_history_entries(report_path, history)
     else:
         existing_entries = []
+    if not compression.brotli_available() and any(
+        artifact.file_name.endswith(f"{deltas.SUB_ARTIFACT_SEPARATOR}brotli")
+        for entry in existing_entries
+        for artifact in entry.artifacts
+    ):
+        # Measuring without brotli would drop these rows and read as a brotli -> 0 drop.
+        raise SizeReportError(
+            f"'{report_path}' records #brotli sizes but the brotli module is not installed "
+            "(pip install brotli)"
+        )
+
+    # Compression and wasm parsing dominate; zlib/brotli release the GIL, so threads scale.
+    with ThreadPoolExecutor(max_workers=min(len(artifacts), os.cpu_count() or 1)) as pool:
+        measured = list(pool.map(lambda path: measure_artifact(path, schema), artifacts))
+    head_artifacts = [item for result in measured for item in result.rows]
+    instrumentation.count("artifact_rows_measured", len(head_artifacts))
+    return PreparedSnapshot(
+        output_folder=output_folder,
+        report_path=report_path,
+        head_artifacts=tuple(head_artifacts),
+        existing_entries=existing_entries,
+        retention=retention_rule,
+        symbol_tables={path.name: result.symbols for path, result in zip(artifacts, measured) if result.symbols},
+        history=history,
+    )
+
 
+def write_snapshot(
+    prepared: PreparedSnapshot,
+    head_meta: GitMetadata,
+    record_branch: bool,
+    resolver: GitMetadataResolver,
+) -> None:
     branch_entries: List[SnapshotEntry] = []
     seen_branch_keys: set[tuple[str, str]] = set()
-    for entry in existing_entries:
+    for entry in prepared.existing_entries:
         if entry.kind != "branch":
             continue
         branch_name_entry = entry.branch or entry.message or ""
@@ -328,7 +870,7 @@ def update_head_snapshot(input_folder: Path, output_folder: Path, repo_root: Pat
         entry_date = None
         if is_hex_sha(sha_entry):
             try:
-                meta = metadata_for_ref(repo_root, sha_entry)
+                meta = resolver.resolve(sha_entry)
                 entry_date = meta.date_iso
                 if not entry_subject or entry_subject == PLACEHOLDER_MESSAGE:
                     entry_subject = meta.subject
@@ -341,22 +883,16 @@ def update_head_snapshot(input_folder: Path, output_folder: Path, repo_root: Pat
                 kind="branch",
                 sha=sha_entry,
                 message=entry.message,
-                artifacts=[
-                    Artifact(file_name=a.file_name, size_bytes=a.size_bytes) for a in entry.artifacts
-                ],
+                artifacts=entry.artifacts,
                 branch=branch_name_entry,
                 subject=entry_subject,
                 date_iso=entry_date,
             )
         )
 
-    head_meta = current_head_metadata(repo_root)
     branch_name = head_meta.branch
     head_message = head_meta.subject or PLACEHOLDER_MESSAGE
-
-    head_artifacts = [
-        Artifact(file_name=artifact.name, size_bytes=artifact.stat().st_size) for artifact in artifacts
-    ]
+    head_artifacts = prepared.head_artifacts
     head_entry = SnapshotEntry(
         kind="head",
         sha=head_meta.sha,
@@ -368,12 +904,12 @@ def update_head_snapshot(input_folder: Path, output_folder: Path, repo_root: Pat
     )
 
     branch_entry: SnapshotEntry | None = None
-    if branch_name and not worktree_has_changes_outside_reports(repo_root):
+    if branch_name and record_branch:
         branch_entry = SnapshotEntry(
             kind="branch",
             sha=head_meta.sha,
             message=head_meta.subject,
-            artifacts=[Artifact(file_name=a.file_name, size_bytes=a.size_bytes) for a in head_artifacts],
+            artifacts=head_artifacts,
             branch=branch_name,
             subject=head_meta.subject,
             date_iso=head_meta.date_iso,
@@ -387,184 +923,537 @@ def update_head_snapshot(input_folder: Path, output_folder: Path, repo_root: Pat
         if key not in branch_keys:
             branch_entries.insert(0, branch_entry)
             branch_keys.add(key)
+    if prepared.retention is not None:
+        # Dates were attached above (from the commit metadata cache), so no extra git lookups.
+        branch_entries, pruned = retention.select_retained(
+            branch_entries, prepared.retention, lambda entry: entry.date_iso
+        )
+        if pruned:
+            retention.append_archive(prepared.output_folder, validators.HEADER, report_rows(pruned))
+            instrumentation.count("snapshots_archived", len(pruned))
     entries_to_write.extend(branch_entries)
-    write_report_entries(report_path, entries_to_write)
+    write_history_entries(prepared.report_path, entries_to_write, prepared.history)
+    if prepared.symbol_tables and is_hex_sha(head_meta.sha):
+        symbols.write_tables(prepared.output_folder, head_meta.sha, prepared.symbol_tables)
+    # Tables follow the snapshots: retention or a new HEAD drops the ones no entry references.
+    dropped = symbols.prune_tables(prepared.output_folder, (entry.sha for entry in entries_to_write))
+    if dropped:
+        instrumentation.count("symbol_tables_pruned", dropped)
+
+
+def _write_prepared_snapshots(
+    prepared: Sequence[PreparedSnapshot], repo_root: Path, resolver: GitMetadataResolver
+) -> GitMetadata:
+    branch_shas = [
+        entry.sha
+        for snapshot in prepared
+        for entry in snapshot.existing_entries
+        if entry.kind == "branch" and is_hex_sha(entry.sha)
+    ]
+    resolver.prefetch(["HEAD", "HEAD^", *branch_shas])
+    head_meta = current_head_metadata(repo_root, resolver)
+    record_branch = bool(head_meta.branch) and not worktree_has_changes_outside_reports(repo_root)
+    # Every report folder of this run is committed together (or not at all).
+    with atomic_io.batch():
+        for snapshot in prepared:
+            write_snapshot(snapshot, head_meta, record_branch, resolver)
     return head_meta
 
 
-def compute_deltas(master_artifacts: Sequence[Artifact], head_artifacts: Sequence[Artifact]) -> List[Dict[str, object]]:
-    master_sizes = {item.file_name: item.size_bytes for item in master_artifacts}
-    deltas = []
-    for head in head_artifacts:
-        name = head.file_name
-        head_size = head.size_bytes
-        master_size = master_sizes.get(name, 0)
-        delta = head_size - master_size
-        delta_percent = None
-        if master_size > 0:
-            delta_percent = round((delta / master_size) * 100, 2)
-        elif head_size > 0:
-            delta_percent = 100.0
-        threshold_bytes = abs(delta) >= 25_000
-        threshold_percent = delta_percent is not None and abs(delta_percent) >= 2.0
-        thresholds = []
-        if threshold_percent:
-            thresholds.append("percent>2")
-        if threshold_bytes:
-            thresholds.append("bytes>25000")
-        deltas.append(
-            {
-                "file_name": name,
-                "head_size": head_size,
-                "master_size": master_size,
-                "delta_bytes": delta,
-                "delta_percent": delta_percent,
-                "alert": bool(thresholds),
-                "thresholds": thresholds,
-            }
+def update_head_snapshot(
+    input_folder: Path,
+    output_folder: Path,
+    repo_root: Path,
+    resolver: GitMetadataResolver | None = None,
+    retention_rule: retention.RetentionRule | None = None,
+    schema: metrics.MetricSchema | None = None,
+) -> GitMetadata:
+    if resolver is None:
+        with GitMetadataResolver(repo_root) as own_resolver:
+            return update_head_snapshot(input_folder, output_folder, repo_root, own_resolver, retention_rule, schema)
+    prepared = prepare_snapshot(input_folder, output_folder, retention_rule, schema)
+    return _write_prepared_snapshots([prepared], repo_root, resolver)
+
+
+def update_head_snapshots(
+    targets: Sequence[SnapshotTarget],
+    repo_root: Path,
+    resolver: GitMetadataResolver | None = None,
+    max_workers: int | None = None,
+    schema: metrics.MetricSchema | None = None,
+) -> GitMetadata:
+    """Update several report folders against one HEAD in a single pass.
+
+    Artifact stats and report parsing fan out across a thread pool; git metadata is
+    then resolved once through the shared resolver before the reports are written.
+    """
+    if resolver is None:
+        with GitMetadataResolver(repo_root) as own_resolver:
+            return update_head_snapshots(targets, repo_root, own_resolver, max_workers, schema)
+    outputs = [target.output_folder.resolve() for target in targets]
+    if len(set(outputs)) != len(outputs):
+        raise SizeReportError("Each target must write to a distinct output folder")
+    with instrumentation.phase("measure_artifacts"), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        prepared = list(
+            pool.map(
+                lambda target: prepare_snapshot(target.input_folder, target.output_folder, target.retention, schema),
+                targets,
+            )
         )
-    return deltas
+    with instrumentation.phase("write_reports"):
+        return _write_prepared_snapshots(prepared, repo_root, resolver)
+
+
+def compute_deltas(
+    master_artifacts: Sequence[Artifact],
+    head_artifacts: Sequence[Artifact],
+    policy: deltas.ThresholdPolicy | None = None,
+) -> List[Dict[str, object]]:
+    master_sizes = {item.file_name: item.size_bytes for item in master_artifacts}
+    head_sizes = {item.file_name: item.size_bytes for item in head_artifacts}
+    names = [item.file_name for item in head_artifacts]
+    return deltas.compare_sizes(master_sizes, head_sizes, names, policy).rows()
+
+
+def _commit_sort_key(commit: Mapping[str, Any]) -> datetime:
+    try:
+        moment = datetime.fromisoformat(str(commit.get("date")))
+    except ValueError:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def folder_history_deltas(
+    commits_payload: Sequence[Mapping[str, Any]], policy: deltas.ThresholdPolicy
+) -> Dict[str, object]:
+    """Precompute consecutive-commit deltas (chronological order) for the dashboard."""
+    ordered = sorted(commits_payload, key=_commit_sort_key)
+    return {
+        "thresholds": policy.to_dict(),
+        "pairs": deltas.history_deltas(
+            [str(commit["id"]) for commit in ordered],
+            [{item["file_name"]: item["size_bytes"] for item in commit["artifacts"]} for commit in ordered],
+            policy,
+        ),
+    }
+
+
+def _policy_fingerprint(policy: deltas.ThresholdPolicy, schema: metrics.MetricSchema) -> str:
+    payload: Dict[str, object] = policy.to_dict()
+    if schema.rules:
+        # Metric types end up in index.json, so a schema change invalidates reuse as well.
+        payload = {"thresholds": payload, **schema.to_dict()}
+    encoded = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def report_fingerprint(report_path: Path) -> Dict[str, object]:
+    if report_path.name == history_log.LOG_FILENAME:
+        # The log's tail index already carries a hash chain, so nothing is re-read.
+        return history_log.HistoryLog(report_path.parent).fingerprint()
+    digest = hashlib.sha256()
+    size = 0
+    with report_path.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 16), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return {"report_bytes": size, "report_sha256": digest.hexdigest()}
+
+
+def load_manifest_folders(root: Path) -> Dict[str, Mapping[str, Any]]:
+    try:
+        with (root / MANIFEST_FILENAME).open(encoding="utf-8") as fp:
+            manifest = json.load(fp)
+    except (FileNotFoundError, json.JSONDecodeError, OSError):
+        return {}
+    folders = manifest.get("folders") if isinstance(manifest, Mapping) else None
+    if not isinstance(folders, list):
+        return {}
+    return {
+        str(item["folder"]): item
+        for item in folders
+        if isinstance(item, Mapping) and isinstance(item.get("folder"), str)
+    }
+
+
+def _reusable_folder_summary(
+    root: Path,
+    report_path: Path,
+    fingerprint: Mapping[str, object],
+    previous: Mapping[str, Any] | None,
+) -> Dict[str, object] | None:
+    if previous is None:
+        return None
+    if any(previous.get(key) != value for key, value in fingerprint.items()):
+        return None
+    index_rel = previous.get("index")
+    if not isinstance(index_rel, str) or not (root / index_rel).is_file():
+        return None
+    if (root / index_rel).parent != report_path.parent:
+        return None
+    binary_rel = previous.get("binary_index")
+    if isinstance(binary_rel, str) and not (root / binary_rel).is_file():
+        return None  # history-index.bin is not committed, so a fresh checkout rebuilds it
+    return dict(previous)
 
 
 def regenerate_manifest(
-    root: Path, repo_root: Path, updated_folder: Path | None = None
+    root: Path,
+    repo_root: Path,
+    updated_folder: Path | Iterable[Path] | None = None,
+    resolver: GitMetadataResolver | None = None,
+    incremental: bool = False,
+    policy: deltas.ThresholdPolicy | None = None,
+    schema: metrics.MetricSchema | None = None,
 ) -> Dict[str, object]:
+    """Rebuild per-folder ``index.json`` files and the root manifest.
+
+    ``updated_folder`` may be a single folder or several (relative to ``root``).
+    With ``incremental`` set, folders other than the updated ones whose report.txt
+    fingerprint matches the one recorded in the existing root manifest keep their
+    ``index.json`` untouched and are neither re-parsed nor re-resolved against git.
+    ``schema`` types non-byte rows and adds the thresholds of typed metrics to ``policy``.
+    """
+    if resolver is None:
+        with GitMetadataResolver(repo_root) as own_resolver:
+            return regenerate_manifest(root, repo_root, updated_folder, own_resolver, incremental, policy, schema)
+    schema = schema or metrics.MetricSchema()
+    policy = (policy or deltas.ThresholdPolicy()).with_patterns(schema.threshold_patterns())
+    with atomic_io.batch():
+        return _regenerate_manifest(root, updated_folder, resolver, incremental, policy, schema)
+
+
+def _regenerate_manifest(
+    root: Path,
+    updated_folder: Path | Iterable[Path] | None,
+    resolver: GitMetadataResolver,
+    incremental: bool,
+    policy: deltas.ThresholdPolicy,
+    schema: metrics.MetricSchema,
+) -> Dict[str, object]:
+    policy_fingerprint = _policy_fingerprint(policy, schema)
     generated_at = datetime.now(timezone.utc).isoformat()
     summary_entries: List[Dict[str, object]] = []
-    updated_relative: Path | None = None
-    if updated_folder is not None:
-        updated_relative = Path(updated_folder)
+    updated_relatives: set[Path] | None = None
+    if isinstance(updated_folder, (str, Path)):
+        updated_relatives = {Path(updated_folder)}
+    elif updated_folder is not None:
+        updated_relatives = {Path(folder) for folder in updated_folder}
+
+    previous_folders = load_manifest_folders(root) if incremental else {}
+    with instrumentation.phase("parse_reports"):
+        folder_reports = _load_folder_reports(
+            root, policy_fingerprint, incremental, updated_relatives, previous_folders
+        )
 
-    for report_path in sorted(root.glob("**/report.txt")):
-        entries = read_report_entries(report_path)
+    report_shas = {entry.sha for _, entries, _, _ in folder_reports for entry in entries if is_hex_sha(entry.sha)}
+    with instrumentation.phase("resolve_git"):
+        resolver.prefetch(sorted(report_shas))
+    if resolver.cache is not None and all(reused is None for _, _, _, reused in folder_reports):
+        # Every report.txt was just read, so anything else in the cache is unreachable history.
+        resolver.cache.retain(report_shas)
+
+    for report_path, entries, fingerprint, reused_summary in folder_reports:
+        if reused_summary is not None:
+            instrumentation.count("folders_reused")
+            summary_entries.append(reused_summary)
+            continue
         if not entries:
             continue
+        instrumentation.count("folders_regenerated")
+        with instrumentation.phase("build_folder_index"):
+            summary_entries.append(
+                _regenerate_folder(
+                    root, report_path, entries, fingerprint, updated_relatives, resolver, policy, schema, generated_at
+                )
+            )
 
+    manifest = {
+        "generated_at": generated_at,
+        # Sharded folders are loaded without their index.json, so the dashboard reads the policy here.
+        "thresholds": policy.to_dict(),
+        "folders": summary_entries,
+    }
+    manifest_path = root / MANIFEST_FILENAME
+    with instrumentation.phase("write_manifest"):
+        previous_generated_at = _previous_generated_at(manifest_path)
+        if previous_generated_at and _content_unchanged(manifest_path, previous_generated_at, manifest):
+            manifest["generated_at"] = previous_generated_at
+        atomic_io.write_json(manifest_path, manifest)
+    return manifest
+
+
+def _load_folder_reports(
+    root: Path,
+    policy_fingerprint: str,
+    incremental: bool,
+    updated_relatives: set[Path] | None,
+    previous_folders: Mapping[str, Mapping[str, Any]],
+) -> List[tuple[Path, List[SnapshotEntry], Dict[str, object], Dict[str, object] | None]]:
+    """Fingerprint every history source; parse only those whose index cannot be reused."""
+    folder_reports: List[tuple[Path, List[SnapshotEntry], Dict[str, object], Dict[str, object] | None]] = []
+    folders = {path.parent for path in root.glob(f"**/{REPORT_FILENAME}")}
+    folders.update(path.parent for path in root.glob(f"**/{history_log.LOG_FILENAME}"))
+    for report_path in sorted(history_path(folder) for folder in folders):
         folder_relative = report_path.parent.relative_to(root)
-        folder_index_path = report_path.parent / "index.json"
-        existing_generated_at: str | None = None
-        existing_commits_by_id: Dict[str, Mapping[str, Any]] = {}
-        if folder_index_path.exists():
-            try:
-                with folder_index_path.open(encoding="utf-8") as existing_fp:
-                    existing_index = json.load(existing_fp)
-                existing_generated_at = str(existing_index.get("generated_at") or "")
-                if not existing_generated_at:
-                    existing_generated_at = None
-                existing_commits = existing_index.get("commits")
-                if isinstance(existing_commits, list):
-                    for commit in existing_commits:
-                        if isinstance(commit, Mapping):
-                            commit_id = str(commit.get("id") or "")
-                            if commit_id:
-                                existing_commits_by_id[commit_id] = commit
-            except (json.JSONDecodeError, OSError, TypeError):
-                existing_generated_at = None
-                existing_commits_by_id = {}
-
-        folder_is_updated = updated_relative is None or folder_relative == updated_relative
-
-        for entry in entries:
-            meta: GitMetadata | None = None
-            if is_hex_sha(entry.sha):
-                try:
-                    meta = metadata_for_ref(repo_root, entry.sha)
-                except SizeReportError:
-                    meta = None
+        fingerprint = report_fingerprint(report_path)
+        # Precomputed deltas depend on the threshold policy, so a policy change invalidates reuse.
+        fingerprint["delta_policy"] = policy_fingerprint
+        reused_summary: Dict[str, object] | None = None
+        if incremental and (updated_relatives is None or folder_relative not in updated_relatives):
+            reused_summary = _reusable_folder_summary(
+                root, report_path, fingerprint, previous_folders.get(folder_relative.as_posix())
+            )
+        entries = [] if reused_summary is not None else read_history_entries(report_path)
+        folder_reports.append((report_path, entries, fingerprint, reused_summary))
+    return folder_reports
+
+
+def _regenerate_folder(
+    root: Path,
+    report_path: Path,
+    entries: List[SnapshotEntry],
+    fingerprint: Dict[str, object],
+    updated_relatives: set[Path] | None,
+    resolver: GitMetadataResolver,
+    policy: deltas.ThresholdPolicy,
+    schema: metrics.MetricSchema,
+    generated_at: str,
+) -> Dict[str, object]:
+    """Write one folder's ``index.json`` and history shards; returns its root-manifest entry."""
+    folder_relative = report_path.parent.relative_to(root)
+    folder_index_path = report_path.parent / "index.json"
+    with PreviousFolderIndex(folder_index_path) as previous_index:
+        commits_payload, folder_generated_at = _folder_commits(
+            entries, folder_relative, updated_relatives, resolver, generated_at, previous_index
+        )
+    previous_generated_at = previous_index.generated_at
+
+    folder_index = {
+        "generated_at": folder_generated_at,
+        "folder": folder_relative.as_posix(),
+        "report_path": report_path.relative_to(root).as_posix(),
+        "commits": commits_payload,
+        "deltas": folder_history_deltas(commits_payload, policy),
+    }
+    metric_types = schema.types_for(
+        artifact["file_name"] for commit in commits_payload for artifact in commit["artifacts"]
+    )
+    if metric_types:
+        # Only folders with non-byte rows carry the map, so size-only indexes keep their layout.
+        folder_index["metrics"] = metric_types
+    if (
+        previous_generated_at
+        and folder_generated_at != previous_generated_at
+        and _content_unchanged(folder_index_path, previous_generated_at, folder_index)
+    ):
+        # Only the run timestamp moved: keep the previous one so the index, binary index and
+        # shards stay byte-identical and are not rewritten.
+        for commit in commits_payload:
+            if commit.get("date") == folder_generated_at:
+                commit["date"] = previous_generated_at
+        folder_generated_at = folder_index["generated_at"] = previous_generated_at
+    encoded_index = _encode_json(folder_index)
+    with instrumentation.phase("write_index"):
+        atomic_io.write_bytes(folder_index_path, encoded_index)
+        history_index.write_index(
+            report_path.parent, folder_relative.as_posix(), commits_payload, folder_generated_at, encoded_index
+        )
+    with instrumentation.phase("write_shards"):
+        folder_shards = shards.write_shards(
+            root,
+            report_path.parent,
+            shards.build_shards(folder_relative.as_posix(), commits_payload, folder_index["deltas"]["pairs"]),
+        )
 
-            needs_subject = entry.subject is None or entry.subject == PLACEHOLDER_MESSAGE
-            if entry.kind in {"head", "branch"}:
-                needs_subject = True
+    summary: Dict[str, object] = {
+        "folder": folder_relative.as_posix(),
+        "index": folder_index_path.relative_to(root).as_posix(),
+        "index_sha256": hashlib.sha256(encoded_index).hexdigest(),
+        "binary_index": (report_path.parent / history_index.INDEX_FILENAME).relative_to(root).as_posix(),
+        "commit_count": len(commits_payload),
+        "shards": folder_shards,
+        **fingerprint,
+    }
+    if metric_types:
+        # The dashboard loads shards rather than index.json for sharded folders.
+        summary["metrics"] = metric_types
+    return summary
 
-            if needs_subject:
-                if meta is not None:
-                    entry.subject = meta.subject
-                else:
-                    entry.subject = entry.message or PLACEHOLDER_MESSAGE
 
-            if entry.kind == "head":
-                if entry.branch is None:
-                    entry.branch = entry.message if entry.message != PLACEHOLDER_MESSAGE else entry.branch
-                if folder_is_updated:
-                    entry.date_iso = generated_at
-            elif entry.kind == "branch":
-                if entry.branch is None:
-                    entry.branch = entry.message if entry.message != PLACEHOLDER_MESSAGE else None
-                if entry.date_iso is None and meta is not None:
-                    entry.date_iso = meta.date_iso
-
-        commits_payload: List[Dict[str, Any]] = []
-        for entry in entries:
-            if is_ignored_commit_message(entry.subject) or is_ignored_commit_message(entry.message):
-                continue
-            branch_fragment = entry.branch or "NO_BRANCH"
-            commit_id = f"{entry.kind}:{branch_fragment}:{entry.sha or PLACEHOLDER_SHA}"
-            existing_commit = existing_commits_by_id.get(commit_id)
-
-            commit_date: str | None = entry.date_iso if isinstance(entry.date_iso, str) else None
-            if not folder_is_updated:
-                if isinstance(existing_commit, Mapping):
-                    existing_date = existing_commit.get("date")
-                    if isinstance(existing_date, str) and existing_date:
-                        commit_date = existing_date
-                if commit_date is None and existing_generated_at:
-                    commit_date = existing_generated_at
+def _encode_json(payload: Any) -> bytes:
+    return json.dumps(payload, indent=2).encode("utf-8")
+
+
+def _volatile_hash(encoded: bytes, timestamps: Iterable[str]) -> str:
+    """SHA-256 of a serialized payload with every occurrence of the given run timestamps blanked."""
+    for timestamp in timestamps:
+        encoded = encoded.replace(json.dumps(timestamp).encode("utf-8"), b'""')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _content_unchanged(path: Path, previous_generated_at: str, payload: Mapping[str, Any]) -> bool:
+    """Whether ``payload`` matches the file at ``path`` once the old and new run timestamps are ignored."""
+    try:
+        previous = path.read_bytes()
+    except OSError:
+        return False
+    timestamps = (previous_generated_at, str(payload["generated_at"]))
+    return _volatile_hash(previous, timestamps) == _volatile_hash(_encode_json(payload), timestamps)
+
+
+def _previous_generated_at(path: Path) -> str | None:
+    try:
+        with path.open(encoding="utf-8") as fp:
+            value = json.load(fp).get("generated_at")
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return None
+    return value if isinstance(value, str) and value else None
+
+
+class PreviousFolderIndex:
+    """Commit dates from the previous run of a folder.
+
+    Lookups go through the mmap-backed ``history-index.bin`` when it was written together
+    with the current ``index.json`` (same recorded SHA-256); otherwise ``index.json`` is parsed.
+    """
+
+    def __init__(self, folder_index_path: Path) -> None:
+        self.generated_at: str | None = None
+        self._binary: history_index.HistoryIndex | None = None
+        self._dates: Dict[str, str] = {}
+        if not folder_index_path.exists():
+            return
+        binary_path = folder_index_path.parent / history_index.INDEX_FILENAME
+        try:
+            if binary_path.is_file():
+                binary = history_index.HistoryIndex(binary_path)
+                if binary.describes(folder_index_path):
+                    self._binary = binary
+                    self.generated_at = binary.generated_at or None
+                    return
+                binary.close()
+        except (OSError, history_index.HistoryIndexError):
+            self._binary = None
+        try:
+            with folder_index_path.open(encoding="utf-8") as existing_fp:
+                existing_index = json.load(existing_fp)
+            self.generated_at = str(existing_index.get("generated_at") or "") or None
+            existing_commits = existing_index.get("commits")
+            if isinstance(existing_commits, list):
+                for commit in existing_commits:
+                    if isinstance(commit, Mapping):
+                        commit_id = str(commit.get("id") or "")
+                        commit_date = commit.get("date")
+                        if commit_id and isinstance(commit_date, str) and commit_date:
+                            self._dates[commit_id] = commit_date
+        except (json.JSONDecodeError, OSError, TypeError, AttributeError):
+            self.generated_at = None
+            self._dates = {}
+
+    def date_of(self, commit_id: str) -> str | None:
+        if self._binary is not None:
+            record = self._binary.get(commit_id)
+            return record.date if record is not None and record.date else None
+        return self._dates.get(commit_id)
+
+    def close(self) -> None:
+        if self._binary is not None:
+            self._binary.close()
+            self._binary = None
+
+    def __enter__(self) -> "PreviousFolderIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _folder_commits(
+    entries: List[SnapshotEntry],
+    folder_relative: Path,
+    updated_relatives: set[Path] | None,
+    resolver: GitMetadataResolver,
+    generated_at: str,
+    previous_index: PreviousFolderIndex,
+) -> tuple[List[Dict[str, Any]], str]:
+    """Resolve subjects/dates for a folder's entries; returns the commit payload and folder timestamp."""
+    existing_generated_at = previous_index.generated_at
+    folder_is_updated = updated_relatives is None or folder_relative in updated_relatives
+
+    for entry in entries:
+        meta: GitMetadata | None = None
+        if is_hex_sha(entry.sha):
+            try:
+                meta = resolver.resolve(entry.sha)
+            except SizeReportError:
+                meta = None
+
+        needs_subject = entry.subject is None or entry.subject == PLACEHOLDER_MESSAGE
+        if entry.kind in {"head", "branch"}:
+            needs_subject = True
+
+        if needs_subject:
+            if meta is not None:
+                entry.subject = meta.subject
             else:
-                if entry.kind == "head":
-                    commit_date = generated_at
-                if commit_date is None and isinstance(existing_commit, Mapping):
-                    existing_date = existing_commit.get("date")
-                    if isinstance(existing_date, str) and existing_date:
-                        commit_date = existing_date
-            if commit_date is None:
+                entry.subject = entry.message or PLACEHOLDER_MESSAGE
+
+        if entry.kind == "head":
+            if entry.branch is None:
+                entry.branch = entry.message if entry.message != PLACEHOLDER_MESSAGE else entry.branch
+            if folder_is_updated:
+                entry.date_iso = generated_at
+        elif entry.kind == "branch":
+            if entry.branch is None:
+                entry.branch = entry.message if entry.message != PLACEHOLDER_MESSAGE else None
+            if entry.date_iso is None and meta is not None:
+                entry.date_iso = meta.date_iso
+
+    commits_payload: List[Dict[str, Any]] = []
+    for entry in entries:
+        if is_ignored_commit_message(entry.subject) or is_ignored_commit_message(entry.message):
+            continue
+        branch_fragment = entry.branch or "NO_BRANCH"
+        commit_id = f"{entry.kind}:{branch_fragment}:{entry.sha or PLACEHOLDER_SHA}"
+        commit_date: str | None = entry.date_iso if isinstance(entry.date_iso, str) else None
+        if not folder_is_updated:
+            existing_date = previous_index.date_of(commit_id)
+            if existing_date:
+                commit_date = existing_date
+            if commit_date is None and existing_generated_at:
+                commit_date = existing_generated_at
+        else:
+            if entry.kind == "head":
                 commit_date = generated_at
-            entry.date_iso = commit_date
-
-            commits_payload.append(
-                {
-                    "kind": entry.kind,
-                    "id": commit_id,
-                    "git_sha": entry.sha or PLACEHOLDER_SHA,
-                    "git_message": entry.subject or entry.message or PLACEHOLDER_MESSAGE,
-                    "branch": entry.branch,
-                    "subject": entry.subject or entry.message or PLACEHOLDER_MESSAGE,
-                    "date": commit_date,
-                    "label": format_entry_label(entry),
-                    "artifacts": [
-                        {
-                            "file_name": artifact.file_name,
-                            "size_bytes": artifact.size_bytes,
-                        }
-                        for artifact in entry.artifacts
-                    ],
-                }
-            )
-
-        folder_generated_at = generated_at if folder_is_updated else (existing_generated_at or generated_at)
-        folder_index = {
-            "generated_at": folder_generated_at,
-            "folder": folder_relative.as_posix(),
-            "report_path": report_path.relative_to(root).as_posix(),
-            "commits": commits_payload,
-        }
-        with folder_index_path.open("w", encoding="utf-8") as folder_fp:
-            json.dump(folder_index, folder_fp, indent=2)
+            if commit_date is None:
+                commit_date = previous_index.date_of(commit_id)
+        if commit_date is None:
+            commit_date = generated_at
+        entry.date_iso = commit_date
 
-        summary_entries.append(
+        commits_payload.append(
             {
-                "folder": folder_relative.as_posix(),
-                "index": folder_index_path.relative_to(root).as_posix(),
-                "commit_count": len(commits_payload),
+                "kind": entry.kind,
+                "id": commit_id,
+                "git_sha": entry.sha or PLACEHOLDER_SHA,
+                "git_message": entry.subject or entry.message or PLACEHOLDER_MESSAGE,
+                "branch": entry.branch,
+                "subject": entry.subject or entry.message or PLACEHOLDER_MESSAGE,
+                "date": commit_date,
+                "label": format_entry_label(entry),
+                "artifacts": [
+                    {
+                        "file_name": artifact.file_name,
+                        "size_bytes": artifact.size_bytes,
+                    }
+                    for artifact in entry.artifacts
+                ],
             }
         )
 
-    manifest = {
-        "generated_at": generated_at,
-        "folders": summary_entries,
-    }
-    with (root / MANIFEST_FILENAME).open("w", encoding="utf-8") as fp:
-        json.dump(manifest, fp, indent=2)
-    return manifest
+    folder_generated_at = generated_at if folder_is_updated else (existing_generated_at or generated_at)
+    return commits_payload, folder_generated_at
 
 
 def format_percent(value: object) -> str:
@@ -590,22 +1479,32 @@ def format_commit_label_from_dict(commit: Mapping[str, Any]) -> str:
     return short_sha
 
 
-def log_artifact_summary(folder: str, manifest: MutableMapping[str, Any], root: Path) -> None:
+def log_artifact_summary(
+    folder: str,
+    manifest: MutableMapping[str, Any],
+    root: Path,
+    policy: deltas.ThresholdPolicy | None = None,
+    schema: metrics.MetricSchema | None = None,
+) -> tuple[Mapping[str, Any], Mapping[str, Any]] | None:
+    """Print the default comparison of ``folder``; returns its ``(base, target)`` commits.
+
+    Typed metric rows print in their unit and are marked when they moved in the worse direction.
+    """
     folders: Sequence[Mapping[str, Any]] = manifest.get("folders", [])  # type: ignore[assignment]
     match = next((item for item in folders if item.get("folder") == folder), None)
     if not match:
         print(f"No manifest entry found for {folder}; instrumentation summary skipped.", file=sys.stdout)
-        return
+        return None
 
     index_rel = match.get("index")
     if not index_rel:
         print("No per-folder index reference found; instrumentation summary skipped.", file=sys.stdout)
-        return
+        return None
 
     index_path = (root / index_rel).resolve()
     if not index_path.exists():
         print(f"Folder index '{index_path}' missing; instrumentation summary skipped.", file=sys.stdout)
-        return
+        return None
 
     with index_path.open(encoding="utf-8") as fp:
         folder_index = json.load(fp)
@@ -613,7 +1512,7 @@ def log_artifact_summary(folder: str, manifest: MutableMapping[str, Any], root:
     commits: Sequence[Mapping[str, Any]] = folder_index.get("commits", [])  # type: ignore[assignment]
     if not commits:
         print("No commits recorded; instrumentation summary skipped.", file=sys.stdout)
-        return
+        return None
 
     base_commit = commits[0]
     target_commit = commits[1] if len(commits) > 1 else commits[0]
@@ -641,35 +1540,124 @@ def log_artifact_summary(folder: str, manifest: MutableMapping[str, Any], root:
 
     base_sizes = {item["file_name"]: item["size_bytes"] for item in base_commit.get("artifacts", [])}
     target_sizes = {item["file_name"]: item["size_bytes"] for item in target_commit.get("artifacts", [])}
-    artifact_names = sorted(set(base_sizes) | set(target_sizes))
-
-    print(f"Artifacts measured ({len(artifact_names)}):", file=sys.stdout)
-    alert_total = 0
-    for name in artifact_names:
-        base_size = base_sizes.get(name, 0)
-        head_size = target_sizes.get(name, 0)
-        delta_bytes = head_size - base_size
-        delta_percent = None
-        if base_size > 0:
-            delta_percent = (delta_bytes / base_size) * 100
-        elif head_size > 0:
-            delta_percent = 100.0
-        exceeds_bytes = abs(delta_bytes) >= 25_000
-        exceeds_percent = delta_percent is not None and abs(delta_percent) >= 2.0
-        thresholds = []
-        if exceeds_percent:
-            thresholds.append("percent>2")
-        if exceeds_bytes:
-            thresholds.append("bytes>25000")
-        if thresholds:
-            alert_total += 1
+    comparison = deltas.compare_sizes(base_sizes, target_sizes, policy=policy)
+    schema = schema or metrics.MetricSchema()
+
+    print(f"Artifacts measured ({len(comparison.names)}):", file=sys.stdout)
+    for idx, name in enumerate(comparison.names):
+        thresholds = comparison.thresholds[idx]
         threshold_label = ", ".join(thresholds) if thresholds else "none"
+        metric = schema.type_of(name)
+        delta = comparison.delta[idx]
+        regression = (
+            " regression"
+            if metric.unit != metrics.BYTES and name in base_sizes and metric.is_regression(delta)
+            else ""
+        )
         print(
-            f"  - {name}: base={base_size}B head={head_size}B delta={delta_bytes}B ({format_percent(delta_percent)}) "
-            f"thresholds={threshold_label}",
+            f"  - {name}: base={metric.format(comparison.base[idx])} head={metric.format(comparison.head[idx])} "
+            f"delta={metric.format(delta)} ({format_percent(comparison.percent[idx])}) "
+            f"thresholds={threshold_label}{regression}",
             file=sys.stdout,
         )
-    print(f"Alert thresholds triggered: {alert_total}", file=sys.stdout)
+    print(f"Alert thresholds triggered: {comparison.alert_count}", file=sys.stdout)
+    if comparison.alert_count:
+        alerted = {
+            name.partition(deltas.SUB_ARTIFACT_SEPARATOR)[0]
+            for idx, name in enumerate(comparison.names)
+            if comparison.thresholds[idx]
+        }
+        log_symbol_diff(index_path.parent, base_commit, target_commit, sorted(alerted))
+    return base_commit, target_commit
+
+
+def evaluate_folder_budget(
+    folder: str,
+    budget: budgets.FolderBudget,
+    comparison: tuple[Mapping[str, Any], Mapping[str, Any]] | None,
+    schema: metrics.MetricSchema | None = None,
+) -> budgets.FolderResult:
+    """Check the summary's target commit of ``folder`` against its budget (growth vs. the base commit)."""
+    if comparison is None:
+        return budgets.evaluate(folder, budget, {}, None, schema=schema)
+    base_commit, target_commit = comparison
+    head_sizes = {item["file_name"]: item["size_bytes"] for item in target_commit.get("artifacts", [])}
+    base_sizes = None
+    if base_commit is not target_commit:
+        base_sizes = {item["file_name"]: item["size_bytes"] for item in base_commit.get("artifacts", [])}
+    base_sha = base_commit.get("git_sha") if base_sizes is not None else None
+    shas = (str(base_sha) if base_sha else None, str(target_commit.get("git_sha") or "") or None)
+    return budgets.evaluate(folder, budget, head_sizes, base_sizes, shas, schema)
+
+
+def emit_budget_report(budget_path: Path, results: List[budgets.FolderResult], destination: Path | str) -> bool:
+    """Write the pass/fail JSON ('-' for stdout) and log breaches; returns whether a run-failing breach occurred."""
+    report = budgets.report_payload(budget_path, results)
+    encoded = json.dumps(report, indent=2)
+    if str(destination) == "-":
+        print(encoded, file=sys.stdout)
+    else:
+        atomic_io.write_text(Path(destination), encoded + "\n")
+        print(f"Budget report ({report['status']}): {destination}", file=sys.stdout)
+    for result in results:
+        for check in result.failures:
+            label = "Budget breach" if result.enforced else "Budget exceeded (not enforced)"
+            print(
+                f"{label}: {result.folder} {check.artifact} {check.metric} actual={check.actual} limit={check.limit}",
+                file=sys.stderr,
+            )
+    return report["status"] == budgets.FAIL
+
+
+def log_symbol_diff(
+    folder_path: Path,
+    base_commit: Mapping[str, Any],
+    target_commit: Mapping[str, Any],
+    artifacts: Sequence[str],
+) -> None:
+    """Print the symbols behind a threshold alert, when both commits have symbol tables."""
+    base_sha = str(base_commit.get("git_sha") or "")
+    target_sha = str(target_commit.get("git_sha") or "")
+    try:
+        base_tables = symbols.load_tables(folder_path, base_sha)
+        target_tables = symbols.load_tables(folder_path, target_sha)
+    except (symbols.SymbolTableError, OSError):
+        return  # e.g. snapshots recorded before symbol tables existed, or artifacts without symbols
+    tracked = [name for name in artifacts if name in base_tables or name in target_tables]
+    if not tracked:
+        return
+    print(f"Symbol changes ({base_sha[:7]} → {target_sha[:7]}) for {', '.join(tracked)}:", file=sys.stdout)
+    for line in symbols.diff_tables(base_tables, target_tables, tracked).lines():
+        print(line, file=sys.stdout)
+
+def _parse_target_pair(value: str) -> tuple[str, str]:
+    input_part, sep, output_part = value.partition("=")
+    if not sep or not input_part or not output_part:
+        raise argparse.ArgumentTypeError(f"Expected INPUT=OUTPUT, got '{value}'")
+    return input_part, output_part
+
+
+def load_targets_file(path: Path) -> List[tuple[str, str]]:
+    """Read ``[{"input": ..., "output": ...}, ...]`` (or an ``{input: output}`` mapping)."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        raise SizeReportError(f"Unable to read targets file '{path}': {exc}") from exc
+    if isinstance(data, Mapping):
+        data = [{"input": key, "output": value} for key, value in data.items()]
+    if not isinstance(data, list):
+        raise SizeReportError(f"Targets file '{path}' must contain a JSON array or object")
+    pairs: List[tuple[str, str]] = []
+    for idx, item in enumerate(data):
+        if not isinstance(item, Mapping):
+            raise SizeReportError(f"Targets file '{path}' entry {idx} must be an object")
+        input_value = item.get("input")
+        output_value = item.get("output")
+        if not isinstance(input_value, str) or not isinstance(output_value, str):
+            raise SizeReportError(f"Targets file '{path}' entry {idx} requires string 'input' and 'output'")
+        pairs.append((input_value, output_value))
+    return pairs
+
 
 def parse_args(argv: List[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -677,55 +1665,218 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
     )
     parser.add_argument(
         "--input",
-        required=True,
         help="Directory containing built artifacts to measure (absolute or relative to repo root).",
     )
     parser.add_argument(
         "--output",
-        required=True,
         help="Directory under reports/size where report.txt resides (absolute or relative to reports/size).",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--target",
+        action="append",
+        default=[],
+        type=_parse_target_pair,
+        metavar="INPUT=OUTPUT",
+        help="Additional input/output pair to update in the same run (repeatable).",
+    )
+    parser.add_argument(
+        "--targets-file",
+        type=Path,
+        help='JSON file listing targets as [{"input": ..., "output": ...}] or {input: output}.',
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker threads used to measure artifacts and parse reports (default: CPU count).",
+    )
+    parser.add_argument(
+        "--thresholds",
+        type=Path,
+        help='JSON threshold policy: {"default": {"bytes": 25000, "percent": 2}, "artifacts": {name: {...}}}.',
+    )
+    parser.add_argument(
+        "--budgets",
+        type=Path,
+        help="JSON budget file (e.g. reports/size/budgets.json) with per-artifact raw/gzip/brotli, growth and "
+        f"subsystem limits; results are emitted as pass/fail JSON and a breach exits with {BUDGET_BREACH_EXIT}.",
+    )
+    parser.add_argument(
+        "--budget-report",
+        metavar="PATH",
+        help=f"Write the budget pass/fail JSON to PATH (default: reports/size/{BUDGET_REPORT_FILENAME}; "
+        "'-' for stdout, which then also carries the update summary).",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help=f"JSON metric schema typing non-byte rows (units, direction, thresholds); "
+        f"defaults to reports/size/{METRICS_FILENAME} when present.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only regenerate index.json for the --output folder and folders whose report.txt changed "
+        "since the last manifest; unchanged folders keep their existing index.json.",
+    )
+    parser.add_argument(
+        "--retention",
+        type=Path,
+        help='JSON retention policy: {"default": {"keep": 180, "downsample": "week"}, "folders": {folder: {...}}}; '
+        "older BRANCH snapshots are downsampled and moved to report-archive.csv.gz.",
+    )
+    parser.add_argument(
+        "--timings",
+        metavar="PATH",
+        help="Write per-phase wall time and counters (git subprocesses, rows parsed, bytes written, "
+        "folders regenerated) as JSON to PATH ('-' for stderr).",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Run under cProfile and dump pstats data to PATH (inspect with `python -m pstats PATH`).",
+    )
+    args = parser.parse_args(argv)
+    if (args.input is None) != (args.output is None):
+        parser.error("--input and --output must be given together")
+    if args.input is None and not args.target and args.targets_file is None:
+        parser.error("provide --input/--output, --target or --targets-file")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.budget_report is not None and args.budgets is None:
+        parser.error("--budget-report requires --budgets")
+    return args
 
 
 def main(argv: List[str] | None = None) -> int:
     if argv is None:
         argv = sys.argv[1:]
     args = parse_args(argv)
+    if args.timings is None and args.profile is None:
+        return run(args)
+
+    recorder = instrumentation.activate()
+    profiler = cProfile.Profile() if args.profile else None
+    exit_code = 1
+    try:
+        if profiler is not None:
+            exit_code = profiler.runcall(run, args)
+        else:
+            exit_code = run(args)
+    finally:
+        if profiler is not None:
+            profiler.dump_stats(args.profile)
+        if args.timings is not None:
+            report = {"exit_code": exit_code, **recorder.to_dict()}
+            if args.profile:
+                report["profile"] = args.profile
+            encoded = json.dumps(report, indent=2)
+            if args.timings == "-":
+                print(encoded, file=sys.stderr)
+            else:
+                Path(args.timings).write_text(encoded + "\n", encoding="utf-8")
+    return exit_code
+
+
+def run(args: argparse.Namespace) -> int:
     root = Path(__file__).resolve().parent
     repo_root = root.parent.parent
 
-    input_path = Path(args.input)
-    if not input_path.is_absolute():
-        input_path = (repo_root / args.input).resolve()
+    try:
+        pairs: List[tuple[str, str]] = []
+        if args.input is not None:
+            pairs.append((args.input, args.output))
+        pairs.extend(args.target)
+        if args.targets_file is not None:
+            pairs.extend(load_targets_file(args.targets_file))
+    except SizeReportError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    targets: List[SnapshotTarget] = []
+    output_labels: List[Path] = []
+    for raw_input, raw_output in pairs:
+        input_path = Path(raw_input)
+        if not input_path.is_absolute():
+            input_path = (repo_root / raw_input).resolve()
 
-    output_path = Path(args.output)
-    if not output_path.is_absolute():
-        output_path = (root / args.output).resolve()
+        output_path = Path(raw_output)
+        if not output_path.is_absolute():
+            output_path = (root / raw_output).resolve()
 
+        try:
+            output_labels.append(output_path.relative_to(root))
+        except ValueError:
+            print(
+                f"Error: Output directory '{output_path}' must live under {root}",
+                file=sys.stderr,
+            )
+            return 1
+        targets.append(SnapshotTarget(input_folder=input_path, output_folder=output_path))
     try:
-        output_label = output_path.relative_to(root)
-    except ValueError:
-        print(
-            f"Error: Output directory '{output_path}' must live under {root}",
-            file=sys.stderr,
+        budget_policy = budgets.BudgetPolicy.load(args.budgets) if args.budgets else None
+        if args.thresholds:
+            policy = deltas.ThresholdPolicy.load(args.thresholds)
+        elif budget_policy is not None and budget_policy.thresholds is not None:
+            policy = budget_policy.thresholds
+        else:
+            policy = deltas.ThresholdPolicy()
+        retention_policy = (
+            retention.RetentionPolicy.load(args.retention) if args.retention else retention.RetentionPolicy()
         )
+        metrics_path = args.metrics or (root / METRICS_FILENAME)
+        if args.metrics is not None or metrics_path.is_file():
+            schema = metrics.MetricSchema.load(metrics_path)
+        else:
+            schema = metrics.MetricSchema()
+    except (
+        deltas.ThresholdConfigError,
+        retention.RetentionConfigError,
+        budgets.BudgetConfigError,
+        metrics.MetricConfigError,
+    ) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
         return 1
+    for target, output_label in zip(targets, output_labels):
+        target.retention = retention_policy.for_folder(output_label.as_posix())
     try:
-        head_meta = update_head_snapshot(
-            input_path,
-            output_path,
-            repo_root,
-        )
-        manifest = regenerate_manifest(root, repo_root, output_label)
-        print(
-            f"Updated HEAD snapshot for {output_label}: {head_meta.sha} — {head_meta.subject}",
-            file=sys.stdout,
-        )
-        log_artifact_summary(output_label.as_posix(), manifest, root)
+        # Parallel preset jobs share reports/size; each read-modify-write cycle runs alone.
+        with atomic_io.locked(root):
+            with instrumentation.phase("load_cache"):
+                cache = CommitMetadataCache.load(root / COMMIT_CACHE_FILENAME)
+            with GitMetadataResolver(repo_root, cache) as resolver:
+                with instrumentation.phase("update_snapshots"):
+                    head_meta = update_head_snapshots(targets, repo_root, resolver, args.jobs, schema)
+                with instrumentation.phase("regenerate_manifest"):
+                    manifest = regenerate_manifest(
+                        root, repo_root, output_labels, resolver, args.incremental, policy, schema
+                    )
+            with instrumentation.phase("save_cache"):
+                try:
+                    cache.save()
+                except OSError as exc:
+                    print(f"Warning: unable to persist commit metadata cache: {exc}", file=sys.stderr)
+        budget_results: List[budgets.FolderResult] = []
+        with instrumentation.phase("log_summary"):
+            for output_label in output_labels:
+                print(
+                    f"Updated HEAD snapshot for {output_label}: {head_meta.sha} — {head_meta.subject}",
+                    file=sys.stdout,
+                )
+                comparison = log_artifact_summary(
+                    output_label.as_posix(), manifest, root, policy.with_patterns(schema.threshold_patterns()), schema
+                )
+                folder_budget = budget_policy.for_folder(output_label.as_posix()) if budget_policy else None
+                if folder_budget is not None:
+                    budget_results.append(
+                        evaluate_folder_budget(output_label.as_posix(), folder_budget, comparison, schema)
+                    )
     except SizeReportError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         return 1
+    budget_report = args.budget_report or root / BUDGET_REPORT_FILENAME
+    if args.budgets is not None and emit_budget_report(args.budgets, budget_results, budget_report):
+        return BUDGET_BREACH_EXIT
     return 0
 
 
@@ -8,6 +8,13 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Mapping
 
+if __package__ is None or __package__ == "":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from reports.size import metrics  # type: ignore
+else:  # pragma: no cover - script execution path only
+    from . import metrics  # type: ignore
+
+# ``size_bytes`` holds the row's value in its metric unit (bytes unless typed in the metric schema).
 HEADER = ["git_sha", "git_message", "file_name", "size_bytes"]
 
 
@@ -83,6 +90,45 @@ def _validate_commit_entry(commit: object, index: int, errors: list[str]) -> Non
     _validate_commit_artifacts(commit.get("artifacts"), errors, prefix)
 
 
+def _validate_deltas(deltas: object, errors: list[str]) -> None:
+    if not isinstance(deltas, dict):
+        errors.append("deltas must be an object")
+        return
+    if not isinstance(deltas.get("thresholds"), dict):
+        errors.append("deltas.thresholds must be an object")
+    pairs = deltas.get("pairs")
+    if not isinstance(pairs, list):
+        errors.append("deltas.pairs must be an array")
+        return
+    for idx, pair in enumerate(pairs):
+        prefix = f"deltas.pairs[{idx}]"
+        if not isinstance(pair, dict):
+            errors.append(f"{prefix} must be an object")
+            continue
+        for field in ("base", "target"):
+            if not isinstance(pair.get(field), str):
+                errors.append(f"{prefix}.{field} must be a string")
+        if not isinstance(pair.get("delta_bytes"), int):
+            errors.append(f"{prefix}.delta_bytes must be an integer")
+        if not isinstance(pair.get("artifacts"), dict):
+            errors.append(f"{prefix}.artifacts must be an object")
+
+
+def _validate_metrics(types: object, errors: list[str]) -> None:
+    if not isinstance(types, dict):
+        errors.append("metrics must be an object keyed by artifact row")
+        return
+    for name, metric in types.items():
+        prefix = f"metrics[{name!r}]"
+        if not isinstance(metric, dict):
+            errors.append(f"{prefix} must be an object")
+            continue
+        if metric.get("unit") not in metrics.UNITS:
+            errors.append(f"{prefix}.unit must be one of {', '.join(metrics.UNITS)}")
+        if not isinstance(metric.get("lower_is_better"), bool):
+            errors.append(f"{prefix}.lower_is_better must be a boolean")
+
+
 def validate_history_index(path: Path) -> list[str]:
     try:
         data = json.loads(path.read_text(encoding="utf-8"))
@@ -105,7 +151,49 @@ def validate_history_index(path: Path) -> list[str]:
     else:
         for idx, commit in enumerate(commits):
             _validate_commit_entry(commit, idx, errors)
+    if "deltas" in data:
+        _validate_deltas(data["deltas"], errors)
+    if "metrics" in data:
+        _validate_metrics(data["metrics"], errors)
+
+    return errors
+
+
+def validate_history_shard(path: Path) -> list[str]:
+    """Check a column-oriented history shard (``history/*.json``) for internal consistency."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return [f"{path} does not exist"]
+    except json.JSONDecodeError as exc:
+        return [f"{path} is not valid JSON: {exc}"]
+    if not isinstance(data, dict):
+        return [f"{path} must contain a JSON object at the top level"]
 
+    errors: list[str] = []
+    count = data.get("commit_count")
+    if not isinstance(count, int) or count < 0:
+        return ["commit_count must be a non-negative integer"]
+    artifacts = data.get("artifacts")
+    if not isinstance(artifacts, list) or not all(isinstance(name, str) and name for name in artifacts):
+        errors.append("artifacts must be an array of non-empty strings")
+        artifacts = []
+    columns = data.get("columns")
+    if not isinstance(columns, dict):
+        return errors + ["columns must be an object"]
+    for field in ("id", "git_sha", "date", "delta_bytes", "alerts"):
+        column = columns.get(field)
+        if not isinstance(column, list) or len(column) != count:
+            errors.append(f"columns.{field} must be an array of length {count}")
+    sizes = columns.get("sizes")
+    if not isinstance(sizes, list) or len(sizes) != len(artifacts):
+        errors.append("columns.sizes must hold one column per artifact")
+    else:
+        for idx, column in enumerate(sizes):
+            if not isinstance(column, list) or len(column) != count:
+                errors.append(f"columns.sizes[{idx}] must be an array of length {count}")
+            elif any(value is not None and (not isinstance(value, int) or value < 0) for value in column):
+                errors.append(f"columns.sizes[{idx}] values must be null or non-negative integers")
     return errors
 
 
@@ -125,6 +213,16 @@ def _build_cli() -> argparse.ArgumentParser:
         help="Path to a folder-level index.json file.",
     )
 
+    shard_parser = subparsers.add_parser(
+        "shard",
+        help="Validate a history shard (history/hot.json or history/archive-*.json).",
+    )
+    shard_parser.add_argument(
+        "path",
+        type=Path,
+        help="Path to a history shard file.",
+    )
+
     return parser
 
 
@@ -138,6 +236,15 @@ def _run_cli(args: argparse.Namespace) -> int:
         print(f"[history-chart] {args.path} ✓ valid")
         return 0
 
+    if args.command == "shard":
+        errors = validate_history_shard(args.path)
+        if errors:
+            for error in errors:
+                print(f"[history-shard] {error}", file=sys.stderr)
+            return 1
+        print(f"[history-shard] {args.path} ✓ valid")
+        return 0
+
     print("No command specified. Try '--help' for usage.", file=sys.stderr)
     return 1
 
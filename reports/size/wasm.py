@@ -0,0 +1,229 @@
+"""Zero-copy WebAssembly section and function-size reader for size reports.
+
+The module is mapped with ``mmap`` and walked through ``memoryview`` slices, so a
+multi-megabyte debug build is never copied into Python objects; only the names of
+the largest functions are decoded (or every function, when a full symbol table is wanted).
+"""
+from __future__ import annotations
+
+import mmap
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+WASM_MAGIC = b"\0asm"
+WASM_VERSION = 1
+DEFAULT_TOP_FUNCTIONS = 10
+
+SECTION_NAMES = {
+    0: "custom",
+    1: "type",
+    2: "import",
+    3: "function",
+    4: "table",
+    5: "memory",
+    6: "global",
+    7: "export",
+    8: "start",
+    9: "element",
+    10: "code",
+    11: "data",
+    12: "datacount",
+    13: "tag",
+}
+_IMPORT_FUNC, _IMPORT_TABLE, _IMPORT_MEMORY, _IMPORT_GLOBAL, _IMPORT_TAG = range(5)
+_NAME_SUBSECTION_FUNCTIONS = 1
+
+
+class WasmFormatError(ValueError):
+    """Raised when a file is not a well-formed WebAssembly binary."""
+
+
+@dataclass
+class WasmBreakdown:
+    file_size: int
+    # Section payload sizes keyed by "code", "data", "custom:<name>", ...
+    sections: Dict[str, int] = field(default_factory=dict)
+    # (function name, body size) for the largest code bodies, biggest first.
+    largest_functions: List[Tuple[str, int]] = field(default_factory=list)
+    # File offsets [start, end) of the code section payload; source maps address this range.
+    code_range: Tuple[int, int] | None = None
+    # Body size of every function keyed by name (only filled with ``all_functions``).
+    functions: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def dwarf_bytes(self) -> int:
+        return sum(size for name, size in self.sections.items() if name.startswith("custom:.debug_"))
+
+    def sub_artifacts(self) -> List[Tuple[str, int]]:
+        """Flatten into ``(suffix, size)`` rows stored next to the parent artifact."""
+        rows = [(f"section:{name}", size) for name, size in sorted(self.sections.items())]
+        if self.dwarf_bytes:
+            rows.append(("dwarf", self.dwarf_bytes))
+        rows.extend((f"function:{name}", size) for name, size in self.largest_functions)
+        return rows
+
+
+class _Reader:
+    __slots__ = ("view", "pos", "end")
+
+    def __init__(self, view: memoryview, pos: int = 0, end: int | None = None) -> None:
+        self.view = view
+        self.pos = pos
+        self.end = len(view) if end is None else end
+
+    def byte(self) -> int:
+        if self.pos >= self.end:
+            raise WasmFormatError("unexpected end of data")
+        value = self.view[self.pos]
+        self.pos += 1
+        return value
+
+    def uleb(self) -> int:
+        result = 0
+        shift = 0
+        while True:
+            value = self.byte()
+            result |= (value & 0x7F) << shift
+            if not value & 0x80:
+                return result
+            shift += 7
+            if shift > 63:
+                raise WasmFormatError("LEB128 value too long")
+
+    def skip(self, count: int) -> None:
+        if count < 0 or self.pos + count > self.end:
+            raise WasmFormatError("length exceeds enclosing section")
+        self.pos += count
+
+    def name(self) -> str:
+        length = self.uleb()
+        start = self.pos
+        self.skip(length)
+        return bytes(self.view[start : start + length]).decode("utf-8", errors="replace")
+
+    def limits(self) -> None:
+        flags = self.uleb()
+        self.uleb()
+        if flags & 0x01:
+            self.uleb()
+
+
+def _count_imported_functions(reader: _Reader) -> int:
+    functions = 0
+    for _ in range(reader.uleb()):
+        reader.skip(reader.uleb())  # module
+        reader.skip(reader.uleb())  # field
+        kind = reader.byte()
+        if kind == _IMPORT_FUNC:
+            reader.uleb()
+            functions += 1
+        elif kind == _IMPORT_TABLE:
+            reader.byte()
+            reader.limits()
+        elif kind == _IMPORT_MEMORY:
+            reader.limits()
+        elif kind == _IMPORT_GLOBAL:
+            reader.byte()
+            reader.byte()
+        elif kind == _IMPORT_TAG:
+            reader.byte()
+            reader.uleb()
+        else:
+            raise WasmFormatError(f"unknown import kind {kind}")
+    return functions
+
+
+def _code_body_sizes(reader: _Reader) -> List[int]:
+    sizes: List[int] = []
+    for _ in range(reader.uleb()):
+        size = reader.uleb()
+        reader.skip(size)
+        sizes.append(size)
+    return sizes
+
+
+def _function_names(reader: _Reader, wanted: set[int] | None) -> Dict[int, str]:
+    """Names of the ``wanted`` function indexes (every named function when ``None``)."""
+    names: Dict[int, str] = {}
+    while reader.pos < reader.end and (wanted is None or len(names) < len(wanted)):
+        subsection = reader.byte()
+        size = reader.uleb()
+        if subsection != _NAME_SUBSECTION_FUNCTIONS:
+            reader.skip(size)
+            continue
+        sub = _Reader(reader.view, reader.pos, reader.pos + size)
+        for _ in range(sub.uleb()):
+            index = sub.uleb()
+            if wanted is None or index in wanted:
+                names[index] = sub.name()
+            else:
+                sub.skip(sub.uleb())
+        reader.skip(size)
+    return names
+
+
+def analyze_view(
+    view: memoryview, top_functions: int = DEFAULT_TOP_FUNCTIONS, all_functions: bool = False
+) -> WasmBreakdown:
+    if len(view) < 8 or bytes(view[:4]) != WASM_MAGIC:
+        raise WasmFormatError("missing \\0asm magic")
+    if int.from_bytes(view[4:8], "little") != WASM_VERSION:
+        raise WasmFormatError("unsupported wasm version")
+
+    breakdown = WasmBreakdown(file_size=len(view))
+    reader = _Reader(view, 8)
+    imported_functions = 0
+    body_sizes: List[int] = []
+    name_section: Tuple[int, int] | None = None
+
+    while reader.pos < reader.end:
+        section_id = reader.byte()
+        size = reader.uleb()
+        start = reader.pos
+        reader.skip(size)
+        section = _Reader(view, start, start + size)
+        if section_id == 0:
+            custom_name = section.name()
+            key = f"custom:{custom_name}"
+            if custom_name == "name":
+                name_section = (section.pos, section.end)
+        else:
+            key = SECTION_NAMES.get(section_id, f"unknown:{section_id}")
+            if section_id == 2:
+                imported_functions = _count_imported_functions(section)
+            elif section_id == 10:
+                body_sizes = _code_body_sizes(section)
+                breakdown.code_range = (start, start + size)
+        breakdown.sections[key] = breakdown.sections.get(key, 0) + size
+
+    if (top_functions > 0 or all_functions) and body_sizes:
+        ranked = sorted(range(len(body_sizes)), key=lambda idx: body_sizes[idx], reverse=True)[:top_functions]
+        wanted = None if all_functions else {imported_functions + idx for idx in ranked}
+        names: Dict[int, str] = {}
+        if name_section is not None:
+            names = _function_names(_Reader(view, *name_section), wanted)
+        if all_functions:
+            for idx, size in enumerate(body_sizes):
+                # Distinct functions may share a name (e.g. statics from different files).
+                name = names.get(imported_functions + idx, f"func[{imported_functions + idx}]")
+                breakdown.functions[name] = breakdown.functions.get(name, 0) + size
+        for idx in ranked:
+            func_index = imported_functions + idx
+            breakdown.largest_functions.append((names.get(func_index, f"func[{func_index}]"), body_sizes[idx]))
+    return breakdown
+
+
+def analyze_wasm(
+    path: Path, top_functions: int = DEFAULT_TOP_FUNCTIONS, all_functions: bool = False
+) -> WasmBreakdown:
+    """Return per-section sizes and the largest functions (optionally all) of the wasm module at ``path``."""
+    with path.open("rb") as fp:
+        if path.stat().st_size == 0:
+            raise WasmFormatError("empty file")
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return analyze_view(view, top_functions, all_functions)
+            finally:
+                view.release()
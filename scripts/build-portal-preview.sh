@@ -13,6 +13,7 @@ Options:
   --commit <sha>           Commit hash for manifest metadata (default: current HEAD)
   --generated-at <iso>     ISO-8601 timestamp (default: current UTC time)
   --deployment-runtime <ms>  Deployment runtime in milliseconds for manifest metadata
+  --budgets <path>         Budget file providing the gzip budgets (default: reports/size/budgets.json)
   --ci                     Enable CI mode (enforces gzip budgets)
   -h, --help               Show this help message
 EOF
@@ -32,20 +33,35 @@ stage_directory() {
     mv "${temp_dir}" "${target_dir}"
 }
 
+bundle_budget() {
+    local bundle="$1"
+    node -e '
+        const [file, bundle] = process.argv.slice(1);
+        const limit = ((require(file).bundles || {})[bundle] || {}).gzip;
+        if (!Number.isInteger(limit)) {
+            console.error(`No gzip budget for bundle "${bundle}" in ${file}`);
+            process.exit(1);
+        }
+        console.log(limit);
+    ' "${BUDGETS_PATH}" "${bundle}"
+}
+
 enforce_budgets() {
     local portal_dir="$1"
     local sandbox_dir="$2"
-    local portal_size sandbox_size
+    local portal_size sandbox_size portal_budget sandbox_budget
+    portal_budget=$(bundle_budget portal)
+    sandbox_budget=$(bundle_budget sandbox)
     portal_size=$(gzip_size "${portal_dir}")
     sandbox_size=$(gzip_size "${sandbox_dir}")
-    echo "Portal gzip size: ${portal_size} bytes (budget 153600)"
-    echo "Sandbox gzip size: ${sandbox_size} bytes (budget 204800)"
-    if (( portal_size > 153600 )); then
-        echo "Portal bundle exceeds 150 KB gzip budget." >&2
+    echo "Portal gzip size: ${portal_size} bytes (budget ${portal_budget})"
+    echo "Sandbox gzip size: ${sandbox_size} bytes (budget ${sandbox_budget})"
+    if (( portal_size > portal_budget )); then
+        echo "Portal bundle exceeds ${portal_budget}-byte gzip budget (${BUDGETS_PATH})." >&2
         exit 1
     fi
-    if (( sandbox_size > 204800 )); then
-        echo "Sandbox bundle exceeds 200 KB gzip budget." >&2
+    if (( sandbox_size > sandbox_budget )); then
+        echo "Sandbox bundle exceeds ${sandbox_budget}-byte gzip budget (${BUDGETS_PATH})." >&2
         exit 1
     fi
 }
@@ -68,6 +84,7 @@ REPO_ROOT="$(cd "${SCRIPT_DIR}/.." && pwd -P)"
 PORTAL_ROOT="${REPO_ROOT}/web/portal"
 SANDBOX_PATH="${REPO_ROOT}/testbeds/sandbox/out"
 REPORT_PATH="${REPO_ROOT}/reports/size"
+BUDGETS_PATH="${REPO_ROOT}/reports/size/budgets.json"
 PREVIEW_DIR="${PORTAL_PREVIEW_DIR:-/tmp/portal-preview}"
 DIST_DIR="${PORTAL_DIST_DIR:-${PORTAL_ROOT}/dist}"
 COMMIT_SHA="$(git -C "${REPO_ROOT}" rev-parse --short HEAD)"
@@ -85,6 +102,10 @@ while [[ $# -gt 0 ]]; do
             REPORT_PATH="$(realpath "$2")"
             shift 2
             ;;
+        --budgets)
+            BUDGETS_PATH="$(realpath "$2")"
+            shift 2
+            ;;
         --preview-dir)
             PREVIEW_DIR="$(realpath -m "$2")"
             shift 2
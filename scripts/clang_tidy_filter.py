@@ -1,41 +1,62 @@
 #!/usr/bin/env python3
-import subprocess
+# Per-TU clang-tidy entry point used as CMAKE_C_CLANG_TIDY. Kept import-light on purpose:
+# when a daemon (`clang_tidy_filter.py --daemon`) is listening the request is forwarded to
+# it; otherwise the heavier clang_tidy_runner module runs clang-tidy in this process.
+import os
 import sys
 
-
-def _filter_compile_args(args):
-    filtered = []
-    for arg in args:
-        if arg.startswith("--use-port="):
-            continue
-        filtered.append(arg)
-    return filtered
+from clang_tidy_socket import default_socket_path, is_trusted_socket
+
+
+def _forward_to_daemon(argv):
+    """Return the exit code from the daemon, or None when no daemon could serve the request."""
+    if not hasattr(os, "getuid") or os.environ.get("NT_CLANG_TIDY_DAEMON", "1") == "0":
+        return None
+    socket_path = os.environ.get("NT_CLANG_TIDY_DAEMON_SOCKET") or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    # The request carries the environment and the reply decides the build; only talk to a
+    # socket this user owns and nobody else can open.
+    if not is_trusted_socket(socket_path):
+        print(
+            f"clang_tidy_filter.py: ignoring {socket_path}: not a 0600 socket owned by this user",
+            file=sys.stderr,
+        )
+        return None
+
+    import json
+    import socket
+
+    request = {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            stream = client.makefile("rb")
+            header = json.loads(stream.readline())
+            stdout = stream.read(header["stdout"])
+            stderr = stream.read(header["stderr"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if len(stdout) != header["stdout"] or len(stderr) != header["stderr"]:
+        return None
+    sys.stdout.buffer.write(stdout)
+    sys.stdout.buffer.flush()
+    sys.stderr.buffer.write(stderr)
+    sys.stderr.buffer.flush()
+    return header["returncode"]
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("clang_tidy_filter.py expects at least the clang-tidy path", file=sys.stderr)
-        return 1
-
-    tidy_exe = sys.argv[1]
-    remaining = sys.argv[2:]
-
-    if "--" in remaining:
-        sep_index = remaining.index("--")
-        tidy_args = remaining[:sep_index]
-        compile_args = remaining[sep_index + 1 :]
-    else:
-        tidy_args = remaining
-        compile_args = []
-
-    sanitized_compile_args = _filter_compile_args(compile_args)
+    argv = sys.argv[1:]
+    if argv and not argv[0].startswith("--"):
+        returncode = _forward_to_daemon(argv)
+        if returncode is not None:
+            return returncode
 
-    cmd = [tidy_exe, *tidy_args]
-    if sanitized_compile_args:
-        cmd.extend(["--", *sanitized_compile_args])
+    import clang_tidy_runner
 
-    result = subprocess.run(cmd, check=False)
-    return result.returncode
+    return clang_tidy_runner.main(argv)
 
 
 if __name__ == "__main__":
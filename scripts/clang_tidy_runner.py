@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+"""clang-tidy driver behind scripts/clang_tidy_filter.py: result cache, batch mode and daemon."""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import shlex
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from clang_tidy_socket import default_socket_path, is_trusted_socket, prepare_socket_dir
+
+CACHE_FORMAT_VERSION = "2"
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Per-TU runs share the cache across processes; the O(cache) eviction scan runs at most this often.
+EVICT_INTERVAL_SECONDS = 300
+# Flags that would make the preprocessing pass write files or stop it from producing output.
+_PREPROCESS_DROP_FLAGS = {"-c", "-MD", "-MMD", "-M", "-MM"}
+_PREPROCESS_DROP_WITH_VALUE = {"-o", "-MF", "-MT", "-MQ"}
+_PREPROCESS_DROP_JOINED = ("-MF", "-MT", "-MQ")
+# FetchContent sources (GLFW and friends) already opt out of clang-tidy in the build.
+DEFAULT_BATCH_EXCLUDES = (r"[\\/]_deps[\\/]",)
+_VERSION_MEMO = {}
+_INHERIT_PARENT_RE = re.compile(r"^\s*InheritParentConfig\s*:\s*(?:true|yes|on)\b", re.IGNORECASE | re.MULTILINE)
+_DIAGNOSTIC_RE = re.compile(
+    r"^(?P<file>.+?):(?P<line>\d+):(?P<column>\d+): (?P<severity>warning|error|note): "
+    r"(?P<message>.*?)(?: \[(?P<check>[^\]]+)\])?$"
+)
+
+
+def _filter_compile_args(args):
+    filtered = []
+    for arg in args:
+        if arg.startswith("--use-port="):
+            continue
+        filtered.append(arg)
+    return filtered
+
+
+def _cache_dir():
+    configured = os.environ.get("NT_CLANG_TIDY_CACHE_DIR")
+    if configured:
+        return Path(configured)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "nt-clang-tidy"
+
+
+def _cache_max_bytes():
+    value = os.environ.get("NT_CLANG_TIDY_CACHE_MAX_SIZE", "")
+    try:
+        return int(value) if value else DEFAULT_CACHE_MAX_BYTES
+    except ValueError:
+        return DEFAULT_CACHE_MAX_BYTES
+
+
+def _cache_enabled():
+    return os.environ.get("NT_CLANG_TIDY_CACHE", "1").lower() not in {"0", "false", "off", "no"}
+
+
+def _atomic_write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def _tidy_version(tidy_exe, cache_dir, env=None):
+    """`clang-tidy --version`, memoized per executable path, size and mtime."""
+    try:
+        stat = os.stat(tidy_exe)
+        stamp = f"{os.path.abspath(tidy_exe)}:{stat.st_size}:{stat.st_mtime_ns}"
+    except OSError:
+        stamp = tidy_exe
+    if stamp in _VERSION_MEMO:
+        return _VERSION_MEMO[stamp]
+    memo = cache_dir / "versions" / (hashlib.sha256(stamp.encode("utf-8")).hexdigest() + ".txt")
+    try:
+        version = memo.read_text(encoding="utf-8")
+    except OSError:
+        result = subprocess.run([tidy_exe, "--version"], capture_output=True, check=False, env=env)
+        if result.returncode != 0:
+            return None
+        version = result.stdout.decode("utf-8", errors="replace")
+        try:
+            _atomic_write(memo, version.encode("utf-8"))
+        except OSError:
+            pass
+    _VERSION_MEMO[stamp] = version
+    return version
+
+
+def _config_files(tidy_args, source_path):
+    """Every config file clang-tidy applies to ``source_path``, nearest first."""
+    for arg in tidy_args:
+        if arg.startswith("--config-file="):
+            return [Path(arg.split("=", 1)[1])]
+    # Without an explicit config clang-tidy uses the nearest .clang-tidy above the source,
+    # merged with the ones above it for as long as each sets InheritParentConfig.
+    if source_path is None:
+        return []
+    configs = []
+    for folder in Path(source_path).resolve().parents:
+        candidate = folder / ".clang-tidy"
+        if not candidate.is_file():
+            continue
+        configs.append(candidate)
+        try:
+            inherits = _INHERIT_PARENT_RE.search(candidate.read_text(encoding="utf-8", errors="replace"))
+        except OSError:
+            inherits = None
+        if inherits is None:
+            break
+    return configs
+
+
+def _source_path(tidy_args, cwd=None):
+    for arg in tidy_args:
+        if arg.startswith("-"):
+            continue
+        candidate = os.path.join(cwd, arg) if cwd else arg
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _preprocess(compile_args, cwd=None, env=None):
+    """Run the TU's own compiler with -E -C so header and NOLINT comment edits invalidate the entry."""
+    if not compile_args or compile_args[0].startswith("-"):
+        return None
+    command = []
+    skip_next = False
+    for arg in compile_args:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in _PREPROCESS_DROP_WITH_VALUE:
+            skip_next = True
+            continue
+        if arg in _PREPROCESS_DROP_FLAGS or arg.startswith(_PREPROCESS_DROP_JOINED):
+            continue
+        command.append(arg)
+    # -C keeps comments: NOLINT/NOLINTNEXTLINE markers change clang-tidy's output.
+    command.extend(["-E", "-C", "-o", "-"])
+    try:
+        result = subprocess.run(command, capture_output=True, check=False, cwd=cwd, env=env)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def _cache_key(tidy_exe, tidy_args, compile_args, sanitized_compile_args, cache_dir, cwd=None, env=None):
+    version = _tidy_version(tidy_exe, cache_dir, env)
+    if version is None:
+        return None
+    # Preprocess with the unfiltered command: emcc needs --use-port= to locate port headers.
+    preprocessed = _preprocess(compile_args, cwd, env)
+    if preprocessed is None:
+        return None
+    configs = _config_files(tidy_args, _source_path(tidy_args, cwd))
+    try:
+        config_bytes = b"".join(
+            str(config).encode("utf-8") + b"\0" + config.read_bytes() + b"\0" for config in configs
+        )
+    except OSError:
+        return None
+
+    digest = hashlib.sha256()
+    for part in (
+        CACHE_FORMAT_VERSION.encode("utf-8"),
+        version.encode("utf-8"),
+        json.dumps([tidy_args, sanitized_compile_args]).encode("utf-8"),
+        config_bytes,
+        preprocessed,
+    ):
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _entry_path(cache_dir, key):
+    return cache_dir / key[:2] / f"{key}.json"
+
+
+def _load_entry(cache_dir, key):
+    path = _entry_path(cache_dir, key)
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        entry = (
+            int(payload["returncode"]),
+            base64.b64decode(payload["stdout"]),
+            base64.b64decode(payload["stderr"]),
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    try:
+        os.utime(path)  # mtime doubles as the LRU timestamp
+    except OSError:
+        pass
+    return entry
+
+
+def _store_entry(cache_dir, key, returncode, stdout, stderr):
+    payload = {
+        "returncode": returncode,
+        "stdout": base64.b64encode(stdout).decode("ascii"),
+        "stderr": base64.b64encode(stderr).decode("ascii"),
+    }
+    _atomic_write(_entry_path(cache_dir, key), json.dumps(payload).encode("utf-8"))
+
+
+def _evict(cache_dir, max_bytes):
+    """Drop least-recently-used entries until the cache is back under 90% of ``max_bytes``."""
+    entries = []
+    total = 0
+    for path in cache_dir.glob("??/*.json"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total += stat.st_size
+    if total <= max_bytes:
+        return
+    target = max_bytes * 9 // 10
+    for _, size, path in sorted(entries):
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        if total <= target:
+            break
+
+
+def _evict_throttled(cache_dir, max_bytes):
+    """Evict from a per-TU process, but scan the cache at most once per EVICT_INTERVAL_SECONDS."""
+    stamp = cache_dir / ".last-evict"
+    try:
+        if time.time() - stamp.stat().st_mtime < EVICT_INTERVAL_SECONDS:
+            return
+    except OSError:
+        pass
+    stamp.parent.mkdir(parents=True, exist_ok=True)
+    stamp.touch()
+    _evict(cache_dir, max_bytes)
+
+
+def _replay(stdout, stderr):
+    sys.stdout.buffer.write(stdout)
+    sys.stdout.buffer.flush()
+    sys.stderr.buffer.write(stderr)
+    sys.stderr.buffer.flush()
+
+
+def _tidy_command(tidy_exe, tidy_args, sanitized_compile_args):
+    cmd = [tidy_exe, *tidy_args]
+    if sanitized_compile_args:
+        cmd.extend(["--", *sanitized_compile_args])
+    return cmd
+
+
+def execute_tidy(tidy_exe, tidy_args, compile_args, cwd=None, env=None):
+    """Run (or replay) clang-tidy with captured output; returns ``(returncode, stdout, stderr, cached)``."""
+    sanitized_compile_args = _filter_compile_args(compile_args)
+    cmd = _tidy_command(tidy_exe, tidy_args, sanitized_compile_args)
+
+    key = None
+    cache_dir = _cache_dir()
+    if _cache_enabled():
+        key = _cache_key(tidy_exe, tidy_args, compile_args, sanitized_compile_args, cache_dir, cwd, env)
+    if key is not None:
+        cached = _load_entry(cache_dir, key)
+        if cached is not None:
+            return (*cached, True)
+
+    result = subprocess.run(cmd, capture_output=True, check=False, cwd=cwd, env=env)
+    # Negative codes mean clang-tidy was killed by a signal; never replay those.
+    if key is not None and result.returncode >= 0:
+        try:
+            _store_entry(cache_dir, key, result.returncode, result.stdout, result.stderr)
+        except OSError as exc:
+            print(f"clang_tidy_runner.py: cache write failed: {exc}", file=sys.stderr)
+    return result.returncode, result.stdout, result.stderr, False
+
+
+def run_tidy(tidy_exe, tidy_args, compile_args):
+    if not _cache_enabled():
+        cmd = _tidy_command(tidy_exe, tidy_args, _filter_compile_args(compile_args))
+        return subprocess.run(cmd, check=False).returncode
+    returncode, stdout, stderr, cached = execute_tidy(tidy_exe, tidy_args, compile_args)
+    _replay(stdout, stderr)
+    if not cached:
+        try:
+            _evict_throttled(_cache_dir(), _cache_max_bytes())
+        except OSError as exc:
+            print(f"clang_tidy_runner.py: cache eviction failed: {exc}", file=sys.stderr)
+    return returncode
+
+
+def load_compile_commands(path, excludes=DEFAULT_BATCH_EXCLUDES):
+    """Return ``(directory, file, compile_args)`` per TU in ``compile_commands.json``."""
+    with open(path, encoding="utf-8") as fp:
+        entries = json.load(fp)
+    patterns = [re.compile(pattern) for pattern in excludes]
+    units = []
+    seen = set()
+    for entry in entries:
+        directory = entry.get("directory") or os.path.dirname(os.path.abspath(path))
+        source = os.path.normpath(os.path.join(directory, entry["file"]))
+        if source in seen or any(pattern.search(source) for pattern in patterns):
+            continue
+        seen.add(source)
+        if "arguments" in entry:
+            compile_args = list(entry["arguments"])
+        else:
+            compile_args = shlex.split(entry["command"])
+        units.append((directory, source, compile_args))
+    return units
+
+
+def _run_unit(tidy_exe, tidy_args, unit):
+    directory, source, compile_args = unit
+    started = time.perf_counter()
+    returncode, stdout, stderr, cached = execute_tidy(tidy_exe, [*tidy_args, source], compile_args, directory)
+    return {
+        "file": source,
+        "directory": directory,
+        "returncode": returncode,
+        "seconds": round(time.perf_counter() - started, 3),
+        "cached": cached,
+        "stdout": stdout.decode("utf-8", errors="replace"),
+        "stderr": stderr.decode("utf-8", errors="replace"),
+    }
+
+
+def _diagnostic_blocks(output, directory):
+    """Split clang-tidy output into warning/error blocks (notes and source excerpts attached)."""
+    blocks = []
+    current = None
+    for line in output.splitlines():
+        match = _DIAGNOSTIC_RE.match(line)
+        if match and match.group("severity") != "note":
+            file_name = os.path.normpath(os.path.join(directory, match.group("file")))
+            current = {
+                "file": file_name,
+                "line": int(match.group("line")),
+                "column": int(match.group("column")),
+                "severity": match.group("severity"),
+                "message": match.group("message"),
+                "check": match.group("check"),
+                "text": [line],
+            }
+            blocks.append(current)
+        elif current is not None:
+            current["text"].append(line)
+    return blocks
+
+
+def merge_results(results):
+    """Merge per-TU results; a header diagnostic reported by several TUs is kept once."""
+    diagnostics = {}
+    for result in results:
+        result["diagnostics"] = 0
+        for block in _diagnostic_blocks(result["stdout"], result["directory"]):
+            key = (block["file"], block["line"], block["column"], block["severity"], block["message"])
+            result["diagnostics"] += 1
+            if key in diagnostics:
+                diagnostics[key]["reported_by"].append(result["file"])
+                continue
+            block["text"] = "\n".join(block["text"])
+            block["reported_by"] = [result["file"]]
+            diagnostics[key] = block
+    merged = sorted(diagnostics.values(), key=lambda item: (item["file"], item["line"], item["column"]))
+    units = [
+        {
+            "file": result["file"],
+            "returncode": result["returncode"],
+            "seconds": result["seconds"],
+            "cached": result["cached"],
+            "diagnostics": result["diagnostics"],
+        }
+        for result in sorted(results, key=lambda item: item["seconds"], reverse=True)
+    ]
+    failed = [result for result in results if result["returncode"] != 0]
+    return {
+        "summary": {
+            "translation_units": len(results),
+            "failed": len(failed),
+            "cached": sum(1 for result in results if result["cached"]),
+            "diagnostics": len(merged),
+            "total_seconds": round(sum(result["seconds"] for result in results), 3),
+        },
+        "translation_units": units,
+        "diagnostics": merged,
+        "errors": [
+            {"file": result["file"], "returncode": result["returncode"], "stderr": result["stderr"]}
+            for result in failed
+            if result["stderr"].strip()
+        ],
+    }
+
+
+def _print_report(report, slowest):
+    for diagnostic in report["diagnostics"]:
+        print(diagnostic["text"])
+    for error in report["errors"]:
+        print(f"--- {error['file']} (exit {error['returncode']})", file=sys.stderr)
+        print(error["stderr"].rstrip(), file=sys.stderr)
+    summary = report["summary"]
+    print(
+        f"clang-tidy: {summary['translation_units']} TUs, {summary['failed']} failed, "
+        f"{summary['cached']} cached, {summary['diagnostics']} unique diagnostics, "
+        f"{summary['total_seconds']:.1f}s total"
+    )
+    for unit in report["translation_units"][:slowest]:
+        marker = " (cached)" if unit["cached"] else ""
+        print(f"  {unit['seconds']:8.3f}s  {unit['file']}{marker}")
+
+
+def run_batch(argv):
+    parser = argparse.ArgumentParser(
+        prog="clang_tidy_filter.py --batch",
+        description="Run clang-tidy over every TU in compile_commands.json on a process pool.",
+    )
+    parser.add_argument("-p", "--compile-commands", required=True, help="compile_commands.json or its build directory")
+    parser.add_argument("--clang-tidy", default="clang-tidy", help="clang-tidy executable")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Parallel clang-tidy processes")
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        help=f"Regex of source paths to skip (repeatable; default: {' '.join(DEFAULT_BATCH_EXCLUDES)})",
+    )
+    parser.add_argument("--report", help="Write the merged report as JSON to this path")
+    parser.add_argument("--slowest", type=int, default=10, help="Number of slowest TUs to list")
+    parser.add_argument("tidy_args", nargs=argparse.REMAINDER, help="Extra clang-tidy arguments after '--'")
+    args = parser.parse_args(argv)
+
+    tidy_args = args.tidy_args[1:] if args.tidy_args[:1] == ["--"] else args.tidy_args
+    database = Path(args.compile_commands)
+    if database.is_dir():
+        database = database / "compile_commands.json"
+    try:
+        units = load_compile_commands(database, args.exclude if args.exclude is not None else DEFAULT_BATCH_EXCLUDES)
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"Error: unable to read '{database}': {exc}", file=sys.stderr)
+        return 1
+    if not units:
+        print(f"Error: no translation units found in '{database}'", file=sys.stderr)
+        return 1
+
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(units)))) as pool:
+        results = list(pool.map(_run_unit, [args.clang_tidy] * len(units), [tidy_args] * len(units), units))
+    if _cache_enabled() and not all(result["cached"] for result in results):
+        # One eviction pass for the whole batch instead of one per stored entry.
+        try:
+            _evict(_cache_dir(), _cache_max_bytes())
+        except OSError as exc:
+            print(f"clang_tidy_runner.py: cache eviction failed: {exc}", file=sys.stderr)
+
+    report = merge_results(results)
+    _print_report(report, args.slowest)
+    if args.report:
+        _atomic_write(Path(args.report), (json.dumps(report, indent=2) + "\n").encode("utf-8"))
+    return 1 if report["summary"]["failed"] else 0
+
+
+def split_invocation(argv):
+    """Split ``<clang-tidy> [tidy args] [-- compile args]`` as passed by CMake."""
+    tidy_exe = argv[0]
+    remaining = argv[1:]
+    if "--" in remaining:
+        sep_index = remaining.index("--")
+        return tidy_exe, remaining[:sep_index], remaining[sep_index + 1 :]
+    return tidy_exe, remaining, []
+
+
+def _read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise ConnectionError("truncated message")
+    return data
+
+
+class _TidyRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in; a JSON header line plus raw stdout/stderr bytes out."""
+
+    def handle(self):
+        server = self.server
+        server.touch()
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        if request.get("command") == "shutdown":
+            self._respond(0, b"", b"")
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return
+        if request.get("command") == "ping":
+            self._respond(0, f"{server.active} active, {server.queued} queued\n".encode("utf-8"), b"")
+            return
+        try:
+            tidy_exe, tidy_args, compile_args = split_invocation(request["argv"])
+        except (KeyError, IndexError, TypeError):
+            self._respond(1, b"", b"clang_tidy_runner.py: malformed daemon request\n")
+            return
+        with server.counter_lock:
+            server.queued += 1
+        with server.slots:
+            with server.counter_lock:
+                server.queued -= 1
+                server.active += 1
+            try:
+                returncode, stdout, stderr, cached = execute_tidy(
+                    tidy_exe, tidy_args, compile_args, request.get("cwd"), request.get("env")
+                )
+                if not cached:
+                    server.cache_dirty = True
+            except OSError as exc:
+                returncode, stdout, stderr = 1, b"", f"clang_tidy_runner.py: {exc}\n".encode("utf-8")
+            finally:
+                with server.counter_lock:
+                    server.active -= 1
+        server.touch()
+        self._respond(returncode, stdout, stderr)
+
+    def _respond(self, returncode, stdout, stderr):
+        header = {"returncode": returncode, "stdout": len(stdout), "stderr": len(stderr)}
+        self.wfile.write(json.dumps(header).encode("utf-8") + b"\n" + stdout + stderr)
+
+
+# socketserver.UnixStreamServer only exists where AF_UNIX does; on Windows the shim still
+# imports this module to run clang-tidy in-process, so the daemon class must not break that.
+if hasattr(socket, "AF_UNIX"):
+
+    class TidyDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """Long-lived clang-tidy server; each connection waits for one of ``jobs`` execution slots."""
+
+        daemon_threads = True
+
+        def __init__(self, socket_path, jobs, idle_timeout=0):
+            self.slots = threading.BoundedSemaphore(jobs)
+            self.counter_lock = threading.Lock()
+            self.active = 0
+            self.queued = 0
+            self.idle_timeout = idle_timeout
+            self.last_activity = time.monotonic()
+            self.cache_dirty = False
+            # Create the socket 0600 from the start instead of tightening it after bind().
+            previous_umask = os.umask(0o177)
+            try:
+                super().__init__(socket_path, _TidyRequestHandler)
+            finally:
+                os.umask(previous_umask)
+            os.chmod(socket_path, 0o600)
+
+        def touch(self):
+            self.last_activity = time.monotonic()
+
+        def service_actions(self):
+            idle = time.monotonic() - self.last_activity
+            if self.cache_dirty and not self.active and not self.queued:
+                # Evict on an idle tick rather than after every stored entry.
+                self.cache_dirty = False
+                if _cache_enabled():
+                    try:
+                        _evict(_cache_dir(), _cache_max_bytes())
+                    except OSError as exc:
+                        print(f"clang_tidy_runner.py: cache eviction failed: {exc}", file=sys.stderr)
+            if self.idle_timeout and idle > self.idle_timeout and not self.active and not self.queued:
+                threading.Thread(target=self.shutdown, daemon=True).start()
+
+
+def _daemon_request(socket_path, request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        stream = client.makefile("rb")
+        header = json.loads(stream.readline())
+        return header["returncode"], _read_exactly(stream, header["stdout"]), _read_exactly(stream, header["stderr"])
+
+
+def run_daemon(argv):
+    parser = argparse.ArgumentParser(
+        prog="clang_tidy_filter.py --daemon",
+        description="Serve clang-tidy requests from clang_tidy_filter.py over a Unix socket.",
+    )
+    parser.add_argument("--socket", default=None, help="Socket path (default: NT_CLANG_TIDY_DAEMON_SOCKET or a per-user path)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Concurrent clang-tidy processes")
+    parser.add_argument("--idle-timeout", type=float, default=0, help="Exit after this many idle seconds (0: never)")
+    parser.add_argument("--stop", action="store_true", help="Ask a running daemon to exit")
+    parser.add_argument("--status", action="store_true", help="Report whether a daemon is running")
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: Unix sockets are not available on this platform", file=sys.stderr)
+        return 1
+    socket_path = args.socket or os.environ.get("NT_CLANG_TIDY_DAEMON_SOCKET") or default_socket_path()
+    if os.path.exists(socket_path) and not is_trusted_socket(socket_path):
+        print(
+            f"Error: {socket_path} exists but is not a 0600 socket owned by this user; remove it or pick --socket",
+            file=sys.stderr,
+        )
+        return 1
+    if args.stop or args.status:
+        try:
+            _, stdout, _ = _daemon_request(socket_path, {"command": "shutdown" if args.stop else "ping"})
+        except OSError:
+            print(f"No clang-tidy daemon listening on {socket_path}")
+            return 1
+        print(f"clang-tidy daemon on {socket_path}: {stdout.decode('utf-8').strip() or 'stopping'}")
+        return 0
+
+    try:
+        _daemon_request(socket_path, {"command": "ping"})
+    except OSError:
+        pass
+    else:
+        print(f"Error: a clang-tidy daemon is already listening on {socket_path}", file=sys.stderr)
+        return 1
+    try:
+        prepare_socket_dir(socket_path)
+    except OSError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # stale socket from a daemon that did not exit cleanly
+    with TidyDaemon(socket_path, max(1, args.jobs), args.idle_timeout) as server:
+        print(f"clang-tidy daemon listening on {socket_path} ({max(1, args.jobs)} jobs)", flush=True)
+        try:
+            server.serve_forever(poll_interval=1.0)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            try:
+                os.unlink(socket_path)
+            except OSError:
+                pass
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--batch"]:
+        return run_batch(argv[1:])
+    if argv[:1] == ["--daemon"]:
+        return run_daemon(argv[1:])
+
+    if not argv:
+        print("clang_tidy_filter.py expects at least the clang-tidy path", file=sys.stderr)
+        return 1
+
+    return run_tidy(*split_invocation(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+# Daemon socket location shared by the clang_tidy_filter.py shim and clang_tidy_runner.py.
+# Imports only os/stat so the per-TU shim stays cheap to start.
+import os
+import stat
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, f"nt-clang-tidy-{os.getuid()}.sock")
+    # Shared temp dirs get a private 0700 directory so no other user can pre-create the socket.
+    base = os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(base, f"nt-clang-tidy-{os.getuid()}", "daemon.sock")
+
+
+def is_trusted_socket(socket_path):
+    """Whether ``socket_path`` is a socket owned by this user that nobody else can access."""
+    try:
+        info = os.lstat(socket_path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+
+def prepare_socket_dir(socket_path):
+    """Create the socket's directory (0700) and refuse one another user could write into."""
+    folder = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(folder, mode=0o700, exist_ok=True)
+    info = os.lstat(folder)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{folder} is not a directory")
+    # Our own directory, or a sticky root-owned one such as /tmp where others cannot replace our files.
+    if info.st_uid == os.getuid():
+        return
+    if info.st_uid == 0 and info.st_mode & stat.S_ISVTX:
+        return
+    raise PermissionError(f"{folder} is owned by uid {info.st_uid}; refusing to place the daemon socket there")
@@ -194,7 +194,7 @@ async function deriveMetrics(reportRoot, fallbackCommit) {
             metrics.commitHash = headCommit.git_sha ?? fallbackCommit ?? null;
             metrics.commitMessage = headCommit.subject ?? headCommit.git_message ?? null;
             const wasmEntry = headCommit.artifacts?.find((artifact) =>
-                artifact.file_name?.endsWith('.wasm'),
+                artifact.file_name?.endsWith('.wasm') && !artifact.file_name.includes('#'),
             );
             if (wasmEntry?.size_bytes) {
                 metrics.wasmSizeKb = Number((wasmEntry.size_bytes / 1024).toFixed(2));
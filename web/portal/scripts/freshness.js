@@ -227,6 +227,7 @@
             return [];
         }
         return headCommit.artifacts
+            .filter((artifact) => !String(artifact.file_name ?? '').includes('#'))
             .map((artifact) => {
                 const sizeBytes = typeof artifact.size_bytes === 'number' ? artifact.size_bytes : null;
                 return {